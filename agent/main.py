@@ -7,17 +7,22 @@ LiveKit Voice Agent
 """
 
 import asyncio
+import collections
 import logging
 import os
 import wave
 import uuid
-import requests
+import aiohttp
+import numpy as np
 import webrtcvad
 import json
 import base64
+import io
+import re
+import urllib.request
 from datetime import datetime
 from livekit import rtc
-from livekit.agents import JobContext, WorkerOptions, cli
+from livekit.agents import JobContext, JobProcess, WorkerOptions, cli
 
 # #region debug logging
 DEBUG_LOG_PATH = "/app/.cursor/debug.log"
@@ -51,13 +56,77 @@ LM_STUDIO_URL = os.getenv("LM_STUDIO_URL", "http://host.docker.internal:1234/v1/
 LM_STUDIO_MODEL = os.getenv("LM_STUDIO_MODEL", "mistralai/ministral-3-3b")
 XTTS_API_URL = os.getenv("XTTS_API_URL", "http://host.docker.internal:8020/tts")
 STT_API_URL = os.getenv("STT_API_URL", "http://stt-service:8030/transcribe")
+STT_PCM_URL = os.getenv("STT_PCM_URL", STT_API_URL.rstrip("/") + "/pcm")
+# Stream utterance audio to stt_service over a WebSocket while the caller speaks (falls back to STT_PCM_URL)
+STT_STREAMING = os.getenv("STT_STREAMING", "true").lower() == "true"
+STT_STREAM_URL = os.getenv("STT_STREAM_URL", STT_API_URL.rstrip("/") + "/stream")
+STT_STREAM_FINAL_TIMEOUT = float(os.getenv("STT_STREAM_FINAL_TIMEOUT", "5"))
+# Transcripts whose every segment looks like noise (stt_service segment_info) never reach the LLM.
+# Same rule as Whisper's silence check: both conditions - low confidence alone is common for real 8 kHz speech
+STT_NO_SPEECH_PROB = float(os.getenv("STT_NO_SPEECH_PROB", "0.6"))  # segment is noise above this no_speech_prob
+STT_MIN_AVG_LOGPROB = float(os.getenv("STT_MIN_AVG_LOGPROB", "-1.0"))  # ... and below this avg_logprob
+# stt_service answers 503 + Retry-After when it cannot start a request within the deadline
+STT_DEADLINE = float(os.getenv("STT_DEADLINE", "3"))  # seconds the request may wait in the stt_service queue
+STT_TIMEOUT = float(os.getenv("STT_TIMEOUT", "15"))  # read timeout for /transcribe/pcm
+STT_RETRY_MAX_WAIT = float(os.getenv("STT_RETRY_MAX_WAIT", "1"))  # retry a 503 once if Retry-After is at most this
+# stt_service decode profile: greedy "realtime" for short answers, STT_PROFILE for everything longer
+STT_PROFILE = os.getenv("STT_PROFILE", "balanced")
+STT_REALTIME_MAX_SECONDS = float(os.getenv("STT_REALTIME_MAX_SECONDS", "2.0"))
 WEB_API_URL = os.getenv("WEB_API_URL", "http://web-ui:3000/api/agent-message")
+# Stream LLM tokens and synthesize each finished sentence while the model keeps generating
+LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() == "true"
+SENTENCE_MIN_CHARS = int(os.getenv("SENTENCE_MIN_CHARS", "10"))  # Merge shorter fragments into the next sentence
+SENTENCE_MAX_CHARS = int(os.getenv("SENTENCE_MAX_CHARS", "250"))  # Keep below XTTS chunk limit
+# Multi-turn context: history per call, trimmed to a token budget; Ollama keeps model + KV cache loaded for OLLAMA_KEEP_ALIVE
+LLM_SYSTEM_PROMPT = os.getenv("LLM_SYSTEM_PROMPT", "Sen telefonda konuşan yardımsever bir asistansın. Kısa, net ve doğal Türkçe cümlelerle cevap ver.")
+LLM_HISTORY_TOKENS = int(os.getenv("LLM_HISTORY_TOKENS", "1500"))  # Keep below the model context minus max answer length
+LLM_CHARS_PER_TOKEN = 3  # Rough estimate for Turkish text (no tokenizer in the agent)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Stream PCM from XTTS /tts/stream and play it while later chunks are still being synthesized
+TTS_STREAMING = os.getenv("TTS_STREAMING", "true").lower() == "true"
+XTTS_STREAM_URL = os.getenv("XTTS_STREAM_URL", XTTS_API_URL.rstrip("/") + "/stream")
+# Without streaming: ask /tts to return after the first text chunk and fetch the rest by sequence number
+TTS_PIPELINED = os.getenv("TTS_PIPELINED", "true").lower() == "true"
+# false: non-streaming /tts returns PCM in the response body; true: WAV files through the shared ses/ bind mount
+TTS_SHARED_FILES = os.getenv("TTS_SHARED_FILES", "false").lower() == "true"
+XTTS_JOBS_URL = os.getenv("XTTS_JOBS_URL", XTTS_API_URL.rstrip("/") + "/jobs")
+XTTS_ACTIVE_VOICE_URL = os.getenv("XTTS_ACTIVE_VOICE_URL", XTTS_API_URL.rstrip("/").rsplit("/", 1)[0] + "/voices/active")
+# Greeting is rendered once per active XTTS voice (in the worker's prewarm) and played from memory
+GREETING_TEXT = os.getenv("GREETING_TEXT", " Merhaba. Size nasıl yardımcı olabilirim ?")
+GREETING_PRERENDER_TIMEOUT = float(os.getenv("GREETING_PRERENDER_TIMEOUT", "30"))
+
+# Outbound HTTP: one keep-alive pool per upstream - (max connections, read timeout seconds)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+HTTP_UPSTREAMS = {
+    "stt": (int(os.getenv("STT_MAX_CONNECTIONS", "16")), STT_TIMEOUT),
+    "stt_stream": (int(os.getenv("STT_STREAM_MAX_CONNECTIONS", "256")), 60),  # one long-lived WebSocket per track
+    "llm": (int(os.getenv("LLM_MAX_CONNECTIONS", "16")), 30),
+    "xtts": (int(os.getenv("XTTS_MAX_CONNECTIONS", "16")), 180),  # XTTS can take 1-2 minutes
+    "web": (int(os.getenv("WEB_MAX_CONNECTIONS", "8")), 30),
+}
 
 SAMPLE_RATE = 16000
 CHANNELS = 1
 VAD_MODE = 3  # Aggressive
 FRAME_DURATION_MS = 30
 CHUNK_SIZE_BYTES = int(SAMPLE_RATE * FRAME_DURATION_MS / 1000) * 2  # 960 bytes
+VAD_RING_BYTES = CHUNK_SIZE_BYTES * 128  # ~3.8s of resampled audio; a multiple of CHUNK_SIZE_BYTES so frames never wrap
+LEVEL_LOG_EVERY_CHUNKS = 100  # SIP audio level log interval
+# End-of-utterance detection: "fixed" (constant trailing silence) or "adaptive"
+ENDPOINTER = os.getenv("ENDPOINTER", "adaptive")
+ENDPOINT_SILENCE_MS = int(os.getenv("ENDPOINT_SILENCE_MS", "510"))  # fixed rule (17 frames at 30ms)
+ENDPOINT_MIN_SILENCE_MS = int(os.getenv("ENDPOINT_MIN_SILENCE_MS", "270"))  # short answers ("evet", "hayır")
+ENDPOINT_MAX_SILENCE_MS = int(os.getenv("ENDPOINT_MAX_SILENCE_MS", "900"))  # long utterances / mid-sentence pauses
+ENDPOINT_SHORT_UTTERANCE_MS = int(os.getenv("ENDPOINT_SHORT_UTTERANCE_MS", "700"))
+ENDPOINT_LONG_UTTERANCE_MS = int(os.getenv("ENDPOINT_LONG_UTTERANCE_MS", "4000"))
+ENDPOINT_NOISE_MARGIN = float(os.getenv("ENDPOINT_NOISE_MARGIN", "2.0"))  # VAD speech below noise floor * margin counts as silence
+ENDPOINT_USE_PARTIALS = os.getenv("ENDPOINT_USE_PARTIALS", "true").lower() == "true"
+
+# Barge-in (full duplex): keep VAD running during playback, cancel the agent's turn when the caller talks over it
+BARGE_IN = os.getenv("BARGE_IN", "false").lower() == "true"
+BARGE_IN_MIN_SPEECH_MS = int(os.getenv("BARGE_IN_MIN_SPEECH_MS", "300"))  # sustained speech needed to interrupt
+BARGE_IN_MIN_SPEECH_FRAMES = max(1, BARGE_IN_MIN_SPEECH_MS // FRAME_DURATION_MS)
 
 # ===== LOGGING =====
 logging.basicConfig(level=logging.INFO)
@@ -66,90 +135,306 @@ logger = logging.getLogger("voice-agent")
 # ===== GLOBAL MODELS =====
 # STT model removed - now using external STT service
 
+# ===== HTTP CLIENT POOL =====
+
+class HttpClientPool:
+    """
+    Shared aiohttp sessions for all outbound calls of this worker process.
+    One session (= one keep-alive connection pool) per upstream with its own
+    connection limit and timeouts. Jobs acquire the pool on start and release
+    it on shutdown; sessions are closed when the last job is gone.
+    """
+
+    def __init__(self, upstreams: dict):
+        self.upstreams = upstreams
+        self._sessions = {}
+        self._users = 0
+
+    def session(self, upstream: str) -> aiohttp.ClientSession:
+        session = self._sessions.get(upstream)
+        if session is None or session.closed:
+            limit, read_timeout = self.upstreams[upstream]
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=limit, keepalive_timeout=HTTP_KEEPALIVE_SECONDS),
+                # Same semantics as requests' timeout: connect + max idle between reads, no total cap (streams)
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=read_timeout)
+            )
+            self._sessions[upstream] = session
+            logger.info(f"🌐 HTTP pool created for '{upstream}' (limit={limit}, read_timeout={read_timeout}s)")
+        return session
+
+    def acquire(self):
+        self._users += 1
+
+    async def release(self):
+        self._users -= 1
+        if self._users <= 0:
+            self._users = 0
+            await self.close()
+
+    async def close(self):
+        sessions, self._sessions = self._sessions, {}
+        for upstream, session in sessions.items():
+            if not session.closed:
+                await session.close()
+                logger.info(f"🌐 HTTP pool closed for '{upstream}'")
+
+http_pool = HttpClientPool(HTTP_UPSTREAMS)
+
 # ===== API CALLS =====
 
-async def call_stt(audio_file: str) -> str:
-    """Call external STT service"""
+def transcript_text(result: dict) -> str:
+    """Text of an STT result, or "" when the service skipped it or every segment scores as noise"""
+    text = result.get("text", "").strip()
+    if result.get("skipped"):
+        logger.info(f"🔇 STT skipped the utterance: {result['skipped']} ({result.get('speech_seconds')}s speech)")
+        return ""
+    segments = result.get("segment_info") or []
+    noisy = [
+        seg for seg in segments
+        if seg.get("no_speech_prob", 0) > STT_NO_SPEECH_PROB and seg.get("avg_logprob", 0) < STT_MIN_AVG_LOGPROB
+    ]
+    if text and segments and len(noisy) == len(segments):
+        scores = [(seg.get("no_speech_prob"), seg.get("avg_logprob")) for seg in segments]
+        logger.info(f"🔇 Dropping noise transcript '{text}' (no_speech_prob, avg_logprob): {scores}")
+        return ""
+    return text
+
+def stt_profile(pcm_bytes: int) -> str:
+    """Decode profile for an utterance of this many bytes of 16 kHz int16 PCM"""
+    seconds = pcm_bytes / 2 / SAMPLE_RATE
+    return "realtime" if seconds < STT_REALTIME_MAX_SECONDS else STT_PROFILE
+
+async def call_stt(audio_data: bytes) -> str:
+    """Call external STT service with raw 16 kHz int16 PCM (no WAV, no temp files)"""
     try:
-        logger.info(f"📞 Calling STT service: {STT_API_URL}")
-        # Run blocking request in executor to avoid blocking event loop
-        import concurrent.futures
-        loop = asyncio.get_event_loop()
-        
-        def _make_request():
-            with open(audio_file, 'rb') as f:
-                files = {'audio_file': (os.path.basename(audio_file), f, 'audio/wav')}
-                data = {'language': 'tr'}
-                response = requests.post(STT_API_URL, files=files, data=data, timeout=60)
+        profile = stt_profile(len(audio_data))
+        logger.info(f"📞 Calling STT service: {STT_PCM_URL} ({len(audio_data)} bytes PCM, {profile})")
+        for attempt in range(2):
+            async with http_pool.session("stt").post(
+                STT_PCM_URL,
+                params={'language': 'tr', 'sample_rate': SAMPLE_RATE, 'deadline': STT_DEADLINE, 'profile': profile},
+                data=audio_data,
+                headers={'Content-Type': 'application/octet-stream'}
+            ) as response:
+                if response.status == 503:
+                    retry_after = float(response.headers.get('Retry-After', '0') or 0)
+                    if attempt == 0 and retry_after <= STT_RETRY_MAX_WAIT:
+                        logger.warning(f"⚠️ STT busy, retrying in {retry_after:.0f}s")
+                        await asyncio.sleep(retry_after)
+                        continue
+                    logger.warning(f"⚠️ STT overloaded (Retry-After: {retry_after:.0f}s), dropping utterance")
+                    return ""
                 response.raise_for_status()
-                return response.json()
-        
-        result = await loop.run_in_executor(None, _make_request)
-        text = result.get("text", "").strip()
+                result = await response.json(content_type=None)
+                break
+        text = transcript_text(result)
         logger.info(f"✅ STT completed: '{text}' (length: {len(text)})")
         return text
     except Exception as e:
         logger.error(f"❌ STT error: {e}", exc_info=True)
         return ""
 
-async def call_ollama(user_text: str) -> str:
+class SttStream:
+    """
+    Persistent WebSocket session to stt_service for one track.
+    Utterance audio is streamed while the caller speaks; the service re-decodes a
+    rolling window and sends partial hypotheses, so the final transcript is ready
+    right after endpointing instead of after a full upload + decode.
+    """
+
+    def __init__(self):
+        self.ws = None
+        self.partial = ""  # latest partial hypothesis of the current utterance
+        self.utterance = 0  # server-side utterance number of the audio being sent now (advances on end/reset)
+        self.sent_bytes = 0  # PCM sent for the current utterance (picks the final decode profile)
+        self._finals = collections.deque()  # futures waiting for "final", in utterance order
+        self._reader = None
+
+    @property
+    def connected(self) -> bool:
+        return self.ws is not None and not self.ws.closed
+
+    async def connect(self):
+        self.ws = await http_pool.session("stt_stream").ws_connect(
+            STT_STREAM_URL,
+            params={'language': 'tr', 'sample_rate': SAMPLE_RATE, 'profile': STT_PROFILE},
+            heartbeat=20
+        )
+        self.utterance = 0
+        self._reader = asyncio.create_task(self._read())
+        logger.info(f"🔌 STT stream connected: {STT_STREAM_URL}")
+
+    async def _read(self):
+        try:
+            async for msg in self.ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                data = json.loads(msg.data)
+                if data.get("type") == "partial":
+                    # A decode that was in flight at end/reset still reports on the previous utterance
+                    if data.get("utterance", self.utterance) == self.utterance:
+                        self.partial = data.get("text", "")
+                elif data.get("type") == "final" and self._finals:
+                    future = self._finals.popleft()
+                    if not future.done():
+                        future.set_result(data)
+                elif data.get("type") == "error" and self._finals:
+                    # Final not admitted (stt_service overloaded) - _transcribe falls back to the PCM upload
+                    future = self._finals.popleft()
+                    if not future.done():
+                        future.set_exception(RuntimeError(f"STT stream {data.get('status')}: {data.get('detail')}"))
+        except Exception as e:
+            logger.warning(f"⚠️ STT stream reader stopped: {e}")
+        finally:
+            while self._finals:
+                future = self._finals.popleft()
+                if not future.done():
+                    future.set_exception(ConnectionError("STT stream closed"))
+
+    async def send_audio(self, chunk: bytes):
+        self.sent_bytes += len(chunk)
+        await self.ws.send_bytes(chunk)
+
+    async def end_utterance(self) -> asyncio.Future:
+        """Ask for the final transcript of the streamed utterance; the returned future resolves with the final message"""
+        future = asyncio.get_event_loop().create_future()
+        self._finals.append(future)
+        self.partial = ""
+        self.utterance += 1
+        profile = stt_profile(self.sent_bytes)
+        self.sent_bytes = 0
+        await self.ws.send_str(json.dumps({"type": "end", "profile": profile}))
+        return future
+
+    async def reset(self):
+        """Discard the streamed utterance"""
+        self.partial = ""
+        self.sent_bytes = 0
+        if self.connected:
+            self.utterance += 1
+            await self.ws.send_str(json.dumps({"type": "reset"}))
+
+    async def close(self):
+        if self.ws is not None and not self.ws.closed:
+            await self.ws.close()
+        if self._reader is not None:
+            self._reader.cancel()
+
+class ConversationHistory:
+    """
+    Per-call chat history for the LLM, bounded by a token budget.
+    Ollama: the `context` token array returned with the previous answer is sent
+    back, so only the new user turn is prefilled and the KV cache is reused.
+    OpenAI-compatible: messages are append-only behind a fixed system prompt, so
+    every request shares a stable prefix with the previous one.
+    Over budget, the oldest turns are dropped in one go down to half the budget,
+    so the prefix is rebuilt rarely instead of on every turn.
+    """
+
+    def __init__(self, system_prompt: str = LLM_SYSTEM_PROMPT, max_tokens: int = LLM_HISTORY_TOKENS):
+        self.system_prompt = system_prompt
+        self.max_tokens = max_tokens
+        self.turns = []  # (user_text, response_text)
+        self.context = None  # Ollama token array covering system prompt + all turns
+        self.pending_context = None  # context of the answer currently being generated
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        return len(text) // LLM_CHARS_PER_TOKEN + 1
+
+    def _estimated_tokens(self) -> int:
+        return self.estimate_tokens(self.system_prompt) + sum(
+            self.estimate_tokens(user_text) + self.estimate_tokens(response_text)
+            for user_text, response_text in self.turns
+        )
+
+    def ollama_payload(self, user_text: str) -> dict:
+        """prompt/system/context fields for /api/generate"""
+        payload = {"keep_alive": OLLAMA_KEEP_ALIVE}
+        if self.context:
+            # Server already has everything before this turn (system prompt included) in the token array;
+            # a "system" field would be templated in again on every turn
+            payload["context"] = self.context
+            payload["prompt"] = user_text
+            return payload
+        if self.system_prompt:
+            payload["system"] = self.system_prompt
+        if self.turns:
+            # No token array (first turn after a trim or an interrupted answer) - prefill the transcript once
+            lines = [f"Kullanıcı: {u}\nAsistan: {r}" for u, r in self.turns]
+            payload["prompt"] = "\n".join(lines) + f"\nKullanıcı: {user_text}"
+        else:
+            payload["prompt"] = user_text
+        return payload
+
+    def messages(self, user_text: str) -> list:
+        """Chat messages for the OpenAI-compatible API, oldest first"""
+        messages = [{"role": "system", "content": self.system_prompt}] if self.system_prompt else []
+        for u, r in self.turns:
+            messages.append({"role": "user", "content": u})
+            messages.append({"role": "assistant", "content": r})
+        messages.append({"role": "user", "content": user_text})
+        return messages
+
+    def add_turn(self, user_text: str, response_text: str):
+        """Record a finished (or interrupted) turn and enforce the token budget"""
+        self.turns.append((user_text, response_text))
+        # Without a token array for this answer the old one no longer matches the history
+        self.context, self.pending_context = self.pending_context, None
+        used = len(self.context) if self.context else self._estimated_tokens()
+        if used > self.max_tokens:
+            dropped = 0
+            while self.turns and self._estimated_tokens() > self.max_tokens // 2:
+                self.turns.pop(0)
+                dropped += 1
+            self.context = None
+            logger.info(f"🧠 History over budget ({used} > {self.max_tokens} tokens) - dropped {dropped} oldest turns, {len(self.turns)} left")
+
+async def call_ollama(user_text: str, history: ConversationHistory = None) -> str:
     """Call local Ollama LLM API"""
     try:
         logger.info(f"🤖 [call_ollama] Starting - URL: {OLLAMA_URL}, text length: {len(user_text)}")
-        # Run blocking request in executor to avoid blocking event loop
-        loop = asyncio.get_event_loop()
-        
-        def _make_ollama_request():
-            logger.info(f"🤖 [call_ollama] Making HTTP POST request...")
-            resp = requests.post(
-                OLLAMA_URL,
-                json={
-            "model": OLLAMA_MODEL,
-                    "prompt": user_text,
-            "stream": False
-                },
-                timeout=30
-            )
-            logger.info(f"🤖 [call_ollama] HTTP response status: {resp.status_code}")
+        payload = history.ollama_payload(user_text) if history else {"prompt": user_text}
+        async with http_pool.session("llm").post(
+            OLLAMA_URL,
+            json={
+                "model": OLLAMA_MODEL,
+                **payload,
+                "stream": False
+            }
+        ) as resp:
+            logger.info(f"🤖 [call_ollama] HTTP response status: {resp.status}")
             resp.raise_for_status()
-            return resp.json()
-        
-        logger.info(f"🤖 [call_ollama] Running in executor...")
-        data = await loop.run_in_executor(None, _make_ollama_request)
+            data = await resp.json(content_type=None)
         response_text = data.get("response", "Üzgünüm, cevap veremedim.")
-        logger.info(f"🤖 [call_ollama] Response received: {len(response_text)} chars")
+        if history:
+            history.pending_context = data.get("context")
+        logger.info(f"🤖 [call_ollama] Response received: {len(response_text)} chars (prompt_eval_count={data.get('prompt_eval_count')})")
         return response_text
     except Exception as e:
         logger.error(f"❌ [call_ollama] Ollama error: {e}", exc_info=True)
         return "Üzgünüm, bir hata oluştu."
 
-async def call_lm_studio(user_text: str) -> str:
+async def call_lm_studio(user_text: str, history: ConversationHistory = None) -> str:
     """Call LM Studio (OpenAI-compatible API)"""
     try:
         logger.info(f"🤖 [call_lm_studio] Starting - URL: {LM_STUDIO_URL}, text length: {len(user_text)}")
-        loop = asyncio.get_event_loop()
-        
-        def _make_lm_studio_request():
-            logger.info(f"🤖 [call_lm_studio] Making HTTP POST request...")
-            resp = requests.post(
-                LM_STUDIO_URL,
-                json={
-                    "model": LM_STUDIO_MODEL,
-                    "messages": [
-                        {"role": "user", "content": user_text}
-                    ],
-                    "max_tokens": 500,
-                    "temperature": 0.7,
-                    "stream": False
-                },
-                timeout=30
-            )
-            logger.info(f"🤖 [call_lm_studio] HTTP response status: {resp.status_code}")
+        async with http_pool.session("llm").post(
+            LM_STUDIO_URL,
+            json={
+                "model": LM_STUDIO_MODEL,
+                "messages": history.messages(user_text) if history else [
+                    {"role": "user", "content": user_text}
+                ],
+                "max_tokens": 500,
+                "temperature": 0.7,
+                "stream": False
+            }
+        ) as resp:
+            logger.info(f"🤖 [call_lm_studio] HTTP response status: {resp.status}")
             resp.raise_for_status()
-            return resp.json()
-        
-        logger.info(f"🤖 [call_lm_studio] Running in executor...")
-        data = await loop.run_in_executor(None, _make_lm_studio_request)
+            data = await resp.json(content_type=None)
         # OpenAI-compatible response format
         response_text = data.get("choices", [{}])[0].get("message", {}).get("content", "Üzgünüm, cevap veremedim.")
         logger.info(f"🤖 [call_lm_studio] Response received: {len(response_text)} chars")
@@ -158,12 +443,115 @@ async def call_lm_studio(user_text: str) -> str:
         logger.error(f"❌ [call_lm_studio] LM Studio error: {e}", exc_info=True)
         return "Üzgünüm, bir hata oluştu."
 
-async def call_llm(user_text: str) -> str:
+async def call_llm(user_text: str, history: ConversationHistory = None) -> str:
     """Call LLM (Ollama or LM Studio based on LLM_PROVIDER)"""
     if LLM_PROVIDER.lower() == "lm_studio":
-        return await call_lm_studio(user_text)
+        return await call_lm_studio(user_text, history)
     else:
-        return await call_ollama(user_text)
+        return await call_ollama(user_text, history)
+
+async def _stream_post_lines(upstream: str, url: str, payload: dict):
+    """POST with a streamed response and yield non-empty lines as they arrive"""
+    async with http_pool.session(upstream).post(url, json=payload) as resp:
+        resp.raise_for_status()
+        async for line in resp.content:
+            line = line.strip()
+            if line:
+                yield line.decode("utf-8")
+
+async def stream_ollama(user_text: str, history: ConversationHistory = None):
+    """Stream tokens from local Ollama LLM API"""
+    logger.info(f"🤖 [stream_ollama] Starting - URL: {OLLAMA_URL}, text length: {len(user_text)}")
+    payload = {
+        "model": OLLAMA_MODEL,
+        **(history.ollama_payload(user_text) if history else {"prompt": user_text}),
+        "stream": True
+    }
+    async for line in _stream_post_lines("llm", OLLAMA_URL, payload):
+        data = json.loads(line)
+        token = data.get("response", "")
+        if token:
+            yield token
+        if data.get("done"):
+            if history:
+                history.pending_context = data.get("context")
+            logger.info(f"🤖 [stream_ollama] Done (prompt_eval_count={data.get('prompt_eval_count')}, eval_count={data.get('eval_count')})")
+            break
+
+async def stream_lm_studio(user_text: str, history: ConversationHistory = None):
+    """Stream tokens from LM Studio (OpenAI-compatible SSE API)"""
+    logger.info(f"🤖 [stream_lm_studio] Starting - URL: {LM_STUDIO_URL}, text length: {len(user_text)}")
+    payload = {
+        "model": LM_STUDIO_MODEL,
+        "messages": history.messages(user_text) if history else [
+            {"role": "user", "content": user_text}
+        ],
+        "max_tokens": 500,
+        "temperature": 0.7,
+        "stream": True
+    }
+    async for line in _stream_post_lines("llm", LM_STUDIO_URL, payload):
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        delta = json.loads(data).get("choices", [{}])[0].get("delta", {})
+        token = delta.get("content") or ""
+        if token:
+            yield token
+
+async def call_llm_stream(user_text: str, history: ConversationHistory = None):
+    """Stream LLM tokens (Ollama or LM Studio based on LLM_PROVIDER)"""
+    stream = stream_lm_studio if LLM_PROVIDER.lower() == "lm_studio" else stream_ollama
+    produced = False
+    try:
+        async for token in stream(user_text, history):
+            produced = True
+            yield token
+    except Exception as e:
+        logger.error(f"❌ [call_llm_stream] LLM stream error: {e}", exc_info=True)
+        if not produced:
+            yield "Üzgünüm, bir hata oluştu."
+
+# Sentence boundary: terminal punctuation (plus closing quotes/brackets) followed by whitespace, or a line break
+SENTENCE_END_RE = re.compile(r'[.!?…]+["\'”’)\]]*\s+|\n+')
+
+class SentenceSplitter:
+    """Accumulate streamed LLM tokens and cut them into sentences for TTS"""
+
+    def __init__(self, min_chars: int = SENTENCE_MIN_CHARS, max_chars: int = SENTENCE_MAX_CHARS):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.buffer = ""
+
+    def push(self, token: str) -> list:
+        """Add a token, return the sentences completed by it"""
+        self.buffer += token
+        sentences = []
+        start = 0
+        for match in SENTENCE_END_RE.finditer(self.buffer):
+            sentence = self.buffer[start:match.end()].strip()
+            if len(sentence) < self.min_chars:
+                continue  # Too short (e.g. "Dr." or "1."), keep it with the next sentence
+            sentences.append(sentence)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+
+        # No boundary for too long - cut at the last comma or space so TTS can start
+        if len(self.buffer) > self.max_chars:
+            cut = max(self.buffer.rfind(", ", 0, self.max_chars), self.buffer.rfind(" ", 0, self.max_chars))
+            if cut <= 0:
+                cut = self.max_chars
+            sentences.append(self.buffer[:cut + 1].strip())
+            self.buffer = self.buffer[cut + 1:]
+        return sentences
+
+    def flush(self) -> list:
+        """Return whatever is left once the stream has ended"""
+        rest = self.buffer.strip()
+        self.buffer = ""
+        return [rest] if rest else []
 
 async def call_xtts(text: str, output_file: str) -> bool:
     """Call local XTTS API - file is saved directly to shared ses/ directory"""
@@ -171,30 +559,19 @@ async def call_xtts(text: str, output_file: str) -> bool:
         # Extract filename from output_file path (e.g., /app/ses/response_xxx.wav -> response_xxx.wav)
         output_filename = os.path.basename(output_file)
         logger.info(f"🔊 [call_xtts] Starting - API: {XTTS_API_URL}, text length: {len(text)}, output: {output_file}")
-        
-        # Run blocking request in executor to avoid blocking event loop
-        loop = asyncio.get_event_loop()
-        logger.info(f"🔊 [call_xtts] Got event loop, creating executor task...")
-        
-        def _make_xtts_request():
-            logger.info(f"🔊 [call_xtts] _make_xtts_request: Making HTTP POST to {XTTS_API_URL}")
-            resp = requests.post(
-                XTTS_API_URL,
-                json={
-                    "text": text,
-                    "language": "tr",
-                    "output_filename": output_filename  # Tell XTTS what filename to use
-                },
-                timeout=180  # Increased timeout for XTTS (can take 1-2 minutes)
-            )
-            logger.info(f"🔊 [call_xtts] HTTP response status: {resp.status_code}")
+        async with http_pool.session("xtts").post(
+            XTTS_API_URL,
+            json={
+                "text": text,
+                "language": "tr",
+                "output_filename": output_filename  # Tell XTTS what filename to use
+            }
+        ) as resp:
+            logger.info(f"🔊 [call_xtts] HTTP response status: {resp.status}")
             resp.raise_for_status()
-            result = resp.json()
-            logger.info(f"🔊 [call_xtts] Response: {result}")
-            return result.get("filename")
-        
-        logger.info(f"🔊 [call_xtts] Running in executor...")
-        saved_filename = await loop.run_in_executor(None, _make_xtts_request)
+            result = await resp.json(content_type=None)
+        logger.info(f"🔊 [call_xtts] Response: {result}")
+        saved_filename = result.get("filename")
         logger.info(f"✅ [call_xtts] XTTS API response received: filename={saved_filename}")
         
         # File is already saved to ses/ directory by XTTS service
@@ -207,16 +584,326 @@ async def call_xtts(text: str, output_file: str) -> bool:
             return False
     except Exception as e:
         logger.error(f"❌ [call_xtts] XTTS error: {e}", exc_info=True)
-        import traceback
-        logger.error(f"❌ [call_xtts] Traceback: {traceback.format_exc()}")
         return False
 
+async def _iter_pcm_response(resp, tag: str):
+    """Yield (pcm_bytes, sample_rate) from a chunked int16 PCM response as the bytes arrive"""
+    resp.raise_for_status()
+    sample_rate = int(resp.headers.get("X-Sample-Rate", 24000))
+    carry = b""
+    total_bytes = 0
+    async for data in resp.content.iter_any():
+        # HTTP chunks can split a sample in half - only hand out whole int16 samples
+        data = carry + data
+        usable = len(data) - len(data) % 2
+        carry = data[usable:]
+        if usable:
+            total_bytes += usable
+            yield data[:usable], sample_rate
+    logger.info(f"✅ [{tag}] Stream finished: {total_bytes} bytes at {sample_rate}Hz")
+
+async def stream_xtts(text: str):
+    """Call XTTS /tts/stream - yields (pcm_bytes, sample_rate) while synthesis is still running"""
+    logger.info(f"🔊 [stream_xtts] Starting - API: {XTTS_STREAM_URL}, text length: {len(text)}")
+    async with http_pool.session("xtts").post(XTTS_STREAM_URL, json={"text": text, "language": "tr"}) as resp:
+        async for item in _iter_pcm_response(resp, "stream_xtts"):
+            yield item
+
+async def call_xtts_pcm(text: str):
+    """
+    Call XTTS /tts with response_format=pcm - audio comes back in the (chunked) response body,
+    one text chunk at a time as XTTS finishes it; nothing is written to or read from ses/.
+    """
+    logger.info(f"🔊 [call_xtts_pcm] Starting - API: {XTTS_API_URL}, text length: {len(text)}")
+    async with http_pool.session("xtts").post(
+        XTTS_API_URL,
+        json={"text": text, "language": "tr", "response_format": "pcm"}
+    ) as resp:
+        async for item in _iter_pcm_response(resp, "call_xtts_pcm"):
+            yield item
+
+def read_wav_pcm(path: str):
+    """Return (pcm_bytes, sample_rate) of a WAV file"""
+    with wave.open(path, 'rb') as wf:
+        return wf.readframes(wf.getnframes()), wf.getframerate()
+
+async def call_xtts_pipelined(text: str):
+    """
+    Pipelined /tts: the request returns once the first text chunk is rendered and the
+    remaining chunks are fetched by sequence number while XTTS keeps rendering them.
+    Yields (pcm_bytes, sample_rate) per chunk, read from the shared ses/ directory.
+    """
+    output_wav = f"/app/ses/response_{uuid.uuid4()}.wav"
+    output_dir = os.path.dirname(output_wav)
+    logger.info(f"🔊 [call_xtts_pipelined] Starting - API: {XTTS_API_URL}, text length: {len(text)}")
+    async with http_pool.session("xtts").post(
+        XTTS_API_URL,
+        json={
+            "text": text,
+            "language": "tr",
+            "output_filename": os.path.basename(output_wav),
+            "pipelined": True
+        }
+    ) as resp:
+        resp.raise_for_status()
+        result = await resp.json(content_type=None)
+    job_id = result.get("job_id")
+    chunks = result.get("chunks", 1)
+    logger.info(f"✅ [call_xtts_pipelined] First chunk ready: {result.get('filename')} (job={job_id}, chunks={chunks})")
+    yield read_wav_pcm(os.path.join(output_dir, result["filename"]))
+
+    # No job_id: the service fell back to a full synthesis, the file above is the whole answer
+    if not job_id:
+        return
+    for seq in range(1, chunks):
+        async with http_pool.session("xtts").get(f"{XTTS_JOBS_URL}/{job_id}/chunks/{seq}") as resp:
+            resp.raise_for_status()
+            result = await resp.json(content_type=None)
+        logger.info(f"✅ [call_xtts_pipelined] Chunk {seq + 1}/{chunks} ready: {result.get('filename')}")
+        yield read_wav_pcm(os.path.join(output_dir, result["filename"]))
+
+async def synthesize_speech(text: str):
+    """Synthesize text with XTTS, yields (pcm_bytes, sample_rate) - streamed, PCM response body, pipelined chunk files or one shared ses/ file"""
+    if TTS_STREAMING:
+        async for item in stream_xtts(text):
+            yield item
+        return
+
+    if not TTS_SHARED_FILES:
+        async for item in call_xtts_pcm(text):
+            yield item
+        return
+
+    if TTS_PIPELINED:
+        async for item in call_xtts_pipelined(text):
+            yield item
+        return
+
+    output_wav = f"/app/ses/response_{uuid.uuid4()}.wav"
+    if not await call_xtts(text, output_wav):
+        raise RuntimeError(f"XTTS failed for text: '{text[:50]}'")
+    yield read_wav_pcm(output_wav)
+
+def pcm_to_wav_bytes(pcm: bytes, sample_rate: int, channels: int = CHANNELS) -> bytes:
+    """Wrap int16 PCM in a WAV container in memory"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+    return buffer.getvalue()
+
+class GreetingCache:
+    """
+    Greeting audio kept in worker memory, keyed by the active XTTS voice and its content hash
+    (a voice re-uploaded under the same filename is a different voice).
+    Rendered in the job process prewarm (before a call is assigned) or on first
+    use; every call re-checks the active voice and re-renders if it changed.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.voice = None  # voice_key of the active voice the cached audio was rendered with
+        self.pcm = b""
+        self.sample_rate = 0
+        self.wav = b""  # same audio wrapped as WAV for the web UI
+        self._lock = None
+
+    def _store(self, voice, pcm: bytes, sample_rate: int):
+        self.voice, self.pcm, self.sample_rate = voice, pcm, sample_rate
+        self.wav = pcm_to_wav_bytes(pcm, sample_rate)
+        logger.info(f"👋 Greeting cached for voice '{voice}': {len(pcm) / (sample_rate * CHANNELS * 2):.2f}s at {sample_rate}Hz")
+
+    def prerender(self, timeout: float):
+        """Blocking render for the prewarm hook - runs before the job's event loop exists"""
+        try:
+            with urllib.request.urlopen(XTTS_ACTIVE_VOICE_URL, timeout=timeout) as resp:
+                voice = self.voice_key(json.load(resp))
+            request = urllib.request.Request(
+                XTTS_STREAM_URL,
+                data=json.dumps({"text": self.text, "language": "tr"}).encode("utf-8"),
+                headers={"Content-Type": "application/json"}
+            )
+            with urllib.request.urlopen(request, timeout=timeout) as resp:
+                sample_rate = int(resp.headers.get("X-Sample-Rate", 24000))
+                pcm = resp.read()
+            self._store(voice, pcm[:len(pcm) - len(pcm) % 2], sample_rate)
+        except Exception as e:
+            logger.warning(f"⚠️ Greeting prerender failed, rendering on first call instead: {e}")
+
+    @staticmethod
+    def voice_key(result: dict):
+        """Active voice filename plus content hash from /voices/active"""
+        voice = result.get("active_voice")
+        file_hash = result.get("file_hash")
+        return f"{voice}@{file_hash[:12]}" if voice and file_hash else voice
+
+    async def active_voice(self):
+        try:
+            async with http_pool.session("xtts").get(XTTS_ACTIVE_VOICE_URL) as resp:
+                resp.raise_for_status()
+                result = await resp.json(content_type=None)
+            return self.voice_key(result)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read active XTTS voice: {e}")
+            return None
+
+    async def get(self):
+        """Return (pcm, sample_rate, wav_bytes) for the active voice, rendering it if needed"""
+        voice = await self.active_voice()
+        # Voice unknown (XTTS unreachable) - a cached greeting is still better than none
+        if self.pcm and (voice is None or voice == self.voice):
+            return self.pcm, self.sample_rate, self.wav
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self.pcm or (voice is not None and voice != self.voice):
+                logger.info(f"🔊 Rendering greeting for voice '{voice}' (cached: '{self.voice}')")
+                chunks = []
+                sample_rate = 0
+                async for pcm, sample_rate in synthesize_speech(self.text):
+                    chunks.append(pcm)
+                self._store(voice, b"".join(chunks), sample_rate)
+        return self.pcm, self.sample_rate, self.wav
+
+greeting_cache = GreetingCache(GREETING_TEXT)
+
+class PcmRingBuffer:
+    """
+    Preallocated byte ring for resampled PCM feeding the VAD.
+    Writes go through memoryview slices; reads take one VAD frame at a time
+    without shifting the remaining data. Capacity is a multiple of the frame
+    size, so a frame read never wraps around the end of the ring.
+    """
+
+    def __init__(self, capacity: int, frame_size: int = CHUNK_SIZE_BYTES):
+        self.frame_size = frame_size
+        self.capacity = capacity - capacity % frame_size
+        self._buffer = bytearray(self.capacity)
+        self._view = memoryview(self._buffer)
+        self._read_pos = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, data):
+        data = memoryview(data).cast("B")  # frame.data is an int16 memoryview
+        n = len(data)
+        if self._size + n > self.capacity:
+            self._grow(self._size + n)
+        write_pos = (self._read_pos + self._size) % self.capacity
+        first = min(n, self.capacity - write_pos)
+        self._view[write_pos:write_pos + first] = data[:first]
+        if first < n:
+            self._view[:n - first] = data[first:]
+        self._size += n
+
+    def read_frame(self) -> bytes:
+        """Pop one VAD frame (caller checks len() first). webrtcvad needs immutable bytes, so this is the only copy."""
+        start = self._read_pos
+        frame = bytes(self._view[start:start + self.frame_size])
+        self._read_pos = (start + self.frame_size) % self.capacity
+        self._size -= self.frame_size
+        return frame
+
+    def _grow(self, needed: int):
+        # Only when the VAD loop falls behind by several seconds - linearize into a bigger ring
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        buffer = bytearray(capacity)
+        first = min(self._size, self.capacity - self._read_pos)
+        buffer[:first] = self._view[self._read_pos:self._read_pos + first]
+        buffer[first:self._size] = self._view[:self._size - first]
+        self._view.release()
+        self._buffer, self._view, self.capacity, self._read_pos = buffer, memoryview(buffer), capacity, 0
+
+# ===== ENDPOINTING =====
+
+class FixedEndpointer:
+    """End of utterance after a constant amount of trailing silence (the original 17-frame rule)"""
+
+    name = "fixed"
+
+    def observe(self, state: dict, chunk: bytes, is_speech: bool) -> bool:
+        """Called for every VAD frame; may override the VAD decision"""
+        return is_speech
+
+    def required_silence_ms(self, state: dict, partial_text: str = "") -> tuple:
+        """Trailing silence needed to end the current utterance -> (delay_ms, reason)"""
+        return ENDPOINT_SILENCE_MS, "fixed"
+
+class AdaptiveEndpointer(FixedEndpointer):
+    """
+    Endpoint delay chosen per utterance:
+    - utterance length: short answers end fast, long ones tolerate mid-sentence pauses
+    - per-track noise floor: VAD "speech" that is barely above line noise counts as silence
+    - partial transcript cues (streaming STT): terminal punctuation shortens, a trailing
+      conjunction or comma waits for the rest of the sentence
+    """
+
+    name = "adaptive"
+    CONTINUATION_WORDS = {
+        "ve", "ama", "fakat", "çünkü", "yani", "şey", "ile", "veya", "ya", "da", "de",
+        "için", "eğer", "hani", "ki", "sonra", "mesela", "gibi"
+    }
+
+    def observe(self, state: dict, chunk: bytes, is_speech: bool) -> bool:
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        rms = float(np.sqrt(np.dot(samples, samples) / len(samples)))
+        if not is_speech:
+            # Noise floor: slow EMA over non-speech frames
+            floor = state.get('noise_floor')
+            state['noise_floor'] = rms if floor is None else 0.95 * floor + 0.05 * rms
+            state['noise_frames'] += 1
+            return False
+        floor = state.get('noise_floor')
+        if floor is not None and state['noise_frames'] >= 10 and rms < floor * ENDPOINT_NOISE_MARGIN:
+            return False  # Line noise / breath that webrtcvad called speech
+        return True
+
+    def required_silence_ms(self, state: dict, partial_text: str = "") -> tuple:
+        speech_ms = state['utterance_chunks'] * FRAME_DURATION_MS - state['silence_count'] * FRAME_DURATION_MS
+        if speech_ms <= ENDPOINT_SHORT_UTTERANCE_MS:
+            delay, reason = ENDPOINT_MIN_SILENCE_MS, "short"
+        elif speech_ms >= ENDPOINT_LONG_UTTERANCE_MS:
+            delay, reason = ENDPOINT_MAX_SILENCE_MS, "long"
+        else:
+            # Linear ramp between the short and long delays
+            ratio = (speech_ms - ENDPOINT_SHORT_UTTERANCE_MS) / (ENDPOINT_LONG_UTTERANCE_MS - ENDPOINT_SHORT_UTTERANCE_MS)
+            delay, reason = int(ENDPOINT_MIN_SILENCE_MS + ratio * (ENDPOINT_MAX_SILENCE_MS - ENDPOINT_MIN_SILENCE_MS)), "length"
+
+        partial = partial_text.strip().lower() if ENDPOINT_USE_PARTIALS else ""
+        if partial:
+            last_word = partial.rstrip(",").split()[-1] if partial.split() else ""
+            if partial.endswith((".", "?", "!")):
+                delay, reason = max(ENDPOINT_MIN_SILENCE_MS, int(delay * 0.6)), reason + "+punct"
+            elif partial.endswith(",") or last_word in self.CONTINUATION_WORDS:
+                delay, reason = ENDPOINT_MAX_SILENCE_MS, reason + "+continuation"
+        return delay, reason
+
+ENDPOINTERS = {
+    "fixed": FixedEndpointer,
+    "adaptive": AdaptiveEndpointer,
+}
+
+def create_endpointer() -> FixedEndpointer:
+    endpointer_cls = ENDPOINTERS.get(ENDPOINTER.lower())
+    if endpointer_cls is None:
+        logger.warning(f"⚠️ Unknown ENDPOINTER '{ENDPOINTER}', using fixed")
+        endpointer_cls = FixedEndpointer
+    return endpointer_cls()
+
 # ===== VOICE AGENT =====
 
 class VoiceAgent:
     def __init__(self, ctx: JobContext):
         self.ctx = ctx
         self.vad = webrtcvad.Vad(VAD_MODE)
+        self.endpointer = create_endpointer()
         self.audio_source = None
         self.audio_track = None
         self.track_states = {}  # track_id -> {is_speaking, silence_count, frames}
@@ -225,6 +912,10 @@ class VoiceAgent:
         self.greeting_cooldown_seconds = 30  # Don't send greeting if one was sent in last 30 seconds
         self.data_channel = None  # Data channel for sending messages to web
         self.is_playing_audio = False  # Track if audio is currently playing (disable microphone during playback)
+        self.turn_task = None  # Current STT -> LLM -> TTS -> playback task (barge-in mode)
+        self.turn_audio = None  # Utterance the current turn is answering
+        self.turn_spoke = False  # Whether the current turn already started playback
+        self.history = ConversationHistory()  # LLM context for this call
 
     async def start(self):
         """Initialize and connect to room"""
@@ -378,13 +1069,23 @@ class VoiceAgent:
         
         resampler = None
         frame_buffer = []  # Buffer frames before resampling
-        audio_buffer = bytearray()  # Buffer resampled audio data for VAD
+        ring = PcmRingBuffer(VAD_RING_BYTES)  # Buffer resampled audio data for VAD
         self.track_states[track_id] = {
             'is_speaking': False,
             'silence_count': 0,
             'frames': [],
-            'participant_id': participant_id  # Store participant_id for audio level logging
+            'participant_id': participant_id,  # Store participant_id for audio level logging
+            'chunk_count': 0,
+            'last_level_log': 0,
+            'speech_run': 0,  # consecutive speech frames (barge-in)
+            'utterance_chunks': 0,  # chunks in the current utterance (endpointing)
+            'noise_floor': None,  # RMS of non-speech frames (adaptive endpointing)
+            'noise_frames': 0,
+            'stt_stream': SttStream() if STT_STREAMING else None,
+            'stt_streaming': False  # current utterance is being streamed to stt_service
         }
+        if STT_STREAMING:
+            asyncio.create_task(self._connect_stt_stream(track_id))
         
         # #region debug log
         debug_log("agent/main.py:207", "Track state initialized", {"track_id": track_id}, "H5")
@@ -436,40 +1137,28 @@ class VoiceAgent:
                                 debug_log("agent/main.py:232", "Resampler push result (batched)", {"resampled_frame_count": len(all_resampled), "buffered_frame_count": len(frame_buffer), "track_id": track_id, "frame_count": frame_count}, "H4")
                             # #endregion
                             
-                            # Process resampled frames - accumulate data for VAD
-                            for resampled_frame in all_resampled:
-                                audio_buffer.extend(resampled_frame.data)
-                            
-                            # Process audio buffer in VAD-sized chunks
-                            while len(audio_buffer) >= CHUNK_SIZE_BYTES:
-                                chunk = bytes(audio_buffer[:CHUNK_SIZE_BYTES])
-                                audio_buffer = audio_buffer[CHUNK_SIZE_BYTES:]
-                                await self._process_audio_chunk(chunk, track_id)
-                            
                             # Clear buffer
                             frame_buffer = []
                             
                             # If still no frames, try flushing
                             if len(all_resampled) == 0 and frame_count % 100 == 0:
                                 try:
-                                    flushed_frames = resampler.flush()
-                                    if len(flushed_frames) > 0:
+                                    all_resampled = resampler.flush()
+                                    if len(all_resampled) > 0:
                                         # #region debug log
-                                        debug_log("agent/main.py:240", "Resampler flush returned frames", {"flushed_frame_count": len(flushed_frames), "track_id": track_id, "frame_count": frame_count}, "H4")
+                                        debug_log("agent/main.py:240", "Resampler flush returned frames", {"flushed_frame_count": len(all_resampled), "track_id": track_id, "frame_count": frame_count}, "H4")
                                         # #endregion
-                                        for resampled_frame in flushed_frames:
-                                            audio_buffer.extend(resampled_frame.data)
-                                        
-                                        # Process audio buffer in VAD-sized chunks
-                                        while len(audio_buffer) >= CHUNK_SIZE_BYTES:
-                                            chunk = bytes(audio_buffer[:CHUNK_SIZE_BYTES])
-                                            audio_buffer = audio_buffer[CHUNK_SIZE_BYTES:]
-                                            await self._process_audio_chunk(chunk, track_id)
                                 except Exception as flush_error:
                                     # #region debug log
                                     debug_log("agent/main.py:247", "Resampler flush error", {"error": str(flush_error), "track_id": track_id}, "H4")
                                     # #endregion
-                                    pass
+                                    all_resampled = []
+                            
+                            # Process resampled frames - accumulate data for VAD, then process in VAD-sized chunks
+                            for resampled_frame in all_resampled:
+                                ring.write(resampled_frame.data)
+                            await self._drain_vad_frames(ring, track_id)
+                            self._log_audio_level(all_resampled, track_id)
                         except Exception as e:
                             logger.error(f"❌ Resampler error: {e}")
                             # #region debug log
@@ -482,7 +1171,9 @@ class VoiceAgent:
                                 pass
                             frame_buffer = []
                 else:
-                    await self._process_audio_chunk(frame.data, track_id)
+                    ring.write(frame.data)
+                    await self._drain_vad_frames(ring, track_id)
+                    self._log_audio_level([frame], track_id)
                     
         except Exception as e:
             logger.error(f"❌ Error processing audio stream: {e}", exc_info=True)
@@ -494,13 +1185,39 @@ class VoiceAgent:
             debug_log("agent/main.py:255", "Audio stream loop ended", {"track_id": track_id, "participant_id": participant_id}, "H5")
             # #endregion
             if track_id in self.track_states:
-                del self.track_states[track_id]
+                state = self.track_states.pop(track_id)
+                if state.get('stt_stream') is not None:
+                    await state['stt_stream'].close()
                 logger.info(f"🧹 Cleaned up state for track {track_id}")
 
-    async def _process_audio_chunk(self, data: bytes, track_id: str):
-        """Process audio chunk with VAD"""
-        # Don't process audio while agent is playing audio
-        if self.is_playing_audio:
+    async def _drain_vad_frames(self, ring: PcmRingBuffer, track_id: str):
+        """Feed every complete 30ms frame in the ring to the VAD"""
+        while len(ring) >= CHUNK_SIZE_BYTES:
+            await self._process_audio_chunk(ring.read_frame(), track_id)
+
+    def _log_audio_level(self, frames: list, track_id: str):
+        """Log RMS/peak of the latest batch every LEVEL_LOG_EVERY_CHUNKS chunks for SIP participants (NumPy, whole batch)"""
+        state = self.track_states.get(track_id)
+        if not state or not frames:
+            return
+        participant_id = state.get('participant_id', '')
+        if not participant_id or "sip_" not in participant_id:
+            return
+        if state['chunk_count'] - state['last_level_log'] < LEVEL_LOG_EVERY_CHUNKS:
+            return
+        state['last_level_log'] = state['chunk_count']
+
+        samples = np.concatenate([np.frombuffer(f.data, dtype=np.int16) for f in frames]).astype(np.float32)
+        if samples.size == 0:
+            return
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        max_amplitude = int(np.max(np.abs(samples)))
+        logger.info(f"🔊 Audio level check (SIP): track={track_id}, participant={participant_id}, rms={int(rms)}, max={max_amplitude}, is_speaking={state['is_speaking']}")
+
+    async def _process_audio_chunk(self, chunk: bytes, track_id: str):
+        """Process one 30ms audio chunk with VAD"""
+        # Don't process audio while agent is playing audio (unless the caller may barge in)
+        if self.is_playing_audio and not BARGE_IN:
             return
         
         state = self.track_states.get(track_id)
@@ -510,85 +1227,139 @@ class VoiceAgent:
             # #endregion
             return
         
-        participant_id = state.get('participant_id', '')
-
-        # Process in 30ms chunks for VAD
-        for i in range(0, len(data), CHUNK_SIZE_BYTES):
-            chunk = data[i:i+CHUNK_SIZE_BYTES]
-            if len(chunk) < CHUNK_SIZE_BYTES:
-                # #region debug log
-                debug_log("agent/main.py:252", "Incomplete chunk, skipping", {"chunk_len": len(chunk), "expected": CHUNK_SIZE_BYTES, "track_id": track_id}, "H4")
-                # #endregion
-                break
-            
-            try:
-                # Calculate audio level for debugging (RMS - Root Mean Square)
-                import struct
-                samples = struct.unpack(f'<{len(chunk)//2}h', chunk)
-                rms = (sum(s*s for s in samples) / len(samples)) ** 0.5
-                max_amplitude = max(abs(s) for s in samples) if samples else 0
-                
-                is_speech = self.vad.is_speech(chunk, SAMPLE_RATE)
-                # #region debug log
-                debug_log("agent/main.py:258", "VAD result", {"is_speech": is_speech, "chunk_len": len(chunk), "track_id": track_id, "is_speaking": state['is_speaking'], "silence_count": state['silence_count'], "rms": int(rms), "max_amplitude": max_amplitude}, "H4")
-                # #endregion
-                
-                # Log audio level every 100 chunks for SIP participants
-                if participant_id and "sip_" in participant_id:
-                    if not hasattr(self, '_chunk_count'):
-                        self._chunk_count = {}
-                    if track_id not in self._chunk_count:
-                        self._chunk_count[track_id] = 0
-                    self._chunk_count[track_id] += 1
-                    if self._chunk_count[track_id] % 100 == 0:
-                        logger.info(f"🔊 Audio level check (SIP): track={track_id}, participant={participant_id}, rms={int(rms)}, max={max_amplitude}, is_speech={is_speech}")
-            except Exception as e:
-                logger.error(f"❌ VAD error: {e}")
+        state['chunk_count'] += 1
+        try:
+            is_speech = self.vad.is_speech(chunk, SAMPLE_RATE)
+            is_speech = self.endpointer.observe(state, chunk, is_speech)
+        except Exception as e:
+            logger.error(f"❌ VAD error: {e}")
+            # #region debug log
+            debug_log("agent/main.py:263", "VAD error", {"error": str(e), "track_id": track_id}, "H4")
+            # #endregion
+            return
+        
+        if is_speech:
+            if not state['is_speaking']:
+                logger.info(f"🗣️ Speech detected on track {track_id}")
                 # #region debug log
-                debug_log("agent/main.py:263", "VAD error", {"error": str(e), "track_id": track_id}, "H4")
+                debug_log("agent/main.py:269", "Speech started", {"track_id": track_id}, "H4")
                 # #endregion
-                continue
-            
-            if is_speech:
-                if not state['is_speaking']:
-                    logger.info(f"🗣️ Speech detected on track {track_id}")
-                    # #region debug log
-                    debug_log("agent/main.py:269", "Speech started", {"track_id": track_id}, "H4")
-                    # #endregion
-                state['is_speaking'] = True
-                state['silence_count'] = 0
+                stream = state['stt_stream']
+                state['stt_streaming'] = stream is not None and stream.connected
+                if stream is not None and not stream.connected:
+                    asyncio.create_task(self._connect_stt_stream(track_id))
+            state['is_speaking'] = True
+            state['silence_count'] = 0
+            state['frames'].append(chunk)
+            state['utterance_chunks'] += 1
+            await self._stream_stt_chunk(state, chunk)
+            state['speech_run'] += 1
+            if BARGE_IN and state['speech_run'] == BARGE_IN_MIN_SPEECH_FRAMES and self._turn_active():
+                self._interrupt_turn(track_id)
+        else:
+            state['speech_run'] = 0
+            if state['is_speaking']:
+                state['silence_count'] += 1
                 state['frames'].append(chunk)
-            else:
-                if state['is_speaking']:
-                    state['silence_count'] += 1
-                    state['frames'].append(chunk)
-                    
-                    # After 500ms of silence, process speech (faster response)
-                    if state['silence_count'] >= 17:  # ~500ms at 30ms chunks
-                        logger.info(f"🎙️ Processing speech from track {track_id} ({len(state['frames'])} chunks)")
-                        # #region debug log
-                        debug_log("agent/main.py:282", "Silence threshold reached, processing speech", {"track_id": track_id, "frame_count": len(state['frames']), "total_bytes": sum(len(f) for f in state['frames'])}, "H4")
-                        # #endregion
-                        await self._handle_speech(b''.join(state['frames']), track_id)
-                        state['frames'] = []
-                        state['is_speaking'] = False
-                        state['silence_count'] = 0
-                else:
+                state['utterance_chunks'] += 1
+                await self._stream_stt_chunk(state, chunk)
+                
+                # End of utterance once the trailing silence reaches the endpointer's delay
+                partial = state['stt_stream'].partial if state['stt_streaming'] else ""
+                required_ms, reason = self.endpointer.required_silence_ms(state, partial)
+                if state['silence_count'] * FRAME_DURATION_MS >= required_ms:
+                    speech_ms = (state['utterance_chunks'] - state['silence_count']) * FRAME_DURATION_MS
+                    logger.info(f"🎙️ Processing speech from track {track_id} ({len(state['frames'])} chunks) - endpoint delay {required_ms}ms ({self.endpointer.name}/{reason}, speech={speech_ms}ms, noise_floor={int(state['noise_floor'] or 0)})")
                     # #region debug log
-                    debug_log("agent/main.py:290", "No speech, clearing buffer", {"track_id": track_id}, "H4")
+                    debug_log("agent/main.py:282", "Silence threshold reached, processing speech", {"track_id": track_id, "frame_count": len(state['frames']), "total_bytes": sum(len(f) for f in state['frames']), "endpointer": self.endpointer.name, "endpoint_delay_ms": required_ms, "endpoint_reason": reason, "speech_ms": speech_ms, "noise_floor": state['noise_floor']}, "H4")
                     # #endregion
-                    state['silence_count'] = 0
+                    audio_data = b''.join(state['frames'])
                     state['frames'] = []
+                    state['is_speaking'] = False
+                    state['silence_count'] = 0
+                    state['utterance_chunks'] = 0
+                    stt_final = await self._end_stt_utterance(state)
+                    if BARGE_IN:
+                        self._start_turn(audio_data, track_id, stt_final)
+                    else:
+                        await self._handle_speech(audio_data, track_id, stt_final)
+            elif state['frames']:
+                state['frames'] = []
+                state['utterance_chunks'] = 0
+
+    async def _connect_stt_stream(self, track_id: str):
+        """Open (or re-open) the track's streaming STT session in the background"""
+        state = self.track_states.get(track_id)
+        if not state or state['stt_stream'] is None or state['stt_stream'].connected:
+            return
+        try:
+            await state['stt_stream'].connect()
+        except Exception as e:
+            logger.warning(f"⚠️ STT stream unavailable for track {track_id} ({e}), using PCM upload")
 
-    async def _handle_speech(self, audio_data: bytes, track_id: str):
-        """Handle detected speech: STT -> LLM -> TTS -> Playback"""
+    async def _stream_stt_chunk(self, state: dict, chunk: bytes):
+        """Forward an utterance chunk to the streaming STT session"""
+        if not state['stt_streaming']:
+            return
+        try:
+            await state['stt_stream'].send_audio(chunk)
+        except Exception as e:
+            logger.warning(f"⚠️ STT stream send failed ({e}), this utterance will use PCM upload")
+            state['stt_streaming'] = False
+
+    async def _end_stt_utterance(self, state: dict):
+        """Endpoint reached: request the streamed final transcript (None -> transcribe with PCM upload)"""
+        if not state['stt_streaming']:
+            return None
+        state['stt_streaming'] = False
+        try:
+            return await state['stt_stream'].end_utterance()
+        except Exception as e:
+            logger.warning(f"⚠️ STT stream end failed ({e}), using PCM upload")
+            return None
+
+    def _turn_active(self) -> bool:
+        return self.turn_task is not None and not self.turn_task.done()
+
+    def _start_turn(self, audio_data: bytes, track_id: str, stt_final=None):
+        """Answer an utterance in a cancellable task so the audio loop keeps running (barge-in mode)"""
+        if self._turn_active():
+            logger.info("✋ New utterance while the previous turn is still running - cancelling it")
+            self._cancel_turn()
+        self.turn_audio = audio_data
+        self.turn_spoke = False
+        self.turn_task = asyncio.create_task(self._handle_speech(audio_data, track_id, stt_final))
+
+    def _interrupt_turn(self, track_id: str):
+        """Caller talks over the agent: stop playback and abandon the turn's pending LLM/TTS work"""
+        logger.info(f"✋ Barge-in on track {track_id} - cancelling agent turn (spoke={self.turn_spoke})")
+        state = self.track_states.get(track_id)
+        if not self.turn_spoke and self.turn_audio and state is not None:
+            # Nothing was said yet - the caller is still talking, answer both parts together
+            state['frames'].insert(0, self.turn_audio)
+            state['utterance_chunks'] += len(self.turn_audio) // CHUNK_SIZE_BYTES
+            if state['stt_streaming']:
+                # The streamed utterance lacks the earlier part - transcribe the merged audio by upload
+                state['stt_streaming'] = False
+                asyncio.create_task(state['stt_stream'].reset())
+        self._cancel_turn()
+
+    def _cancel_turn(self):
+        self.turn_task.cancel()
+        self.turn_audio = None
+        if self.audio_source is not None and hasattr(self.audio_source, "clear_queue"):
+            self.audio_source.clear_queue()  # Drop frames already queued for the caller
+        self.is_playing_audio = False
+
+    async def _handle_speech(self, audio_data: bytes, track_id: str, stt_final: asyncio.Future = None):
+        """Handle detected speech: STT -> LLM -> TTS -> Playback (stt_final: pending streamed transcript)"""
         # Don't process speech until greeting is sent
         if not self.greeting_sent:
             logger.debug(f"⏸️ Skipping speech processing - greeting not sent yet")
             return
         
-        # Don't process speech while audio is playing
-        if self.is_playing_audio:
+        # Don't process speech while audio is playing (barge-in cancels playback before a new turn starts)
+        if self.is_playing_audio and not BARGE_IN:
             logger.debug(f"⏸️ Skipping speech processing - audio is currently playing")
             return
         
@@ -598,24 +1369,12 @@ class VoiceAgent:
         try:
             logger.info("🎙️ Processing speech...")
             
-            # Save audio to temp file for STT
-            temp_wav = f"/tmp/speech_{uuid.uuid4()}.wav"
-            with wave.open(temp_wav, 'wb') as wf:
-                wf.setnchannels(CHANNELS)
-                wf.setsampwidth(2)
-                wf.setframerate(SAMPLE_RATE)
-                wf.writeframes(audio_data)
-
-            # #region debug log
-            debug_log("agent/main.py:308", "Audio saved to temp file", {"temp_wav": temp_wav, "audio_data_len": len(audio_data)}, "H4")
-            # #endregion
-            
-            # STT - Call external STT service
+            # STT - Call external STT service (raw PCM straight from the VAD buffer)
             logger.info("📝 Transcribing via STT service...")
             # #region debug log
-            debug_log("agent/main.py:313", "Starting STT", {"temp_wav": temp_wav}, "H4")
+            debug_log("agent/main.py:313", "Starting STT", {"audio_data_len": len(audio_data)}, "H4")
             # #endregion
-            text = await call_stt(temp_wav)
+            text = await self._transcribe(audio_data, stt_final)
             logger.info(f"📝 Transcribed: '{text}' (length: {len(text)})")
             
             # Save transcribed text to file for debugging
@@ -634,29 +1393,26 @@ class VoiceAgent:
             
             if not text.strip():
                 logger.warning("⚠️ Empty transcription, skipping...")
-                if os.path.exists(temp_wav):
-                    os.remove(temp_wav)
+                return
+
+            if LLM_STREAMING:
+                # LLM tokens -> sentences -> TTS -> playback, all overlapped
+                await self._respond_streaming(text)
                 return
 
             # LLM
             logger.info(f"🤖 Sending to LLM ({LLM_PROVIDER}): {text}")
-            response_text = await call_llm(text)
+            response_text = await call_llm(text, self.history)
             logger.info(f"🤖 LLM response: {response_text}")
-
-            # Save conversation to file for debugging
-            conversation_file = "/tmp/conversation_log.txt"
-            try:
-                with open(conversation_file, "a", encoding="utf-8") as f:
-                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    f.write(f"\n[{timestamp}]\n")
-                    f.write(f"Kullanıcı: {text}\n")
-                    f.write(f"Asistan: {response_text}\n")
-                    f.write("-" * 80 + "\n")
-                logger.info(f"💾 Saved conversation to {conversation_file}")
-            except Exception as e:
-                logger.error(f"❌ Error saving conversation: {e}")
+            self.history.add_turn(text, response_text)
+            self._log_conversation(text, response_text)
         
             # TTS
+            if TTS_STREAMING or TTS_PIPELINED or not TTS_SHARED_FILES:
+                # Progressive playback: frames go to the audio source as XTTS produces them (or chunk by chunk)
+                await self._speak(text, response_text)
+                return
+
             logger.info("🔊 Generating speech...")
             try:
                 # Use shared ses/ directory (mounted from host, accessible to both XTTS and agent)
@@ -711,11 +1467,122 @@ class VoiceAgent:
             else:
                 logger.error(f"❌ Failed to generate speech: success={success}, exists={os.path.exists(output_wav) if output_wav else False}")
             
-            os.remove(temp_wav)
-            
         except Exception as e:
             logger.error(f"❌ Error handling speech: {e}", exc_info=True)
 
+    async def _transcribe(self, audio_data: bytes, stt_final: asyncio.Future = None) -> str:
+        """Use the streamed final transcript when there is one, otherwise upload the PCM"""
+        if stt_final is not None:
+            try:
+                text = transcript_text(await asyncio.wait_for(stt_final, STT_STREAM_FINAL_TIMEOUT))
+                logger.info(f"✅ STT (stream) completed: '{text}' (length: {len(text)})")
+                return text
+            except Exception as e:
+                logger.warning(f"⚠️ Streamed STT final failed ({e!r}), falling back to PCM upload")
+        return await call_stt(audio_data)
+
+    async def _respond_streaming(self, text: str):
+        """Stream the LLM answer sentence by sentence into TTS and play each sentence as soon as it is ready"""
+        logger.info(f"🤖 Streaming from LLM ({LLM_PROVIDER}): {text}")
+        tts_queue = asyncio.Queue()   # sentences waiting for synthesis
+        play_queue = asyncio.Queue()  # (pcm, sample_rate) blocks waiting for playback
+        response_parts = []
+        sentence_count = 0
+
+        async def _generate():
+            splitter = SentenceSplitter()
+            try:
+                async for token in call_llm_stream(text, self.history):
+                    response_parts.append(token)
+                    for sentence in splitter.push(token):
+                        logger.info(f"✂️ Sentence ready for TTS: '{sentence}'")
+                        await tts_queue.put(sentence)
+                for sentence in splitter.flush():
+                    await tts_queue.put(sentence)
+            finally:
+                await tts_queue.put(None)
+
+        async def _synthesize():
+            nonlocal sentence_count
+            try:
+                while True:
+                    sentence = await tts_queue.get()
+                    if sentence is None:
+                        break
+                    try:
+                        async for audio in synthesize_speech(sentence):
+                            await play_queue.put(audio)
+                        sentence_count += 1
+                    except Exception as tts_error:
+                        logger.error(f"❌ Failed to generate speech for sentence '{sentence}': {tts_error}")
+            finally:
+                await play_queue.put(None)
+
+        async def _queued_audio():
+            while True:
+                audio = await play_queue.get()
+                if audio is None:
+                    return
+                yield audio
+
+        try:
+            _, _, (pcm, sample_rate) = await asyncio.gather(
+                _generate(), _synthesize(), self._play_pcm_stream(_queued_audio())
+            )
+        except asyncio.CancelledError:
+            # Barge-in: keep what was generated so the next turn knows what the caller interrupted
+            partial_text = "".join(response_parts).strip()
+            if partial_text:
+                self.history.add_turn(text, partial_text + " …")
+            raise
+        response_text = "".join(response_parts).strip()
+        logger.info(f"🤖 LLM response (streamed, {sentence_count} sentences): {response_text}")
+        self.history.add_turn(text, response_text)
+        self._log_conversation(text, response_text)
+
+        if not pcm:
+            logger.error("❌ Failed to generate speech: no sentence was synthesized")
+            return
+
+        try:
+            await self._send_message_to_web(text, response_text, audio_bytes=pcm_to_wav_bytes(pcm, sample_rate))
+            logger.info(f"✅ Response sent to web client")
+        except Exception as web_error:
+            logger.warning(f"⚠️ Failed to send to web client: {web_error}")
+
+    async def _speak(self, user_text: str, response_text: str):
+        """Synthesize a complete answer, play it progressively and send it to the web client"""
+        logger.info(f"🔊 Generating speech (streaming) for {len(response_text)} chars...")
+        try:
+            pcm, sample_rate = await self._play_pcm_stream(synthesize_speech(response_text))
+        except Exception as tts_error:
+            logger.error(f"❌ Error in TTS section: {tts_error}", exc_info=True)
+            return
+
+        if not pcm:
+            logger.error("❌ Failed to generate speech: empty audio stream")
+            return
+
+        try:
+            await self._send_message_to_web(user_text, response_text, audio_bytes=pcm_to_wav_bytes(pcm, sample_rate))
+            logger.info(f"✅ Response sent to web client")
+        except Exception as web_error:
+            logger.warning(f"⚠️ Failed to send to web client: {web_error}")
+
+    def _log_conversation(self, user_text: str, response_text: str):
+        """Save conversation to file for debugging"""
+        conversation_file = "/tmp/conversation_log.txt"
+        try:
+            with open(conversation_file, "a", encoding="utf-8") as f:
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                f.write(f"\n[{timestamp}]\n")
+                f.write(f"Kullanıcı: {user_text}\n")
+                f.write(f"Asistan: {response_text}\n")
+                f.write("-" * 80 + "\n")
+            logger.info(f"💾 Saved conversation to {conversation_file}")
+        except Exception as e:
+            logger.error(f"❌ Error saving conversation: {e}")
+
     def _should_send_greeting(self) -> bool:
         """Check if greeting should be sent (cooldown mechanism to prevent greeting on refresh)"""
         try:
@@ -759,44 +1626,32 @@ class VoiceAgent:
                 logger.info("⏸️ Skipping greeting due to cooldown")
                 return
             
-            greeting_text = " Merhaba. Size nasıl yardımcı olabilirim ?"
+            greeting_text = greeting_cache.text
             logger.info(f"👋 Sending greeting: {greeting_text}")
             
-            # Generate speech with XTTS
-            # Use shared ses/ directory (mounted from host, accessible to both XTTS and agent)
-            output_wav = f"/app/ses/greeting_{uuid.uuid4()}.wav"
-            logger.info(f"🔊 Generating greeting speech...")
-            success = await call_xtts(greeting_text, output_wav)
+            # Pre-rendered PCM for the active voice (only synthesized if the voice changed)
+            pcm, sample_rate, wav_bytes = await greeting_cache.get()
             
-            if success and os.path.exists(output_wav):
-                logger.info(f"✅ Greeting TTS file created: {output_wav}")
-                # Play greeting audio through LiveKit
-                try:
-                    logger.info(f"🔊 Playing greeting audio: {output_wav}")
-                    if self.audio_source is None:
-                        logger.error("❌ audio_source is None, cannot play greeting")
-                    else:
-                        await self._play_audio(output_wav)
-                        logger.info("✅ Greeting audio playback completed")
-                except Exception as play_error:
-                    logger.error(f"❌ Error playing greeting: {play_error}", exc_info=True)
-                
-                # Also send to web client for UI display (optional)
-                try:
-                    await self._send_message_to_web("", greeting_text, output_wav)
-                    logger.info("✅ Greeting message sent to web")
-                except Exception as send_error:
-                    logger.warning(f"⚠️ Failed to send greeting to web: {send_error}")
-                
-                # Clean up
-                if os.path.exists(output_wav):
-                    os.remove(output_wav)
-                
-                self._update_greeting_cooldown()  # Update cooldown after successful greeting
-                self.greeting_sent = True  # Enable microphone listening after greeting is sent
-                logger.info("✅ Greeting sent successfully - microphone now enabled")
-            else:
-                logger.error(f"❌ Failed to generate greeting speech: success={success}, file_exists={os.path.exists(output_wav) if output_wav else False}")
+            # Play greeting audio through LiveKit
+            try:
+                if self.audio_source is None:
+                    logger.error("❌ audio_source is None, cannot play greeting")
+                else:
+                    await self._play_pcm_stream(self._cached_pcm(pcm, sample_rate))
+                    logger.info("✅ Greeting audio playback completed")
+            except Exception as play_error:
+                logger.error(f"❌ Error playing greeting: {play_error}", exc_info=True)
+            
+            # Also send to web client for UI display (optional)
+            try:
+                await self._send_message_to_web("", greeting_text, audio_bytes=wav_bytes)
+                logger.info("✅ Greeting message sent to web")
+            except Exception as send_error:
+                logger.warning(f"⚠️ Failed to send greeting to web: {send_error}")
+            
+            self._update_greeting_cooldown()  # Update cooldown after successful greeting
+            self.greeting_sent = True  # Enable microphone listening after greeting is sent
+            logger.info("✅ Greeting sent successfully - microphone now enabled")
         except Exception as e:
             logger.error(f"❌ Error sending greeting: {e}", exc_info=True)
 
@@ -812,6 +1667,7 @@ class VoiceAgent:
         
         # Set flag to disable microphone during playback
         self.is_playing_audio = True
+        self.turn_spoke = True
         logger.info(f"🔇 Microphone disabled - starting audio playback: {wav_file}")
         
         try:
@@ -912,8 +1768,98 @@ class VoiceAgent:
             self.is_playing_audio = False
             logger.info(f"🎤 Microphone enabled - audio playback finished")
 
-    async def _send_message_to_web(self, user_text: str, agent_text: str, audio_file: str):
-        """Send message to web client via data channel with text and audio"""
+    @staticmethod
+    async def _cached_pcm(pcm: bytes, sample_rate: int):
+        """Feed in-memory PCM to _play_pcm_stream"""
+        yield pcm, sample_rate
+
+    async def _play_pcm_stream(self, audio_chunks):
+        """
+        Play (pcm_bytes, sample_rate) blocks through the audio source as they arrive,
+        in 10ms frames for WebRTC compatibility. Returns (played_pcm, sample_rate).
+        """
+        if self.audio_source is None:
+            logger.error(f"❌ Cannot play audio: audio_source is None")
+            async for _ in audio_chunks:
+                pass
+            return b"", 0
+
+        target_sample_rate = self.audio_source.sample_rate
+        bytes_per_frame = int(target_sample_rate * 10 / 1000) * CHANNELS * 2
+        pending = bytearray()
+        played = bytearray()
+        resampler = None
+        resampler_rate = None
+
+        self.is_playing_audio = True
+        logger.info(f"🔇 Microphone disabled - starting streamed audio playback")
+        try:
+            async for pcm, sample_rate in audio_chunks:
+                if sample_rate != target_sample_rate:
+                    if resampler is None or resampler_rate != sample_rate:
+                        logger.info(f"🔄 Playback resampler: {sample_rate}Hz -> {target_sample_rate}Hz")
+                        resampler = rtc.AudioResampler(
+                            input_rate=sample_rate,
+                            output_rate=target_sample_rate,
+                            num_channels=CHANNELS
+                        )
+                        resampler_rate = sample_rate
+                    frame = rtc.AudioFrame(
+                        data=pcm,
+                        sample_rate=sample_rate,
+                        num_channels=CHANNELS,
+                        samples_per_channel=len(pcm) // (CHANNELS * 2)
+                    )
+                    for resampled_frame in resampler.push(frame):
+                        pending.extend(resampled_frame.data)
+                else:
+                    pending.extend(pcm)
+
+                offset = 0
+                while len(pending) - offset >= bytes_per_frame:
+                    await self._capture_pcm(pending[offset:offset + bytes_per_frame], target_sample_rate)
+                    offset += bytes_per_frame
+                played.extend(pending[:offset])
+                del pending[:offset]
+
+            if resampler is not None:
+                for resampled_frame in resampler.flush():
+                    pending.extend(resampled_frame.data)
+            # Last (partial) frames
+            for i in range(0, len(pending), bytes_per_frame):
+                await self._capture_pcm(pending[i:i + bytes_per_frame], target_sample_rate)
+            played.extend(pending)
+
+            duration = len(played) / (target_sample_rate * CHANNELS * 2)
+            logger.info(f"✅ Streamed audio playback complete: {duration:.2f}s")
+        except asyncio.CancelledError:
+            logger.info(f"✋ Playback cancelled after {len(played) / (target_sample_rate * CHANNELS * 2):.2f}s")
+            raise
+        finally:
+            # Close the producer too (e.g. the XTTS HTTP stream) when playback stops early
+            if hasattr(audio_chunks, "aclose"):
+                await audio_chunks.aclose()
+            self.is_playing_audio = False
+            logger.info(f"🎤 Microphone enabled - audio playback finished")
+        return bytes(played), target_sample_rate
+
+    async def _capture_pcm(self, chunk: bytes, sample_rate: int):
+        """Push one block of int16 PCM to the audio source"""
+        samples = len(chunk) // (CHANNELS * 2)
+        if samples == 0:
+            return
+        audio_frame = rtc.AudioFrame(
+            data=chunk,
+            sample_rate=sample_rate,
+            num_channels=CHANNELS,
+            samples_per_channel=samples
+        )
+        # Only now has the caller heard something - a barge-in before this merges the turn instead
+        self.turn_spoke = True
+        await self.audio_source.capture_frame(audio_frame)
+
+    async def _send_message_to_web(self, user_text: str, agent_text: str, audio_file: str = None, audio_bytes: bytes = None):
+        """Send message to web client via data channel with text and audio (WAV file or in-memory WAV bytes)"""
         try:
             # Check if room and participant are available
             if not self.ctx.room or not self.ctx.room.local_participant:
@@ -921,9 +1867,10 @@ class VoiceAgent:
                 return
             
             # Read audio file and encode as base64
-            with open(audio_file, 'rb') as f:
-                audio_data = f.read()
-                audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+            if audio_bytes is None:
+                with open(audio_file, 'rb') as f:
+                    audio_bytes = f.read()
+            audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
             
             logger.info(f"📦 Preparing message: {len(agent_text)} chars text, {len(audio_base64)} bytes audio (base64)")
             
@@ -955,28 +1902,15 @@ class VoiceAgent:
             try:
                 logger.info(f"📤 Sending message via HTTP to {WEB_API_URL} for room {self.ctx.room.name}")
                 logger.info(f"📦 Message payload: type={message['type']}, user_text_len={len(user_text)}, agent_text_len={len(agent_text)}, audio_len={len(audio_base64)}")
-                # Run blocking request in executor to avoid blocking event loop
-                loop = asyncio.get_event_loop()
-                
-                def _make_http_request():
-                    try:
-                        logger.info(f"🌐 Making HTTP POST request to {WEB_API_URL}")
-                        resp = requests.post(
-                            WEB_API_URL,
-                            json={
-                                "roomName": self.ctx.room.name,
-                                "message": message
-                            },
-                            timeout=30  # Increased timeout
-                        )
-                        logger.info(f"🌐 HTTP response status: {resp.status_code}")
-                        return resp
-                    except Exception as req_error:
-                        logger.error(f"🌐 HTTP request error: {req_error}")
-                        raise
-                
-                response = await loop.run_in_executor(None, _make_http_request)
-                response.raise_for_status()
+                async with http_pool.session("web").post(
+                    WEB_API_URL,
+                    json={
+                        "roomName": self.ctx.room.name,
+                        "message": message
+                    }
+                ) as response:
+                    logger.info(f"🌐 HTTP response status: {response.status}")
+                    response.raise_for_status()
                 logger.info(f"✅ Message sent successfully via HTTP: {len(agent_text)} chars, {len(audio_base64)} bytes audio")
                 return  # Success, exit function
             except Exception as http_error:
@@ -1011,6 +1945,10 @@ class VoiceAgent:
 
 # ===== ENTRY POINT =====
 
+def prewarm(proc: JobProcess):
+    """Runs once per job process before a call is assigned - render the greeting ahead of time"""
+    greeting_cache.prerender(GREETING_PRERENDER_TIMEOUT)
+
 async def entrypoint(ctx: JobContext):
     """Agent entry point"""
     # #region debug log
@@ -1019,6 +1957,9 @@ async def entrypoint(ctx: JobContext):
         "job_id": getattr(ctx, "job_id", None)
     }, "H3")
     # #endregion
+    # Share the worker's HTTP pools; close them once the last job in this process ends
+    http_pool.acquire()
+    ctx.add_shutdown_callback(http_pool.release)
     agent = VoiceAgent(ctx)
     await agent.start()
 
@@ -1031,6 +1972,9 @@ if __name__ == "__main__":
     # Set agent_name for explicit dispatch
     cli.run_app(WorkerOptions(
         entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        # Prewarm renders the greeting; give it the XTTS budget on top of the default
+        initialize_process_timeout=GREETING_PRERENDER_TIMEOUT + 10,
         agent_name="voice-assistant"
     ))
 
@@ -3,19 +3,30 @@
 SIP çağrıları için otomatik agent dispatch servisi
 LiveKit room'lara participant join olduğunda agent'ı dispatch eder
 HTTP API kullanarak
+LiveKit webhook'ları (room_started, participant_joined) ile anında dispatch,
+yavaş polling sadece kaçırılan event'ler için yedek
 """
 import os
 import sys
 import time
+import base64
+import hashlib
+import threading
 import requests
 import json
 from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 LIVEKIT_URL = os.getenv("LIVEKIT_URL", "http://livekit:7880")
 API_KEY = os.getenv("API_KEY", "devkey")
 API_SECRET = os.getenv("API_SECRET", "secret")
 AGENT_NAME = "voice-assistant"
-POLL_INTERVAL = 15  # seconds - 10'dan 15'e çıkardık, daha az kontrol yapsın
+# Webhook receiver: LiveKit POSTs signed events here (livekit.yaml -> webhook.urls)
+WEBHOOK_ENABLED = os.getenv("WEBHOOK_ENABLED", "true").lower() == "true"
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8090"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+# seconds - webhook'lar açıkken polling sadece kaçırılan event'leri yakalayan yedek (reconciliation)
+POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", "60" if WEBHOOK_ENABLED else "15"))
 
 # Dispatch cache: Aynı odaya kısa süre içinde tekrar dispatch etmemek için
 # Format: {room_name: last_dispatch_time}
@@ -25,6 +36,8 @@ dispatch_cache = {}
 dispatched_rooms = set()
 CACHE_TTL = 120  # seconds - 120 saniye (2 dakika) içinde aynı odaya tekrar dispatch etme (yedek mekanizma)
 # Not: list_participants bazen 0 döndürüyor, bu yüzden hem dispatched_rooms hem de cache'e güveniyoruz
+# Webhook thread'leri ve polling aynı odaya aynı anda karar vermesin
+dispatch_lock = threading.Lock()
 
 def create_jwt_token():
     """LiveKit JWT token oluştur (Server API için)"""
@@ -155,6 +168,44 @@ def list_participants(room_name: str):
     except Exception as e:
         return []
 
+def is_agent_participant(participant: dict) -> bool:
+    # Agent identity'leri "agent-AJ_xxx" formatında oluyor
+    return (
+        participant.get("identity", "").startswith("agent-") or
+        participant.get("identity", "").startswith("voice-assistant") or
+        participant.get("name", "") == "voice-assistant"
+    )
+
+def claim_room(room_name: str, current_time: float) -> bool:
+    """Oda dispatch için uygunsa (daha önce dispatch edilmemiş, cache'de değil) sahiplen"""
+    with dispatch_lock:
+        if room_name in dispatched_rooms:
+            return False
+        last_dispatch = dispatch_cache.get(room_name, 0)
+        if last_dispatch > 0 and current_time - last_dispatch < CACHE_TTL:
+            return False
+        # Dispatch sürerken gelen diğer event'ler cache'e takılsın
+        dispatch_cache[room_name] = current_time
+        return True
+
+def dispatch_claimed_room(room_name: str, current_time: float) -> bool:
+    """claim_room ile alınmış odaya agent dispatch et; başarısızsa sahipliği bırak"""
+    if dispatch_agent_to_room(room_name):
+        with dispatch_lock:
+            dispatched_rooms.add(room_name)
+        print(f"✅ Agent dispatched to {room_name}, cached for {CACHE_TTL}s (cache now has {len(dispatch_cache)} entries, dispatched_rooms={len(dispatched_rooms)})")
+        return True
+    with dispatch_lock:
+        if dispatch_cache.get(room_name) == current_time:
+            del dispatch_cache[room_name]
+    print(f"⚠️  Dispatch failed for {room_name}, not caching / not marking as dispatched")
+    return False
+
+def mark_dispatched(room_name: str):
+    with dispatch_lock:
+        dispatched_rooms.add(room_name)
+        dispatch_cache[room_name] = time.time()
+
 def check_and_dispatch_agents():
     """Tüm odaları kontrol et ve SIP odalarına agent dispatch et"""
     global dispatch_cache, dispatched_rooms
@@ -164,9 +215,10 @@ def check_and_dispatch_agents():
         
         # Cache'i temizle (eski kayıtları sil - cache TTL'den 2 kat daha uzun süre)
         # Cache TTL 60s, bu yüzden 120s'den eski kayıtları sil
-        keys_to_remove = [k for k, v in dispatch_cache.items() if current_time - v > CACHE_TTL * 2]
-        for k in keys_to_remove:
-            del dispatch_cache[k]
+        with dispatch_lock:
+            keys_to_remove = [k for k, v in dispatch_cache.items() if current_time - v > CACHE_TTL * 2]
+            for k in keys_to_remove:
+                del dispatch_cache[k]
         if keys_to_remove:
             print(f"🧹 Cleaned {len(keys_to_remove)} old cache entries (older than {CACHE_TTL * 2}s)")
         
@@ -194,40 +246,110 @@ def check_and_dispatch_agents():
             
             # Cache süresi dolmuş veya cache'de yok, şimdi participant kontrolü yap
             participants = list_participants(room_name)
-            # Agent identity'leri "agent-AJ_xxx" formatında oluyor
-            has_agent = any(
-                p.get("identity", "").startswith("agent-") or 
-                p.get("identity", "").startswith("voice-assistant") or
-                p.get("name", "") == "voice-assistant" 
-                for p in participants
-            )
+            has_agent = any(is_agent_participant(p) for p in participants)
             
             if has_agent:
                 # Odaya en az bir agent join olmuş, bu odayı dispatched_rooms içine al
-                dispatched_rooms.add(room_name)
-                dispatch_cache[room_name] = current_time
+                mark_dispatched(room_name)
                 print(f"✅ Agent already present in room {room_name}, marking as dispatched (no further agents will be created)")
-            else:
-                # Agent yok ve cache süresi dolmuş, dispatch et ve hem cache'e hem dispatched_rooms'a kaydet
-                print(f"🤖 No agent found in room {room_name}, dispatching...")
-                if dispatch_agent_to_room(room_name):
-                    dispatch_cache[room_name] = current_time
-                    dispatched_rooms.add(room_name)
-                    print(f"✅ Agent dispatched to {room_name}, cached for {CACHE_TTL}s (cache now has {len(dispatch_cache)} entries, dispatched_rooms={len(dispatched_rooms)})")
-                else:
-                    print(f"⚠️  Dispatch failed for {room_name}, not caching / not marking as dispatched")
+            elif claim_room(room_name, current_time):
+                # Agent yok ve cache süresi dolmuş (webhook kaçırılmış), dispatch et
+                print(f"🤖 No agent found in room {room_name} (missed by webhook), dispatching...")
+                dispatch_claimed_room(room_name, current_time)
                 
     except Exception as e:
         print(f"❌ Error checking rooms: {e}")
         import traceback
         traceback.print_exc()
 
+def verify_webhook(body: bytes, auth_header: str) -> dict:
+    """
+    LiveKit webhook imzasını doğrula: Authorization başlığı API secret ile imzalı bir JWT,
+    "sha256" claim'i gövdenin base64 SHA-256 özeti. Geçerliyse event'i döndürür, değilse ValueError.
+    """
+    import jwt
+    token = auth_header[len("Bearer "):] if auth_header.startswith("Bearer ") else auth_header
+    if not token:
+        raise ValueError("missing Authorization header")
+    try:
+        claims = jwt.decode(token, API_SECRET, algorithms=["HS256"], leeway=10, options={"verify_aud": False})
+    except jwt.PyJWTError as e:
+        raise ValueError(f"invalid token: {e}")
+    if claims.get("iss") != API_KEY:
+        raise ValueError(f"unknown API key: {claims.get('iss')}")
+    digest = base64.b64encode(hashlib.sha256(body).digest()).decode()
+    if claims.get("sha256") != digest:
+        raise ValueError("body hash mismatch")
+    return json.loads(body)
+
+def handle_webhook_event(event: dict):
+    """room_started / participant_joined -> SIP odasına hemen dispatch; room_finished -> odayı unut"""
+    event_type = event.get("event", "")
+    room_name = (event.get("room") or {}).get("name", "")
+    if not room_name.startswith("sip-call-"):
+        return
+
+    if event_type == "room_finished":
+        with dispatch_lock:
+            dispatched_rooms.discard(room_name)
+            dispatch_cache.pop(room_name, None)
+        print(f"🧹 Room finished: {room_name}")
+        return
+
+    if event_type == "participant_joined" and is_agent_participant(event.get("participant") or {}):
+        mark_dispatched(room_name)
+        return
+
+    if event_type not in ("room_started", "participant_joined"):
+        return
+    current_time = time.time()
+    if not claim_room(room_name, current_time):
+        return
+    print(f"📨 Webhook {event_type} for {room_name}, dispatching...")
+    if dispatch_claimed_room(room_name, current_time):
+        created_at = float(event.get("createdAt") or 0)
+        if created_at:
+            print(f"⚡ Dispatched {int((time.time() - created_at) * 1000)}ms after {event_type}")
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """LiveKit webhook receiver: imzayı doğrula, hemen 200 dön, dispatch'i ayrı thread'de yap"""
+
+    def do_POST(self):
+        if self.path.split("?")[0] != WEBHOOK_PATH:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            event = verify_webhook(body, self.headers.get("Authorization", ""))
+        except ValueError as e:
+            print(f"⚠️  Rejected webhook: {e}")
+            self.send_response(401)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        threading.Thread(target=handle_webhook_event, args=(event,), daemon=True).start()
+
+    def log_message(self, format, *args):
+        # Her webhook için erişim logu basma
+        pass
+
+def start_webhook_server():
+    server = ThreadingHTTPServer(("0.0.0.0", WEBHOOK_PORT), WebhookHandler)
+    threading.Thread(target=server.serve_forever, name="webhook-server", daemon=True).start()
+    print(f"📨 Webhook receiver listening on :{WEBHOOK_PORT}{WEBHOOK_PATH}")
+    return server
+
 def main():
     print("🚀 SIP Agent Dispatcher started")
     print(f"📍 LiveKit URL: {LIVEKIT_URL}")
     print(f"🤖 Agent Name: {AGENT_NAME}")
-    print(f"⏱️  Poll Interval: {POLL_INTERVAL}s")
+    print(f"⏱️  Poll Interval: {POLL_INTERVAL}s{' (reconciliation, webhooks dispatch immediately)' if WEBHOOK_ENABLED else ''}")
     print()
+    if WEBHOOK_ENABLED:
+        start_webhook_server()
     
     while True:
         try:
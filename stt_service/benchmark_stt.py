@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+STT Benchmark - stt_service'i yerel bir Türkçe korpus üzerinde ölçer
+Kullanım:
+    python benchmark_stt.py <korpus_dizini>                          # foo.wav + foo.txt çiftleri
+    python benchmark_stt.py corpus/ --concurrency 1,4,8 --model base --compute-type int8
+    python benchmark_stt.py corpus/ --baseline onceki.json            # önceki çalıştırmayla karşılaştır
+
+Her dosya transcribe_audio (/transcribe) yolundan geçer: decode_audio, VAD kırpma, batcher, profil.
+Çıktı: gerçek zaman faktörü, p50/p95/p99 gecikme, WER/CER ve tepe RSS (eşzamanlılık seviyesi başına), JSON.
+Çevrimdışı çalışır (HF_HUB_OFFLINE=1): model önbellekte olmalı ya da --model yerel bir dizin olmalı.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import re
+import sys
+import time
+import unicodedata
+
+def log(message: str = ""):
+    # stt_api prints every request - its stdout is muted while a level runs
+    print(message, file=sys.__stdout__, flush=True)
+
+def load_corpus(directory: str, limit: int = 0) -> list:
+    """(wav path, reference transcript) pairs: every foo.wav with a foo.txt next to it"""
+    pairs = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(".wav"):
+            continue
+        wav_path = os.path.join(directory, name)
+        txt_path = os.path.splitext(wav_path)[0] + ".txt"
+        if not os.path.exists(txt_path):
+            log(f"⚠️  Transcript missing, skipped: {name}")
+            continue
+        with open(txt_path, encoding="utf-8") as f:
+            pairs.append((wav_path, f.read().strip()))
+    return pairs[:limit] if limit else pairs
+
+def normalize(text: str) -> str:
+    """Turkish-aware lowercase, punctuation stripped, whitespace collapsed"""
+    text = unicodedata.normalize("NFC", text).replace("I", "ı").replace("İ", "i").lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+def edit_distance(reference: list, hypothesis: list) -> int:
+    """Levenshtein distance between two token sequences"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref in enumerate(reference, 1):
+        current = [i]
+        for j, hyp in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref != hyp)))
+        previous = current
+    return previous[-1]
+
+def percentile(values: list, q: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 3)
+
+def reset_peak_rss():
+    """Reset VmHWM so each level reports its own peak (Linux only, otherwise the process-wide peak is kept)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+def peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+async def run_level(stt_api, corpus: list, concurrency: int, args) -> dict:
+    """Send the whole corpus through transcribe_audio with at most `concurrency` requests in flight"""
+    from fastapi import HTTPException, UploadFile
+
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(wav_path: str, reference: str, audio_seconds: float):
+        with open(wav_path, "rb") as f:
+            content = f.read()
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                response = await stt_api.transcribe_audio(
+                    language=args.language,
+                    audio_file=UploadFile(file=io.BytesIO(content), filename=os.path.basename(wav_path)),
+                    deadline=args.deadline,
+                    profile=args.profile
+                )
+                text, error = json.loads(response.body)["text"], None
+            except HTTPException as e:
+                text, error = "", f"{e.status_code}: {e.detail}"
+            latency = time.monotonic() - start
+        samples.append({
+            "file": os.path.basename(wav_path),
+            "audio_seconds": round(audio_seconds, 3),
+            "latency": round(latency, 3),
+            "reference": reference,
+            "hypothesis": text.strip(),
+            "error": error
+        })
+
+    reset_peak_rss()
+    started = time.monotonic()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+        await asyncio.gather(*(one(path, reference, seconds) for path, reference, seconds in corpus))
+    wall = time.monotonic() - started
+
+    audio_total = sum(sample["audio_seconds"] for sample in samples)
+    word_errors = word_total = char_errors = char_total = 0
+    for sample in samples:
+        reference, hypothesis = normalize(sample["reference"]), normalize(sample["hypothesis"])
+        word_errors += edit_distance(reference.split(), hypothesis.split())
+        word_total += len(reference.split())
+        char_errors += edit_distance(list(reference.replace(" ", "")), list(hypothesis.replace(" ", "")))
+        char_total += len(reference.replace(" ", ""))
+    latencies = [sample["latency"] for sample in samples if sample["error"] is None]
+    per_request_rtf = [sample["latency"] / sample["audio_seconds"] for sample in samples if sample["audio_seconds"] > 0]
+    return {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": sum(sample["error"] is not None for sample in samples),
+        "wall_seconds": round(wall, 3),
+        "audio_seconds": round(audio_total, 3),
+        # Processing time per second of audio for the whole level (throughput), and per request
+        "rtf": round(wall / audio_total, 4) if audio_total else None,
+        "rtf_p50": percentile(per_request_rtf, 0.5),
+        "latency_seconds": {
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else None
+        },
+        "wer": round(word_errors / word_total, 4) if word_total else None,
+        "cer": round(char_errors / char_total, 4) if char_total else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "batcher": stt_api.stt_batcher.stats(),
+        "samples": samples
+    }
+
+def print_level(level: dict, baseline: dict = None):
+    latency = level["latency_seconds"]
+    log(
+        f"  c={level['concurrency']:<3} RTF {level['rtf']}  "
+        f"p50/p95/p99 {latency['p50']}/{latency['p95']}/{latency['p99']}s  "
+        f"WER {level['wer']}  CER {level['cer']}  RSS {level['peak_rss_mb']} MB  errors {level['errors']}"
+    )
+    if baseline:
+        deltas = []
+        for key, value, previous in [
+            ("RTF", level["rtf"], baseline.get("rtf")),
+            ("p95", latency["p95"], baseline.get("latency_seconds", {}).get("p95")),
+            ("WER", level["wer"], baseline.get("wer")),
+            ("RSS", level["peak_rss_mb"], baseline.get("peak_rss_mb")),
+        ]:
+            if value is not None and previous:
+                deltas.append(f"{key} {(value - previous) / previous * 100:+.1f}%")
+        if deltas:
+            log(f"        vs baseline: {'  '.join(deltas)}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="stt_service benchmark: RTF, latency percentiles, WER/CER and peak RSS on a local corpus",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("corpus", help="Directory of foo.wav + foo.txt (reference transcript) pairs")
+    parser.add_argument("--concurrency", default="1,2,4", help="Comma separated concurrency levels (default: 1,2,4)")
+    parser.add_argument("--model", help="WHISPER_MODEL (size or local model directory)")
+    parser.add_argument("--compute-type", help="WHISPER_COMPUTE_TYPE (int8, int8_float32, float32, ...)")
+    parser.add_argument("--cpu-threads", type=int, help="STT_CPU_THREADS")
+    parser.add_argument("--num-workers", type=int, help="STT_NUM_WORKERS")
+    parser.add_argument("--profile", default=None, help="Decode profile sent with every request (default: STT_PROFILE)")
+    parser.add_argument("--language", default="tr")
+    parser.add_argument("--limit", type=int, default=0, help="Only the first N files")
+    parser.add_argument("--deadline", type=float, default=3600.0, help="Queue deadline per request (default: no rejections)")
+    parser.add_argument("--output", help="Result JSON (default: stt_benchmark_<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier result JSON to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Keep stt_service request logs")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    # Configuration is read by stt_api at import time; CPU only and no downloads
+    for env, value in [
+        ("WHISPER_MODEL", args.model),
+        ("WHISPER_COMPUTE_TYPE", args.compute_type),
+        ("STT_CPU_THREADS", args.cpu_threads),
+        ("STT_NUM_WORKERS", args.num_workers),
+    ]:
+        if value is not None:
+            os.environ[env] = str(value)
+    os.environ["WHISPER_DEVICE"] = "cpu"
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("STT_QUEUE_LIMIT", str(max(levels) + 1))
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import stt_api
+    from faster_whisper import decode_audio
+
+    corpus = load_corpus(args.corpus, args.limit)
+    if not corpus:
+        log(f"❌ No WAV + transcript pairs in {args.corpus}")
+        return 1
+    corpus = [
+        (path, reference, len(decode_audio(path, sampling_rate=stt_api.SAMPLE_RATE)) / stt_api.SAMPLE_RATE)
+        for path, reference in corpus
+    ]
+    args.profile = args.profile or stt_api.DEFAULT_PROFILE
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = {level["concurrency"]: level for level in json.load(f)["levels"]}
+
+    async def run() -> list:
+        load_start = time.monotonic()
+        await stt_api.startup_event()
+        log(f"✅ Model loaded and warmed in {time.monotonic() - load_start:.1f}s")
+        results = []
+        for concurrency in levels:
+            level = await run_level(stt_api, corpus, concurrency, args)
+            print_level(level, baseline.get(concurrency))
+            results.append(level)
+        return results
+
+    log(f"🎙️  {len(corpus)} files, {sum(seconds for _, _, seconds in corpus):.1f}s audio - "
+        f"{stt_api.MODEL_SIZE} / {stt_api.COMPUTE_TYPE} / profile {args.profile} / concurrency {levels}")
+    levels_result = asyncio.run(run())
+
+    try:
+        from importlib.metadata import version
+        faster_whisper_version = version("faster-whisper")
+    except Exception:
+        faster_whisper_version = None
+    result = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "model": stt_api.MODEL_SIZE,
+            "compute_type": stt_api.COMPUTE_TYPE,
+            "device": stt_api.DEVICE,
+            "cpu_threads": stt_api.CPU_THREADS,
+            "num_workers": stt_api.NUM_WORKERS,
+            "concurrency_workers": stt_api.CONCURRENCY,
+            "batch_window_ms": stt_api.BATCH_WINDOW_MS,
+            "max_batch_size": stt_api.MAX_BATCH_SIZE,
+            "vad_filter": stt_api.VAD_FILTER,
+            "profile": args.profile,
+            "language": args.language,
+            "faster_whisper": faster_whisper_version,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count()
+        },
+        "corpus": {
+            "path": os.path.abspath(args.corpus),
+            "files": len(corpus),
+            "audio_seconds": round(sum(seconds for _, _, seconds in corpus), 3)
+        },
+        "levels": levels_result
+    }
+    output = args.output or f"stt_benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    log(f"📄 Results written to {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,42 +4,145 @@ Harici servis olarak çalışır, agent'tan HTTP istekleri alır
 """
 
 import uvicorn
-from fastapi import FastAPI, Body, HTTPException, UploadFile, File
+from fastapi import FastAPI, Body, HTTPException, UploadFile, File, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, decode_audio
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import get_compression_ratio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+from concurrent.futures import Future
+import numpy as np
+import asyncio
+import collections
+import json
+import math
 import os
+import queue
 import tempfile
+import threading
+import time
 
 PORT = 8030
 MODEL_SIZE = os.getenv("WHISPER_MODEL", "small")  # small, base, tiny
 DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
 COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+SAMPLE_RATE = 16000  # faster-whisper expects 16 kHz mono float32
+
+# Streaming (WebSocket) transcription
+STREAM_PARTIAL_INTERVAL = float(os.getenv("STT_STREAM_PARTIAL_INTERVAL", "0.6"))  # seconds of new audio between partial decodes
+STREAM_WINDOW = float(os.getenv("STT_STREAM_WINDOW", "6.0"))  # uncommitted audio above this is committed segment by segment
+STREAM_COMMIT_MARGIN = float(os.getenv("STT_STREAM_COMMIT_MARGIN", "1.0"))  # never commit segments this close to the live edge
+STREAM_PARTIAL_DEADLINE = float(os.getenv("STT_STREAM_PARTIAL_DEADLINE", "0.5"))  # a partial that cannot start by then is skipped
+
+# Non-speech gating: leading/trailing silence is cut (Silero VAD) and clips with too little speech are not decoded
+VAD_FILTER = os.getenv("STT_VAD_FILTER", "true").lower() == "true"
+VAD_THRESHOLD = float(os.getenv("STT_VAD_THRESHOLD", "0.5"))
+VAD_PAD_MS = int(os.getenv("STT_VAD_PAD_MS", "200"))  # audio kept around the first/last speech
+MIN_SPEECH_MS = int(os.getenv("STT_MIN_SPEECH_MS", "250"))  # coughs, clicks and line noise stay below this
+
+# Batched transcription (/transcribe, /transcribe/pcm): utterances arriving within the window share one decode
+BATCH_WINDOW_MS = int(os.getenv("STT_BATCH_WINDOW_MS", "25"))  # max wait for more utterances after the first one
+MAX_BATCH_SIZE = int(os.getenv("STT_MAX_BATCH_SIZE", "8"))  # 1 = no batching
+BEAM_SIZE = int(os.getenv("STT_BEAM_SIZE", "5"))
+NO_SPEECH_THRESHOLD = 0.6  # same silence rule as faster-whisper's transcribe
+LOG_PROB_THRESHOLD = -1.0
+COMPRESSION_RATIO_THRESHOLD = 2.4  # faster-whisper's default: above this the transcribe path retries at a higher temperature
+MAX_BATCH_SECONDS = 30  # one Whisper window; longer utterances take the regular transcribe path
+
+# Admission control: bounded queue in front of the model, requests that cannot start in time get 503 + Retry-After
+CPU_THREADS = int(os.getenv("STT_CPU_THREADS", "0"))  # CTranslate2 intra-op threads (0 = library default)
+NUM_WORKERS = int(os.getenv("STT_NUM_WORKERS", "1"))  # model calls that can run in parallel
+CONCURRENCY = int(os.getenv("STT_CONCURRENCY", str(NUM_WORKERS)))  # batcher worker threads (batches decoded at once)
+QUEUE_LIMIT = int(os.getenv("STT_QUEUE_LIMIT", "32"))  # utterances waiting for a worker before new ones are refused
+QUEUE_DEADLINE = float(os.getenv("STT_QUEUE_DEADLINE", "5"))  # default seconds a request may wait before decoding starts
+LATENCY_WINDOW = 500  # recent requests kept for /health percentiles
+
+# Decode profiles a request can pick (?profile=...): beam search, temperature fallback and model size per latency tier
+DEFAULT_PROFILE = os.getenv("STT_PROFILE", "balanced")
+ENABLED_PROFILES = [name.strip() for name in os.getenv("STT_PROFILES", "realtime,balanced,accurate").split(",") if name.strip()]
+TEMPERATURE_FALLBACK = [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]  # faster-whisper's default
+PROFILES = {
+    # Short phone answers: greedy, no fallback, no timestamps
+    "realtime": {
+        "model": os.getenv("STT_REALTIME_MODEL", MODEL_SIZE),
+        "batch": True,
+        "options": {"beam_size": 1, "best_of": 1, "temperature": [0.0], "condition_on_previous_text": False, "without_timestamps": True}
+    },
+    "balanced": {
+        "model": MODEL_SIZE,
+        "batch": True,
+        "options": {"beam_size": BEAM_SIZE, "best_of": 5, "temperature": TEMPERATURE_FALLBACK, "condition_on_previous_text": True}
+    },
+    # Always the full transcribe path (patience is not applied in a batch), optionally a larger model
+    "accurate": {
+        "model": os.getenv("STT_ACCURATE_MODEL", MODEL_SIZE),
+        "batch": False,
+        "options": {"beam_size": max(BEAM_SIZE, 5), "best_of": 5, "patience": 2.0, "temperature": TEMPERATURE_FALLBACK, "condition_on_previous_text": True}
+    },
+}
 
 app = FastAPI(title="STT Service - FasterWhisper")
 
-# Global model
+# Global model (WHISPER_MODEL) and every model size used by an enabled profile
 stt_model = None
+stt_models = {}
+profiles = {}  # enabled profiles, loaded and warmed
 
 @app.on_event("startup")
 async def startup_event():
     global stt_model
-    print(f"Loading Whisper STT model ({MODEL_SIZE}, {DEVICE})...")
+    enabled = list(dict.fromkeys(ENABLED_PROFILES + [DEFAULT_PROFILE]))
+    unknown = [name for name in enabled if name not in PROFILES]
+    if unknown:
+        raise RuntimeError(f"Unknown STT profile(s): {', '.join(unknown)} (available: {', '.join(PROFILES)})")
+    sizes = [MODEL_SIZE] + [PROFILES[name]["model"] for name in enabled]
     try:
-        stt_model = WhisperModel(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE)
+        for size in dict.fromkeys(sizes):
+            print(f"Loading Whisper STT model ({size}, {DEVICE})...")
+            stt_models[size] = WhisperModel(
+                size,
+                device=DEVICE,
+                compute_type=COMPUTE_TYPE,
+                cpu_threads=CPU_THREADS,
+                num_workers=NUM_WORKERS
+            )
+        stt_model = stt_models[MODEL_SIZE]
         print("✅ Whisper STT model loaded successfully")
     except Exception as e:
         print(f"❌ Error loading Whisper model: {e}")
         raise
 
+    # First decode of each profile pays for lazy allocations - do it here, not on a caller
+    warmup = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    for name in enabled:
+        start = time.monotonic()
+        try:
+            transcribe_array(warmup, "tr", name)
+            print(f"🔥 STT profile '{name}' warmed up ({PROFILES[name]['model']}, {time.monotonic() - start:.2f}s)")
+        except Exception as e:
+            print(f"⚠️  Warm-up of STT profile '{name}' failed: {e}")
+        profiles[name] = PROFILES[name]
+
+def check_profile(name: str) -> str:
+    if name not in profiles:
+        raise HTTPException(status_code=400, detail=f"Unknown STT profile '{name}' (available: {', '.join(profiles)})")
+    return name
+
 @app.post("/transcribe")
 async def transcribe_audio(
     language: str = Body("tr", embed=True),
-    audio_file: UploadFile = File(...)
+    audio_file: UploadFile = File(...),
+    deadline: float = QUEUE_DEADLINE,
+    profile: str = DEFAULT_PROFILE
 ):
     """Transcribe audio file to text"""
     try:
         if stt_model is None:
             raise HTTPException(status_code=503, detail="STT model not loaded")
+        check_profile(profile)
+        stt_batcher.admit(deadline)
         
         # Save uploaded file to temp location
         with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
@@ -48,29 +151,570 @@ async def transcribe_audio(
             tmp_file.write(content)
         
         try:
-            # Transcribe
+            # Transcribe (decoded to 16 kHz so it can share a batch with other requests)
             print(f"Transcribing audio file: {tmp_path}")
-            segments, info = stt_model.transcribe(tmp_path, language=language)
-            segment_list = list(segments)
-            text = " ".join([seg.text for seg in segment_list])
+            audio = await run_in_threadpool(decode_audio, tmp_path, sampling_rate=SAMPLE_RATE)
+            result = await transcribe_utterance(audio, language, deadline, profile)
             
-            print(f"Transcription result: '{text}' ({len(segment_list)} segments)")
+            print(f"Transcription result: '{result['text']}' ({result['segments']} segments)")
             
-            return JSONResponse({
-                "text": text,
-                "language": info.language,
-                "language_probability": info.language_probability,
-                "segments": len(segment_list)
-            })
+            return JSONResponse(result)
         finally:
             # Clean up temp file
             if os.path.exists(tmp_path):
                 os.remove(tmp_path)
                 
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error transcribing: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def pcm16_to_float32(pcm: bytes) -> np.ndarray:
+    """Convert little-endian int16 PCM bytes to a float32 array in [-1, 1)"""
+    return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+
+def segment_info(text: str, start: float, end: float, no_speech_prob: float, avg_logprob: float) -> dict:
+    """Per-segment scores returned with every transcript, so clients can drop noise"""
+    return {
+        "text": text.strip(),
+        "start": round(start, 2),
+        "end": round(end, 2),
+        "no_speech_prob": round(no_speech_prob, 3),
+        "avg_logprob": round(avg_logprob, 3)
+    }
+
+def transcribe_array(audio: np.ndarray, language: str, profile: str = DEFAULT_PROFILE) -> dict:
+    """Transcribe a 16 kHz float32 array with a decode profile (blocking)"""
+    settings = PROFILES[profile]
+    segments, info = stt_models[settings["model"]].transcribe(audio, language=language, **settings["options"])
+    segment_list = list(segments)
+    text = " ".join([seg.text for seg in segment_list])
+    return {
+        "text": text,
+        "language": info.language,
+        "language_probability": info.language_probability,
+        "segments": len(segment_list),
+        "segment_info": [
+            segment_info(seg.text, seg.start, seg.end, seg.no_speech_prob, seg.avg_logprob) for seg in segment_list
+        ],
+        "profile": profile
+    }
+
+def trim_silence(audio: np.ndarray) -> tuple:
+    """Cut leading and trailing non-speech with Silero VAD, returns (audio, seconds of detected speech)"""
+    if not VAD_FILTER or len(audio) == 0:
+        return audio, len(audio) / SAMPLE_RATE
+    chunks = get_speech_timestamps(
+        audio,
+        VadOptions(threshold=VAD_THRESHOLD, min_silence_duration_ms=100, speech_pad_ms=0),
+        sampling_rate=SAMPLE_RATE
+    )
+    if not chunks:
+        return audio[:0], 0.0
+    speech_seconds = sum(chunk["end"] - chunk["start"] for chunk in chunks) / SAMPLE_RATE
+    # Pauses between speech chunks stay; only the edges are cut
+    pad = VAD_PAD_MS * SAMPLE_RATE // 1000
+    start = max(0, chunks[0]["start"] - pad)
+    end = min(len(audio), chunks[-1]["end"] + pad)
+    return audio[start:end], speech_seconds
+
+async def transcribe_utterance(audio: np.ndarray, language: str, deadline: float = QUEUE_DEADLINE,
+                               profile: str = DEFAULT_PROFILE) -> dict:
+    """Trim non-speech, skip clips without enough speech, decode the rest through the batcher"""
+    duration = len(audio) / SAMPLE_RATE
+    audio, speech_seconds = await run_in_threadpool(trim_silence, audio)
+    if speech_seconds * 1000 < MIN_SPEECH_MS:
+        print(f"🔇 Not decoding: {speech_seconds:.2f}s speech in {duration:.2f}s audio")
+        return {
+            "text": "",
+            "language": language,
+            "language_probability": None,
+            "segments": 0,
+            "segment_info": [],
+            "skipped": "no_speech",
+            "profile": profile,
+            "speech_seconds": round(speech_seconds, 2),
+            "audio_seconds": round(duration, 2)
+        }
+    result = await stt_batcher.transcribe(audio, language, deadline, profile)
+    result.update(
+        speech_seconds=round(speech_seconds, 2),
+        audio_seconds=round(duration, 2),
+        decoded_seconds=round(len(audio) / SAMPLE_RATE, 2)
+    )
+    return result
+
+class TranscriptionBatcher:
+    """
+    Worker threads (STT_CONCURRENCY) in front of the Whisper model for /transcribe and /transcribe/pcm.
+    Utterances wait in one bounded queue and are collected for BATCH_WINDOW_MS; a group is encoded
+    as one batch per decode profile and decoded with one generate call, each caller gets its
+    result through a Future. A lone utterance (or one longer than a Whisper window, or of a
+    profile that does not batch) uses transcribe_array.
+    Requests are refused with 503 + Retry-After when the queue is full or cannot reach
+    them before their deadline; ones still queued at their deadline are withdrawn.
+    WebSocket stream decodes run on the same workers as jobs (run), so they share the
+    queue limit, the deadlines and the /health statistics.
+    """
+
+    def __init__(self, window_ms: int = BATCH_WINDOW_MS, max_batch: int = MAX_BATCH_SIZE,
+                 concurrency: int = CONCURRENCY, queue_limit: int = QUEUE_LIMIT):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.concurrency = max(1, concurrency)
+        self.queue_limit = queue_limit
+        self.batching = max_batch > 1  # switched off if the installed faster-whisper does not support the batched path
+        self.batches = 0
+        self.utterances = 0
+        self.in_flight = 0
+        self.stream_decodes = 0
+        self.busy_seconds = 0.0
+        self.rejected = {"queue_full": 0, "deadline": 0, "expired": 0}
+        self.started = time.monotonic()
+        self._latencies = collections.deque(maxlen=LATENCY_WINDOW)  # (queue wait, total) seconds per request
+        self._batch_times = collections.deque(maxlen=50)  # (utterances, seconds) per batch
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def estimated_wait(self) -> float:
+        """Seconds until a request queued now would start, from recent batch throughput"""
+        with self._lock:
+            if not self._batch_times:
+                return 0.0
+            utterances = sum(count for count, _ in self._batch_times)
+            seconds = sum(elapsed for _, elapsed in self._batch_times)
+            busy = self.in_flight
+        throughput = utterances / max(seconds, 1e-6) * self.concurrency  # utterances per second, all workers
+        # Waiting utterances plus the ones being decoded now have to clear first
+        return (self._queue.qsize() + busy) / throughput
+
+    def _refuse(self, reason: str, detail: str, retry_after: float):
+        with self._lock:
+            self.rejected[reason] += 1
+        raise HTTPException(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    def admit(self, deadline: float):
+        """Refuse right away (503) if the queue is full or a new request could not start within deadline seconds"""
+        queued = self._queue.qsize()
+        if queued >= self.queue_limit:
+            self._refuse("queue_full", f"STT queue full ({queued} utterances, limit {self.queue_limit})", self.estimated_wait())
+        wait = self.estimated_wait()
+        if wait > deadline:
+            self._refuse("deadline", f"STT busy (estimated wait {wait:.1f}s, deadline {deadline:.1f}s)", wait)
+
+    async def transcribe(self, audio: np.ndarray, language: str, deadline: float = QUEUE_DEADLINE,
+                         profile: str = DEFAULT_PROFILE) -> dict:
+        return await self._submit(audio, language, profile, deadline)
+
+    async def run(self, job, deadline: float = QUEUE_DEADLINE):
+        """Run a blocking call (a stream decode) on a worker, admitted and queued like a transcription"""
+        return await self._submit(job, None, None, deadline)
+
+    async def _submit(self, audio, language, profile, deadline: float):
+        self.admit(deadline)
+        with self._lock:
+            while len(self._threads) < self.concurrency:
+                thread = threading.Thread(target=self._run, name=f"stt-batcher-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        future = Future()
+        enqueued = time.monotonic()
+        self._queue.put((audio, language, profile, future, enqueued))
+        wrapped = asyncio.wrap_future(future)
+        # asyncio.wait does not cancel on timeout - a request that already started keeps its result
+        done, _ = await asyncio.wait({wrapped}, timeout=deadline)
+        if not done and future.cancel():
+            self._refuse("expired", f"STT request not started within {deadline:.1f}s", self.estimated_wait())
+        return await wrapped
+
+    def _collect(self) -> list:
+        """Next batch: the first live request plus whatever arrives within the window"""
+        batch = []
+        deadline = None
+        while len(batch) < self.max_batch:
+            if deadline is None:
+                item = self._queue.get()
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            # Requests withdrawn at their deadline are skipped
+            if not item[3].set_running_or_notify_cancel():
+                continue
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.window
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            start = time.monotonic()
+            size = len(batch)
+            with self._lock:
+                self.in_flight += size
+            waits = [start - item[4] for item in batch]
+            jobs = sum(callable(item[0]) for item in batch)
+            groups, single = {}, []
+            for item in batch:
+                if callable(item[0]):
+                    single.append(item)
+                    continue
+                fits = item[1] and PROFILES[item[2]]["batch"] and len(item[0]) <= MAX_BATCH_SECONDS * SAMPLE_RATE
+                if fits:
+                    groups.setdefault(item[2], []).append(item)
+                else:
+                    single.append(item)
+            for profile, group in groups.items():
+                if len(group) < 2 or not self.batching:
+                    single.extend(group)
+                    continue
+                try:
+                    results = transcribe_batch([item[0] for item in group], [item[1] for item in group], profile)
+                    retry = [item for item, result in zip(group, results) if result is None]
+                    for item, result in zip(group, results):
+                        if result is not None:
+                            item[3].set_result(result)
+                    single.extend(retry)
+                    print(f"✅ Batched {len(group)} utterances ({profile}) in {time.monotonic() - start:.2f}s"
+                          f"{f', {len(retry)} re-decoded with temperature fallback' if retry else ''}")
+                except Exception as e:
+                    print(f"⚠️  Batched transcription failed ({e}), transcribing one by one from now on")
+                    import traceback
+                    traceback.print_exc()
+                    self.batching = False
+                    single.extend(group)
+
+            for audio, language, profile, future, _ in single:
+                try:
+                    if callable(audio):
+                        future.set_result(audio())
+                    else:
+                        future.set_result(transcribe_array(audio, language, profile))
+                except Exception as e:
+                    future.set_exception(e)
+            end = time.monotonic()
+            with self._lock:
+                self.in_flight -= size
+                self.busy_seconds += end - start
+                self.batches += 1
+                self.utterances += size - jobs
+                self.stream_decodes += jobs
+                self._batch_times.append((size, end - start))
+                self._latencies.extend((wait, wait + end - start) for wait in waits)
+
+    @staticmethod
+    def _percentiles(values: list) -> dict:
+        if not values:
+            return {"p50": None, "p90": None, "p99": None}
+        values = sorted(values)
+        pick = lambda q: round(values[min(len(values) - 1, int(q * len(values)))], 3)
+        return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99)}
+
+    def stats(self) -> dict:
+        uptime = max(time.monotonic() - self.started, 1e-6)
+        with self._lock:
+            latencies = list(self._latencies)
+            stats = {
+                "batching": self.batching,
+                "concurrency": self.concurrency,
+                "queued": self._queue.qsize(),
+                "queue_limit": self.queue_limit,
+                "in_flight": self.in_flight,
+                "batches": self.batches,
+                "utterances": self.utterances,
+                "stream_decodes": self.stream_decodes,
+                "avg_batch_size": round(self.utterances / self.batches, 2) if self.batches else None,
+                "utilization": round(self.busy_seconds / uptime / self.concurrency, 3),
+                "rejected": dict(self.rejected)
+            }
+        stats["estimated_wait"] = round(self.estimated_wait(), 3)
+        stats["queue_wait_seconds"] = self._percentiles([wait for wait, _ in latencies])
+        stats["latency_seconds"] = self._percentiles([total for _, total in latencies])
+        return stats
+
+def transcribe_batch(audios: list, languages: list, profile: str = DEFAULT_PROFILE) -> list:
+    """
+    Transcribe several short 16 kHz float32 arrays (each at most one 30s Whisper window)
+    with one encoder pass and one beam-search generate call (profile's model and beam size).
+    Language is given, not detected. A result that would have triggered the profile's
+    temperature fallback in transcribe is returned as None - the caller decodes it alone.
+    """
+    fallback = len(PROFILES[profile]["options"]["temperature"]) > 1
+    model = stt_models[PROFILES[profile]["model"]]
+    features = np.stack([pad_or_trim(model.feature_extractor(audio)[..., :-1]) for audio in audios])
+    encoder_output = model.encode(features)
+    tokenizers = [
+        Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language=language)
+        for language in languages
+    ]
+    prompts = [model.get_prompt(tokenizer, [], without_timestamps=True) for tokenizer in tokenizers]
+    outputs = model.model.generate(
+        encoder_output,
+        prompts,
+        beam_size=PROFILES[profile]["options"]["beam_size"],
+        max_length=model.max_length,
+        return_scores=True,
+        return_no_speech_prob=True,
+        suppress_blank=True,
+        suppress_tokens=[-1]
+    )
+
+    results = []
+    for output, tokenizer, language, audio in zip(outputs, tokenizers, languages, audios):
+        tokens = output.sequences_ids[0]
+        # Score is length-normalized (length_penalty=1) - turn it back into faster-whisper's avg_logprob
+        avg_logprob = output.scores[0] * len(tokens) / (len(tokens) + 1)
+        silent = output.no_speech_prob > NO_SPEECH_THRESHOLD and avg_logprob < LOG_PROB_THRESHOLD
+        text = "" if silent else tokenizer.decode(tokens).strip()
+        # Same thresholds transcribe uses to retry a window at the next temperature
+        if fallback and not silent and (
+            avg_logprob < LOG_PROB_THRESHOLD or get_compression_ratio(text) > COMPRESSION_RATIO_THRESHOLD
+        ):
+            results.append(None)
+            continue
+        results.append({
+            "text": text,
+            "language": language,
+            "language_probability": 1.0,
+            "segments": 1 if text else 0,
+            # Like transcribe, a segment dropped as silence is not reported
+            "segment_info": [segment_info(text, 0.0, len(audio) / SAMPLE_RATE, output.no_speech_prob, avg_logprob)] if text else [],
+            "profile": profile
+        })
+    return results
+
+stt_batcher = TranscriptionBatcher()
+stream_sessions = 0  # open /transcribe/stream WebSockets
+
+@app.post("/transcribe/pcm")
+async def transcribe_pcm(request: Request, language: str = "tr", sample_rate: int = SAMPLE_RATE,
+                         deadline: float = QUEUE_DEADLINE, profile: str = DEFAULT_PROFILE):
+    """
+    Transcribe raw PCM sent as the request body (little-endian int16, mono, 16 kHz).
+    Decoded in memory - no temp files, no WAV parsing.
+    deadline: seconds the request may wait for the model; 503 + Retry-After if it cannot start in time.
+    profile: decode profile (realtime, balanced, accurate).
+    """
+    if stt_model is None:
+        raise HTTPException(status_code=503, detail="STT model not loaded")
+    if sample_rate != SAMPLE_RATE:
+        raise HTTPException(status_code=400, detail=f"Only {SAMPLE_RATE} Hz PCM is supported (got {sample_rate})")
+    check_profile(profile)
+
+    # Refuse before the body is read, so rejected uploads are never held in memory
+    stt_batcher.admit(deadline)
+    pcm = await request.body()
+    if len(pcm) % 2:
+        raise HTTPException(status_code=400, detail="PCM body must contain whole int16 samples")
+
+    try:
+        audio = pcm16_to_float32(pcm)
+        print(f"Transcribing PCM: {len(audio) / SAMPLE_RATE:.2f}s ({profile})")
+        result = await transcribe_utterance(audio, language, deadline, profile)
+        print(f"Transcription result: '{result['text']}' ({result['segments']} segments)")
+        return JSONResponse(result)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error transcribing: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+class StreamingTranscription:
+    """
+    Incremental decoding of one utterance.
+    Audio is re-decoded as it grows; once the uncommitted audio exceeds STREAM_WINDOW,
+    segments that end well before the live edge are committed (text kept, audio dropped),
+    so every decode - including the final one - covers a bounded window.
+    """
+
+    def __init__(self, language: str, profile: str = DEFAULT_PROFILE, utterance: int = 0):
+        self.language = language
+        self.profile = profile
+        self.utterance = utterance  # sequence number within the session, echoed in partial/final messages
+        self.audio = np.zeros(0, dtype=np.float32)  # uncommitted audio
+        self.committed = []  # committed segment texts
+        self.committed_info = []  # segment_info of the committed segments
+        self.live_info = []  # segment_info of the last decode's uncommitted segments
+        self.new_chunks = []  # audio received since the last decode
+        self.new_samples = 0
+        self.lock = threading.Lock()
+
+    def add(self, pcm: bytes):
+        with self.lock:
+            self.new_chunks.append(pcm16_to_float32(pcm))
+            self.new_samples += len(pcm) // 2
+
+    def wants_partial(self) -> bool:
+        return self.new_samples >= STREAM_PARTIAL_INTERVAL * SAMPLE_RATE
+
+    def window(self) -> np.ndarray:
+        """Uncommitted audio including everything received so far"""
+        with self.lock:
+            if self.new_chunks:
+                self.audio = np.concatenate([self.audio] + self.new_chunks)
+                self.new_chunks = []
+            self.new_samples = 0
+            return self.audio
+
+    def decode(self, final: bool = False, profile: str = None) -> str:
+        """Decode the current window (blocking). Returns committed + live hypothesis."""
+        audio = self.window()
+        if final:
+            # Trailing silence after the last committed segment is not decoded
+            audio, speech_seconds = trim_silence(audio)
+            if speech_seconds * 1000 < MIN_SPEECH_MS:
+                self.live_info = []
+                return " ".join(self.committed).strip()
+        if len(audio) == 0:
+            return " ".join(self.committed).strip()
+
+        prompt = " ".join(self.committed)[-200:] or None
+        settings = PROFILES[profile or self.profile]
+        # Committed text is passed as the prompt instead
+        options = dict(settings["options"], condition_on_previous_text=False)
+        segments, _ = stt_models[settings["model"]].transcribe(
+            audio,
+            language=self.language,
+            initial_prompt=prompt,
+            **options
+        )
+        segments = list(segments)
+
+        duration = len(audio) / SAMPLE_RATE
+        if not final and duration > STREAM_WINDOW:
+            cut = 0.0
+            live = []
+            for seg in segments:
+                if not live and seg.end <= duration - STREAM_COMMIT_MARGIN:
+                    self.committed.append(seg.text.strip())
+                    self.committed_info.append(segment_info(seg.text, seg.start, seg.end, seg.no_speech_prob, seg.avg_logprob))
+                    cut = seg.end
+                else:
+                    live.append(seg)
+            if cut > 0:
+                with self.lock:
+                    # Only appends happen concurrently, so the prefix is unchanged
+                    self.audio = self.audio[int(cut * SAMPLE_RATE):]
+                segments = live
+
+        self.live_info = [segment_info(seg.text, seg.start, seg.end, seg.no_speech_prob, seg.avg_logprob) for seg in segments]
+        return " ".join(self.committed + [seg.text.strip() for seg in segments]).strip()
+
+    def segment_scores(self) -> list:
+        """Scores of the segments behind the last decode (times are relative to each decoded window)"""
+        return self.committed_info + self.live_info
+
+@app.websocket("/transcribe/stream")
+async def transcribe_stream(websocket: WebSocket, language: str = "tr", sample_rate: int = SAMPLE_RATE,
+                            profile: str = DEFAULT_PROFILE):
+    """
+    Streaming transcription session (persistent, one utterance after another).
+    Client -> server: binary frames of int16 16 kHz PCM, text {"type": "end"} to finalize
+    the current utterance (optional "profile" for the final decode), {"type": "reset"} to discard it.
+    Server -> client: {"type": "partial", "text": ..., "utterance": n} while audio arrives,
+    {"type": "final", "text": ..., "segment_info": [...], "utterance": n} after "end", or
+    {"type": "error", "status": 503, "retry_after": s, "utterance": n} if the final could not be admitted.
+    n counts utterances from 0 and advances on every "end" / "reset".
+    Decodes go through stt_batcher: partials are skipped when the queue is busy, a new
+    session is closed with 1013 (try again later) when a request would be refused.
+    """
+    global stream_sessions
+    await websocket.accept()
+    if stt_model is None or sample_rate != SAMPLE_RATE:
+        await websocket.close(code=1011, reason="STT model not loaded" if stt_model is None else "Only 16000 Hz PCM is supported")
+        return
+    if profile not in profiles:
+        await websocket.close(code=1008, reason=f"Unknown STT profile '{profile}'")
+        return
+    try:
+        stt_batcher.admit(QUEUE_DEADLINE)
+    except HTTPException as e:
+        await websocket.close(code=1013, reason=f"{e.detail}; retry after {e.headers['Retry-After']}s")
+        return
+
+    session = StreamingTranscription(language, profile)
+    decode_task = None
+    stream_sessions += 1
+
+    async def _send_partial(current):
+        try:
+            text = await stt_batcher.run(current.decode, STREAM_PARTIAL_DEADLINE)
+        except HTTPException:
+            return  # busy - the next chunk asks again
+        if current is session:
+            await websocket.send_json({"type": "partial", "text": text, "utterance": current.utterance})
+
+    def _partial_done(task):
+        # Retrieve the exception here - the task may be replaced before anyone awaits it
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️  Partial decode failed: {task.exception()}")
+
+    async def _final(current, final_profile: str) -> dict:
+        """Final result of an utterance; without committed segments it is a regular /transcribe/pcm decode"""
+        if not current.committed:
+            result = await transcribe_utterance(current.window(), language, QUEUE_DEADLINE, final_profile or profile)
+            return {"text": result["text"].strip(), "segment_info": result["segment_info"], "skipped": result.get("skipped")}
+        text = await stt_batcher.run(lambda: current.decode(True, final_profile), QUEUE_DEADLINE)
+        return {"text": text, "segment_info": current.segment_scores()}
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("bytes") is not None:
+                session.add(message["bytes"])
+                if session.wants_partial() and (decode_task is None or decode_task.done()):
+                    decode_task = asyncio.create_task(_send_partial(session))
+                    decode_task.add_done_callback(_partial_done)
+                continue
+
+            if message.get("text") is None:
+                continue
+            command = json.loads(message["text"])
+            if decode_task is not None:
+                # Wait for the running partial without re-raising its error (logged by _partial_done)
+                await asyncio.wait([decode_task])
+                decode_task = None
+            final_profile = command.get("profile")
+            command = command.get("type")
+            if command == "end":
+                try:
+                    final = await _final(session, final_profile if final_profile in profiles else None)
+                    print(f"Streaming transcription result: '{final['text']}'")
+                    await websocket.send_json({"type": "final", **final, "utterance": session.utterance})
+                except HTTPException as e:
+                    await websocket.send_json({
+                        "type": "error",
+                        "status": e.status_code,
+                        "detail": e.detail,
+                        "retry_after": int((e.headers or {}).get("Retry-After", 1)),
+                        "utterance": session.utterance
+                    })
+                session = StreamingTranscription(language, profile, session.utterance + 1)
+            elif command == "reset":
+                session = StreamingTranscription(language, profile, session.utterance + 1)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"Error in streaming transcription: {e}")
+    finally:
+        stream_sessions -= 1
+        if decode_task is not None and not decode_task.done():
+            decode_task.cancel()
+
 @app.get("/health")
 async def health():
     """Health check"""
@@ -78,7 +722,11 @@ async def health():
         "status": "ok",
         "model_loaded": stt_model is not None,
         "model_size": MODEL_SIZE,
-        "device": DEVICE
+        "device": DEVICE,
+        "profiles": {name: {"model": settings["model"], **settings["options"]} for name, settings in profiles.items()},
+        "default_profile": DEFAULT_PROFILE,
+        "stream_sessions": stream_sessions,
+        "batcher": stt_batcher.stats()
     }
 
 if __name__ == "__main__":
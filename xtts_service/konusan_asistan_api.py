@@ -1,19 +1,30 @@
 
 import uvicorn
 from fastapi import FastAPI, Body, HTTPException, UploadFile, File, Request
-from fastapi.responses import FileResponse, JSONResponse, HTMLResponse
+from fastapi.responses import FileResponse, JSONResponse, HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 import torch
+import torch.nn.functional as F
 from TTS.api import TTS
 import os
+import sys
 import uuid
 import hashlib
 import pickle
 import numpy as np
 import json
 import shutil
+import sqlite3
+import unicodedata
+import queue
+import threading
+import time
+import itertools
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 try:
     import soundfile as sf
 except ImportError:
@@ -25,6 +36,7 @@ REFERENCE_VOICES_DIR = os.path.join(BASE_DIR, "reference_voices")
 VOICE_CONFIG_FILE = os.path.join(BASE_DIR, "voice_config.json")
 WEB_UI_DIR = os.path.join(BASE_DIR, "web_ui")
 PORT = 8020
+XTTS_MODEL_NAME = "tts_models/multilingual/multi-dataset/xtts_v2"
 WEB_UI_PORT = 8696  # Web UI için ayrı port
 
 # Ensure reference voices directory exists
@@ -57,26 +69,101 @@ else:
 # Global TTS model
 tts = None
 
-@app.on_event("startup")
-async def startup_event():
-    global tts
-    print("Loading XTTS Model... (This requires GPU or strong CPU)")
-    
-    # Check for MPS (Apple Silicon), then CUDA, then CPU
+def select_device():
+    """Check for MPS (Apple Silicon), then CUDA, then CPU"""
     if torch.backends.mps.is_available():
-        device = "mps"
         print("MPS: Available")
+        return "mps"
     elif torch.cuda.is_available():
-        device = "cuda"
         print("CUDA: Available")
-    else:
-        device = "cpu"
-        print("Using CPU")
-    
+        return "cuda"
+    print("Using CPU")
+    return "cpu"
+
+def load_tts_model(device):
     # Init TTS - önce model oluştur, sonra device'a taşı
-    tts = TTS(model_name="tts_models/multilingual/multi-dataset/xtts_v2")
-    tts.to(device)  # ⬅️ kritik satır
+    model = TTS(model_name=XTTS_MODEL_NAME)
+    model.to(device)  # ⬅️ kritik satır
+    return model
+
+# Readiness of this process' model: loading_model -> warming_up -> ready
+warmup_state = {"phase": "starting", "ready": False, "seconds": None}
+
+def warmup_model():
+    """Load latents for every configured voice and run one short inference per warmup language"""
+    start = time.monotonic()
+    snapshot = voice_registry.snapshot()
+    voice_paths = []
+    for voice in [snapshot["active_voice"]] + list(snapshot["config"].get("voices", {})):
+        path = resolve_voice_path(voice)
+        if path and path not in voice_paths:
+            voice_paths.append(path)
+
+    active_latents = None
+    for path in voice_paths:
+        try:
+            latents_dict = get_speaker_embedding(path)
+            if path == snapshot["active_path"]:
+                active_latents = latents_dict
+        except Exception as e:
+            print(f"⚠️  Warmup: latents for {path} failed: {e}")
+
+    if not isinstance(active_latents, dict) or get_xtts_model() is None:
+        print("⚠️  Warmup: no latents for the active voice, skipping priming inference")
+    else:
+        for language in WARMUP_LANGUAGES:
+            text = WARMUP_TEXTS.get(language, WARMUP_TEXTS["en"])
+            # One single and (if batching) one batched pass, so both code paths are primed
+            texts_list = [[text], [text, text]] if MAX_BATCH_SIZE > 1 else [[text]]
+            for texts in texts_list:
+                t = time.monotonic()
+                results = tts_batcher.infer(texts, language, active_latents)
+                errors = [r for r in results if isinstance(r, Exception)]
+                if errors:
+                    print(f"⚠️  Warmup inference ({language}, {len(texts)} texts) failed: {errors[0]}")
+                else:
+                    print(f"🔥 Warmup inference ({language}, {len(texts)} texts): {time.monotonic() - t:.2f}s")
+    print(f"🔥 Warmup done: {len(voice_paths)} voices, languages={WARMUP_LANGUAGES} in {time.monotonic() - start:.2f}s")
+    return time.monotonic() - start
+
+def run_warmup():
+    warmup_state["phase"] = "warming_up"
+    try:
+        warmup_state["seconds"] = round(warmup_model(), 2)
+    except Exception as e:
+        # Warmup is best effort - a failed warmup must not keep the service unready
+        print(f"⚠️  Warmup failed: {e}")
+        import traceback
+        traceback.print_exc()
+    warmup_state.update(phase="ready", ready=True)
+
+@app.on_event("startup")
+async def startup_event():
+    global tts
+    # Before replicas start, so only this process migrates legacy cache files
+    latent_cache.reindex()
+    if REPLICAS > 1:
+        # Models live in the replica processes only; this process just queues and dispatches
+        print(f"Starting {REPLICAS} XTTS replicas in worker processes...")
+        replica_pool.start()
+        tts_batcher.pool = replica_pool
+        return
+
+    print("Loading XTTS Model... (This requires GPU or strong CPU)")
+    warmup_state["phase"] = "loading_model"
+    tts = load_tts_model(select_device())
     print("XTTS Ready!")
+    if WARMUP:
+        # Serve /ready (503) while warming up instead of blocking server startup. Warmup runs on the
+        # batcher thread before its first job, so requests arriving meanwhile wait in the queue
+        tts_batcher.start(warmup=True)
+    else:
+        warmup_state.update(phase="ready", ready=True)
+
+@app.on_event("shutdown")
+def shutdown_event():
+    if tts_batcher.pool is not None:
+        tts_batcher.pool.stop()
 
 # Use project's ses directory (shared with Docker container via bind mount)
 # XTTS runs on host, so use absolute path to project directory
@@ -87,8 +174,42 @@ OUTPUT_DIR = os.path.join(PROJECT_DIR, "ses")
 CACHE_DIR = os.path.join(PROJECT_DIR, ".xtts_cache")
 os.makedirs(CACHE_DIR, exist_ok=True)
 
-# Global cache for speaker embeddings: {file_hash: embedding_tensor}
-speaker_embedding_cache = {}
+# Speaker latent cache: memory budget for the in-process LRU (disk entries are not limited)
+LATENT_CACHE_MB = float(os.getenv("XTTS_LATENT_CACHE_MB", "64"))
+
+# Synthesized segment cache: PCM per (normalized text chunk, language, voice hash, model version), LRU within a disk budget
+SEGMENT_CACHE = os.getenv("XTTS_SEGMENT_CACHE", "true").lower() == "true"
+SEGMENT_CACHE_MB = float(os.getenv("XTTS_SEGMENT_CACHE_MB", "512"))
+# Part of every segment key - bump it (or upgrade TTS) to stop serving audio from an older model
+SEGMENT_MODEL_VERSION = os.getenv("XTTS_SEGMENT_MODEL_VERSION") or f"{XTTS_MODEL_NAME}@{getattr(sys.modules.get('TTS'), '__version__', 'unknown')}"
+
+# Streaming synthesis (/tts/stream)
+XTTS_SAMPLE_RATE = 24000
+STREAM_CHUNK_SIZE = int(os.getenv("XTTS_STREAM_CHUNK_SIZE", "20"))  # GPT tokens per streamed audio chunk
+
+# Micro-batching of /tts requests: collect texts for a short window, run them as one batched GPT pass
+BATCH_WINDOW_MS = int(os.getenv("XTTS_BATCH_WINDOW_MS", "15"))
+MAX_BATCH_SIZE = int(os.getenv("XTTS_MAX_BATCH_SIZE", "8"))
+QUEUE_LIMIT = int(os.getenv("XTTS_QUEUE_LIMIT", "64"))  # queued + in-flight texts before /tts answers 503
+
+# Pipelined /tts: chunk 0 is returned right away, later chunks are fetched by sequence number
+PIPELINE_JOB_TTL = int(os.getenv("XTTS_PIPELINE_JOB_TTL", "300"))  # seconds a finished job's chunks stay fetchable
+
+# Startup warmup: latents for every configured voice + a short priming inference per language before /ready
+WARMUP = os.getenv("XTTS_WARMUP", "true").lower() == "true"
+WARMUP_LANGUAGES = [language.strip() for language in os.getenv("XTTS_WARMUP_LANGUAGES", "tr").split(",") if language.strip()]
+WARMUP_TEXTS = {
+    "tr": "Merhaba, size nasıl yardımcı olabilirim?",
+    "en": "Hello, how can I help you?"
+}
+
+# Model replicas: N worker processes, each with its own XTTS model pinned to its own cores
+REPLICAS = int(os.getenv("XTTS_REPLICAS", "1"))  # 1 = model in this process (no worker processes)
+CORES_PER_REPLICA = int(os.getenv("XTTS_CORES_PER_REPLICA", "0"))  # 0 = split available cores evenly
+JOB_TIMEOUT = float(os.getenv("XTTS_JOB_TIMEOUT", "300"))  # max seconds to wait for a synthesized text or the next streamed block
+
+# voice_config.json / voice directories are re-read only when their mtime changes
+VOICE_WATCH_INTERVAL = float(os.getenv("XTTS_VOICE_WATCH_INTERVAL", "1.0"))
 
 def load_voice_config():
     """Load voice configuration from JSON file"""
@@ -111,20 +232,20 @@ def load_voice_config():
     }
 
 def save_voice_config(config):
-    """Save voice configuration to JSON file"""
+    """Save voice configuration to JSON file (written to a temp file and renamed, so readers never see half a file)"""
     try:
-        with open(VOICE_CONFIG_FILE, "w", encoding="utf-8") as f:
+        tmp_file = f"{VOICE_CONFIG_FILE}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
             json.dump(config, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, VOICE_CONFIG_FILE)
+        voice_registry.refresh()
         return True
     except Exception as e:
         print(f"❌ Error saving voice config: {e}")
         return False
 
-def get_active_reference_voice():
-    """Get the path to the active reference voice file"""
-    config = load_voice_config()
-    active_voice = config.get("active_voice", "reference.wav")
-    
+def resolve_voice_path(active_voice: str):
+    """Path of a voice file: reference_voices/, then base directory, then the default reference.wav"""
     # Try reference_voices directory first
     voice_path = os.path.join(REFERENCE_VOICES_DIR, active_voice)
     if os.path.exists(voice_path):
@@ -139,8 +260,96 @@ def get_active_reference_voice():
     default_path = os.path.join(BASE_DIR, "reference.wav")
     if os.path.exists(default_path):
         return default_path
-    
-    raise FileNotFoundError(f"Active reference voice not found: {active_voice}")
+    return None
+
+def scan_voices(config: dict) -> list:
+    """List voice files in reference_voices/ and (for backward compatibility) the base directory"""
+    voices = []
+    seen = set()
+    for directory in (REFERENCE_VOICES_DIR, BASE_DIR):
+        if not os.path.exists(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if filename.lower().endswith(('.wav', '.mp3', '.flac')) and filename not in seen:
+                seen.add(filename)
+                voice_info = config.get("voices", {}).get(filename, {})
+                voices.append({
+                    "filename": filename,
+                    "name": voice_info.get("name", filename),
+                    "description": voice_info.get("description", ""),
+                    "path": os.path.join(directory, filename),
+                    "is_active": filename == config.get("active_voice")
+                })
+    return voices
+
+class VoiceRegistry:
+    """
+    voice_config.json and the voice directories, loaded once and served from memory.
+    A watcher thread compares mtimes every VOICE_WATCH_INTERVAL seconds and rebuilds the
+    snapshot when something changed; writes through this service refresh it right away.
+    Each rebuild swaps in a new snapshot dict, so readers never see a half-updated state.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._snapshot = None
+        self._signature = None
+        self._watcher = None
+        self._lock = threading.Lock()
+
+    def _current_signature(self):
+        signature = []
+        for path in (VOICE_CONFIG_FILE, REFERENCE_VOICES_DIR, BASE_DIR):
+            try:
+                signature.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def refresh(self):
+        with self._lock:
+            signature = self._current_signature()
+            config = load_voice_config()
+            active_voice = config.get("active_voice", "reference.wav")
+            self._snapshot = {
+                "config": config,
+                "active_voice": active_voice,
+                "active_path": resolve_voice_path(active_voice),
+                "voices": scan_voices(config)
+            }
+            self._signature = signature
+        print(f"🎙️  Voice registry loaded: active='{active_voice}', {len(self._snapshot['voices'])} voices")
+
+    def snapshot(self) -> dict:
+        if self._snapshot is None:
+            self.refresh()
+            self._start_watcher()
+        return self._snapshot
+
+    def _start_watcher(self):
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, name="voice-registry-watcher", daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                if self._current_signature() != self._signature:
+                    self.refresh()
+            except Exception as e:
+                print(f"⚠️  Voice registry refresh failed: {e}")
+
+voice_registry = VoiceRegistry(VOICE_WATCH_INTERVAL)
+
+def get_active_reference_voice():
+    """Get the path to the active reference voice file (from the in-memory voice registry)"""
+    snapshot = voice_registry.snapshot()
+    if snapshot["active_path"] is None:
+        raise FileNotFoundError(f"Active reference voice not found: {snapshot['active_voice']}")
+    return snapshot["active_path"]
 
 def split_text_for_xtts(text: str, max_chars: int = 200) -> list:
     """
@@ -191,97 +400,458 @@ def split_text_for_xtts(text: str, max_chars: int = 200) -> list:
     
     return final_chunks if final_chunks else [text[:max_chars]]
 
-def get_file_hash(file_path: str) -> str:
-    """Calculate MD5 hash of file for cache key"""
+def hash_file_content(file_path: str) -> str:
+    """Calculate MD5 hash of the file content"""
     hash_md5 = hashlib.md5()
     with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
+        for chunk in iter(lambda: f.read(1 << 20), b""):
             hash_md5.update(chunk)
     return hash_md5.hexdigest()
 
-def save_embedding_metadata(file_path: str, file_hash: str, cache_file: str):
-    """Save metadata about cached embedding (which file maps to which cache)"""
-    metadata_file = os.path.join(CACHE_DIR, "embedding_metadata.json")
-    metadata = {}
-    
-    if os.path.exists(metadata_file):
+# (path, inode, size, mtime_ns) -> content MD5, so the hot path is a single os.stat
+file_hash_index = {}
+file_hash_signatures = {}  # path -> its current signature in file_hash_index
+
+def get_file_hash(file_path: str) -> str:
+    """MD5 of file for cache key - content is re-hashed only when the stat signature changes"""
+    st = os.stat(file_path)
+    path = os.path.abspath(file_path)
+    signature = (path, st.st_ino, st.st_size, st.st_mtime_ns)
+    file_hash = file_hash_index.get(signature)
+    if file_hash is None:
+        file_hash = hash_file_content(file_path)
+        # File replaced or rewritten - forget the old signature of this path
+        old_signature = file_hash_signatures.pop(path, None)
+        if old_signature is not None:
+            file_hash_index.pop(old_signature, None)
+        file_hash_index[signature] = file_hash
+        file_hash_signatures[path] = signature
+        print(f"🔑 Hashed {os.path.basename(path)}: {file_hash[:8]}...")
+    return file_hash
+
+class SpeakerLatentCache:
+    """
+    Speaker latents (gpt_cond_latent + speaker_embedding) keyed by reference file hash.
+    Memory: LRU bounded by a byte budget. Disk: one embedding_{hash}.pth per voice,
+    indexed in latent_index.sqlite (WAL), so replica processes can share it safely.
+    """
+
+    def __init__(self, cache_dir: str, budget_bytes: int):
+        self.cache_dir = cache_dir
+        self.budget_bytes = budget_bytes
+        self.index_file = os.path.join(cache_dir, "latent_index.sqlite")
+        self.bytes = 0
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._entries = OrderedDict()  # file_hash -> (latents, bytes), least recently used first
+        self._lock = threading.RLock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _db(self):
+        # One connection per process (replicas are spawned, so each opens its own)
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.index_file, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    file_hash TEXT PRIMARY KEY,
+                    cache_file TEXT NOT NULL,
+                    source_path TEXT,
+                    source_size INTEGER,
+                    source_mtime REAL,
+                    bytes INTEGER,
+                    created REAL,
+                    last_used REAL,
+                    loads INTEGER DEFAULT 0
+                )
+            """)
+            conn.commit()
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def cache_file(self, file_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"embedding_{file_hash}.pth")
+
+    @staticmethod
+    def latents_bytes(latents) -> int:
+        values = latents.values() if isinstance(latents, dict) else [latents]
+        return sum(v.element_size() * v.nelement() for v in values if torch.is_tensor(v))
+
+    def _remember(self, file_hash: str, latents):
+        size = self.latents_bytes(latents)
+        old = self._entries.pop(file_hash, None)
+        if old is not None:
+            self.bytes -= old[1]
+        self._entries[file_hash] = (latents, size)
+        self.bytes += size
+        # The most recent entry always stays, even if it alone is over budget
+        while self.bytes > self.budget_bytes and len(self._entries) > 1:
+            evicted_hash, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.stats["evictions"] += 1
+            print(f"♻️  Evicted latents {evicted_hash[:8]}... from memory ({evicted_size} bytes)")
+
+    def get(self, file_hash: str):
+        """Latents from memory or disk, None on a miss"""
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            if entry is not None:
+                self._entries.move_to_end(file_hash)
+                self.stats["hits"] += 1
+                return entry[0]
+
+        latents = self._load_from_disk(file_hash)
+        with self._lock:
+            if latents is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._remember(file_hash, latents)
+            try:
+                self._db().execute(
+                    "UPDATE entries SET last_used = ?, loads = loads + 1 WHERE file_hash = ?",
+                    (time.time(), file_hash)
+                )
+                self._db().commit()
+            except sqlite3.Error as e:
+                print(f"⚠️  Latent index update failed: {e}")
+        print(f"✅ Loaded cached latents {file_hash[:8]}... from disk")
+        return latents
+
+    def put(self, file_hash: str, latents, source_path: str = None):
+        """Keep latents in memory and write them to disk + index"""
+        with self._lock:
+            self._remember(file_hash, latents)
+            self.stats["stores"] += 1
         try:
-            with open(metadata_file, "r", encoding="utf-8") as f:
-                metadata = json.load(f)
-        except:
-            metadata = {}
-    
-    # Store mapping: file_path -> {hash, cache_file, timestamp}
-    metadata[file_path] = {
-        "hash": file_hash,
-        "cache_file": os.path.basename(cache_file),
-        "timestamp": os.path.getmtime(file_path) if os.path.exists(file_path) else 0,
-        "file_size": os.path.getsize(file_path) if os.path.exists(file_path) else 0
-    }
-    
-    try:
-        with open(metadata_file, "w", encoding="utf-8") as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"⚠️  Error saving embedding metadata: {e}")
+            self._write(file_hash, latents, source_path)
+        except Exception as e:
+            print(f"⚠️  Error saving latents to disk: {e} (will continue without disk cache)")
+
+    def _write(self, file_hash: str, latents, source_path: str = None):
+        path = self.cache_file(file_hash)
+        # Write + rename, so a concurrent reader never sees a half-written file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        torch.save(latents, tmp_path)
+        os.replace(tmp_path, path)
+        source_size = source_mtime = None
+        if source_path and os.path.exists(source_path):
+            source_size, source_mtime = os.path.getsize(source_path), os.path.getmtime(source_path)
+        now = time.time()
+        with self._lock:
+            self._db().execute("""
+                INSERT INTO entries (file_hash, cache_file, source_path, source_size, source_mtime, bytes, created, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(file_hash) DO UPDATE SET
+                    cache_file = excluded.cache_file,
+                    source_path = COALESCE(excluded.source_path, entries.source_path),
+                    source_size = COALESCE(excluded.source_size, entries.source_size),
+                    source_mtime = COALESCE(excluded.source_mtime, entries.source_mtime),
+                    bytes = excluded.bytes,
+                    last_used = excluded.last_used
+            """, (file_hash, os.path.basename(path), source_path, source_size, source_mtime,
+                  self.latents_bytes(latents), now, now))
+            self._db().commit()
 
-def get_embedding_metadata():
-    """Load embedding metadata to see which files have cached embeddings"""
-    metadata_file = os.path.join(CACHE_DIR, "embedding_metadata.json")
-    if os.path.exists(metadata_file):
+    def _load_from_disk(self, file_hash: str):
+        path = self.cache_file(file_hash)
+        if os.path.exists(path):
+            try:
+                return torch.load(path, map_location="cpu")
+            except Exception as e:
+                print(f"⚠️  Error loading {os.path.basename(path)}: {e}, will recompute")
+                return None
+        legacy_path = os.path.join(self.cache_dir, f"embedding_{file_hash}.pkl")
+        if os.path.exists(legacy_path):
+            return self._migrate_legacy(file_hash, legacy_path)
+        return None
+
+    def _migrate_legacy(self, file_hash: str, legacy_path: str, source_path: str = None):
+        """Convert a legacy pickle entry to .pth + index row and remove the pickle"""
         try:
-            with open(metadata_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
+            with open(legacy_path, "rb") as f:
+                latents = pickle.load(f)
+            if isinstance(latents, np.ndarray):
+                latents = torch.from_numpy(latents)
+            self._write(file_hash, latents, source_path)
+            os.remove(legacy_path)
+        except Exception as e:
+            print(f"⚠️  Could not migrate {os.path.basename(legacy_path)}: {e}")
+            return None
+        print(f"✅ Migrated {os.path.basename(legacy_path)} to .pth")
+        return latents
+
+    def reindex(self):
+        """Index .pth files missing from the index and migrate legacy .pkl entries"""
+        # Source paths known from the old embedding_metadata.json, if it is still around
+        legacy_sources = {}
+        legacy_metadata = os.path.join(self.cache_dir, "embedding_metadata.json")
+        if os.path.exists(legacy_metadata):
+            try:
+                with open(legacy_metadata, "r", encoding="utf-8") as f:
+                    legacy_sources = {info.get("hash"): path for path, info in json.load(f).items()}
+            except Exception as e:
+                print(f"⚠️  Could not read {legacy_metadata}: {e}")
+
+        with self._lock:
+            indexed = {row[0] for row in self._db().execute("SELECT file_hash FROM entries")}
+        added = migrated = 0
+        for filename in sorted(os.listdir(self.cache_dir)):
+            if not filename.startswith("embedding_"):
+                continue
+            file_hash, ext = os.path.splitext(filename[len("embedding_"):])
+            path = os.path.join(self.cache_dir, filename)
+            if ext == ".pkl" and not os.path.exists(self.cache_file(file_hash)):
+                if self._migrate_legacy(file_hash, path, legacy_sources.get(file_hash)) is not None:
+                    migrated += 1
+            elif ext == ".pth" and file_hash not in indexed:
+                with self._lock:
+                    self._db().execute(
+                        "INSERT OR IGNORE INTO entries (file_hash, cache_file, source_path, bytes, created, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                        (file_hash, filename, legacy_sources.get(file_hash), None, os.path.getmtime(path), None)
+                    )
+                    self._db().commit()
+                added += 1
+        if added or migrated:
+            print(f"🗂️  Latent index: {added} existing .pth files indexed, {migrated} .pkl files migrated")
+
+    def contains(self, file_hash: str) -> bool:
+        with self._lock:
+            if file_hash in self._entries:
+                return True
+        return os.path.exists(self.cache_file(file_hash))
+
+    def resolve(self, prefix: str) -> list:
+        """Full hashes (memory or index) starting with prefix"""
+        with self._lock:
+            hashes = {h for h in self._entries if h.startswith(prefix)}
+            hashes.update(row[0] for row in self._db().execute(
+                "SELECT file_hash FROM entries WHERE file_hash LIKE ?", (prefix.replace("%", "") + "%",)
+            ))
+        return sorted(hashes)
+
+    def evict(self, file_hashes: list = None, from_disk: bool = False) -> list:
+        """Drop entries from memory (and disk + index); None = every entry"""
+        with self._lock:
+            if file_hashes is None:
+                file_hashes = set(self._entries)
+                if from_disk:
+                    file_hashes.update(row[0] for row in self._db().execute("SELECT file_hash FROM entries"))
+                file_hashes = sorted(file_hashes)
+            for file_hash in file_hashes:
+                entry = self._entries.pop(file_hash, None)
+                if entry is not None:
+                    self.bytes -= entry[1]
+                if from_disk:
+                    for path in (self.cache_file(file_hash), os.path.join(self.cache_dir, f"embedding_{file_hash}.pkl")):
+                        if os.path.exists(path):
+                            os.remove(path)
+                    self._db().execute("DELETE FROM entries WHERE file_hash = ?", (file_hash,))
+            if from_disk:
+                self._db().commit()
+        return list(file_hashes)
+
+    def entries(self, file_hash: str = None) -> list:
+        """Index rows (plus memory-only entries) with their memory state"""
+        with self._lock:
+            query = "SELECT file_hash, cache_file, source_path, source_size, source_mtime, bytes, created, last_used, loads FROM entries"
+            rows = self._db().execute(query + (" WHERE file_hash = ?" if file_hash else ""), (file_hash,) if file_hash else ())
+            columns = ["file_hash", "cache_file", "source_path", "source_size", "source_mtime", "bytes", "created", "last_used", "disk_loads"]
+            entries = {row[0]: dict(zip(columns, row)) for row in rows}
+            for h, (_, size) in self._entries.items():
+                if file_hash and h != file_hash:
+                    continue
+                entries.setdefault(h, {"file_hash": h, "cache_file": None, "bytes": size})
+            memory_order = list(self._entries)
+        for h, entry in entries.items():
+            path = self.cache_file(h)
+            entry["on_disk"] = os.path.exists(path)
+            entry["disk_size"] = os.path.getsize(path) if entry["on_disk"] else 0
+            entry["in_memory"] = h in memory_order
+            # 0 = next to be evicted
+            entry["lru_position"] = memory_order.index(h) if entry["in_memory"] else None
+        return sorted(entries.values(), key=lambda e: e.get("last_used") or 0, reverse=True)
+
+    def info(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            return {
+                "memory_entries": len(self._entries),
+                "memory_bytes": self.bytes,
+                "memory_budget_bytes": self.budget_bytes,
+                "hit_rate": round((self.stats["hits"] + self.stats["disk_hits"]) / lookups, 3) if lookups else None,
+                **self.stats
+            }
+
+latent_cache = SpeakerLatentCache(CACHE_DIR, int(LATENT_CACHE_MB * 1024 * 1024))
+
+class SegmentCache:
+    """
+    Synthesized audio per text chunk (as split by split_text_for_xtts), stored as int16 PCM
+    under .xtts_cache/segments/ and keyed by (normalized text, language, voice content hash,
+    model version). The SQLite index tracks size and last use; the least recently used
+    segments are deleted once the disk budget is exceeded. File writes and index updates run
+    on a writer thread, off the model thread.
+    """
+
+    def __init__(self, cache_dir: str, budget_bytes: int, model_version: str, enabled: bool = True):
+        self.enabled = enabled
+        self.segments_dir = os.path.join(cache_dir, "segments")
+        self.index_file = os.path.join(self.segments_dir, "index.sqlite")
+        self.budget_bytes = budget_bytes
+        self.model_version = model_version
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="segment-writer")
+        if enabled:
+            os.makedirs(self.segments_dir, exist_ok=True)
+
+    def _db(self):
+        # One connection per process (replicas are spawned, so each opens its own)
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.index_file, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS segments (
+                    key TEXT PRIMARY KEY,
+                    text TEXT,
+                    language TEXT,
+                    voice_hash TEXT,
+                    bytes INTEGER,
+                    created REAL,
+                    last_used REAL,
+                    hits INTEGER DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS segments_last_used ON segments (last_used)")
+            conn.commit()
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return unicodedata.normalize("NFC", " ".join(text.split()))
+
+    def key(self, text: str, language: str, ref_wav: str):
+        """Cache key of a text chunk spoken with ref_wav, None when the cache is off"""
+        if not self.enabled:
+            return None
+        parts = [self.model_version, language, get_file_hash(ref_wav), self.normalize(text)]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.segments_dir, key[:2], f"{key}.pcm")
+
+    def get(self, key: str):
+        """Cached PCM bytes, None on a miss"""
+        if key is None:
+            return None
+        try:
+            with open(self.path(key), "rb") as f:
+                pcm = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        with self._lock:
+            self.stats["hits"] += 1
+        self._writer.submit(self._touch, key, time.time())
+        return pcm
+
+    def _touch(self, key: str, now: float):
+        with self._lock:
+            try:
+                self._db().execute("UPDATE segments SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+                self._db().commit()
+            except sqlite3.Error as e:
+                print(f"⚠️  Segment index update failed: {e}")
+
+    def put_later(self, key: str, text: str, language: str, ref_wav: str, audio):
+        """Queue a put on the writer thread; audio is int16 PCM bytes or a float waveform"""
+        if key is None:
+            return
+        self._writer.submit(
+            lambda: self.put(key, text, language, ref_wav, audio if isinstance(audio, bytes) else wav_to_pcm16(audio))
+        )
+
+    def put(self, key: str, text: str, language: str, ref_wav: str, pcm: bytes):
+        if key is None or not pcm or len(pcm) > self.budget_bytes:
+            return
+        path = self.path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write + rename, so a concurrent reader never sees a half-written segment
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp_path, path)
+            now = time.time()
+            with self._lock:
+                self._db().execute(
+                    "INSERT OR REPLACE INTO segments (key, text, language, voice_hash, bytes, created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, self.normalize(text), language, get_file_hash(ref_wav), len(pcm), now, now)
+                )
+                self._db().commit()
+                self.stats["stores"] += 1
+                self._evict_over_budget()
+        except Exception as e:
+            print(f"⚠️  Error caching segment: {e}")
+
+    def _evict_over_budget(self):
+        db = self._db()
+        total = db.execute("SELECT COALESCE(SUM(bytes), 0) FROM segments").fetchone()[0]
+        while total > self.budget_bytes:
+            oldest = db.execute("SELECT key, bytes FROM segments ORDER BY last_used LIMIT 32").fetchall()
+            if not oldest:
+                break
+            for key, size in oldest:
+                try:
+                    os.remove(self.path(key))
+                except FileNotFoundError:
+                    pass
+                db.execute("DELETE FROM segments WHERE key = ?", (key,))
+                total -= size or 0
+                self.stats["evictions"] += 1
+                if total <= self.budget_bytes:
+                    break
+        db.commit()
+
+    def info(self) -> dict:
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            entries, total = self._db().execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM segments").fetchone()
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "enabled": True,
+                "model_version": self.model_version,
+                "entries": entries,
+                "disk_bytes": total,
+                "disk_budget_bytes": self.budget_bytes,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+                **self.stats
+            }
+
+segment_cache = SegmentCache(CACHE_DIR, int(SEGMENT_CACHE_MB * 1024 * 1024), SEGMENT_MODEL_VERSION, SEGMENT_CACHE)
 
 def get_speaker_embedding(ref_wav: str) -> torch.Tensor:
     """
     Get speaker embedding for reference audio, using cache if available.
     Returns cached embedding or computes and caches it.
     
-    Cache Structure:
-    - Memory: speaker_embedding_cache[file_hash] = embedding_tensor
-    - Disk: .xtts_cache/embedding_{file_hash}.pkl (pickle file)
-    - Metadata: .xtts_cache/embedding_metadata.json (maps file_path -> cache info)
+    Cache Structure (see SpeakerLatentCache):
+    - Memory: LRU of {file_hash: latents}, bounded by XTTS_LATENT_CACHE_MB
+    - Disk: .xtts_cache/embedding_{file_hash}.pth (torch.save)
+    - Index: .xtts_cache/latent_index.sqlite (hash -> source file, size, last use)
     """
-    global speaker_embedding_cache
-    
-    # Calculate file hash for cache key
+    # File hash for cache key (one os.stat; content is hashed only when the file changed)
     file_hash = get_file_hash(ref_wav)
-    cache_file = os.path.join(CACHE_DIR, f"embedding_{file_hash}.pth")  # Use .pth for PyTorch format
-    
-    # Check in-memory cache first
-    if file_hash in speaker_embedding_cache:
-        print(f"✅ Using in-memory cached embedding for {ref_wav}")
-        return speaker_embedding_cache[file_hash]
     
-    # Check disk cache - try .pth first (PyTorch format), then .pkl (legacy)
-    cache_file_pth = cache_file.replace('.pkl', '.pth')
-    
-    if os.path.exists(cache_file_pth):
-        try:
-            embedding = torch.load(cache_file_pth, map_location='cpu')
-            speaker_embedding_cache[file_hash] = embedding
-            print(f"✅ Loaded cached embedding from disk for {ref_wav} (.pth format)")
-            return embedding
-        except Exception as e:
-            print(f"⚠️  Error loading .pth cache: {e}, trying .pkl...")
-    
-    # Legacy .pkl support
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file, "rb") as f:
-                embedding = pickle.load(f)
-            # Convert back to tensor if needed
-            if isinstance(embedding, np.ndarray):
-                embedding = torch.from_numpy(embedding)
-            speaker_embedding_cache[file_hash] = embedding
-            print(f"✅ Loaded cached embedding from disk for {ref_wav} (.pkl format)")
-            return embedding
-        except Exception as e:
-            print(f"⚠️  Error loading cache: {e}, will recompute")
+    embedding = latent_cache.get(file_hash)
+    if embedding is not None:
+        return embedding
     
     # Compute embedding using XTTS model's low-level API
     print(f"🔄 Computing speaker embedding for {ref_wav} (this may take a moment)...")
@@ -338,22 +908,8 @@ def get_speaker_embedding(ref_wav: str) -> torch.Tensor:
                     "speaker_embedding": speaker_embedding
                 }
                 
-                # Cache in memory
-                speaker_embedding_cache[file_hash] = embedding
-                
-                # Cache to disk - use torch.save for tensors
-                try:
-                    # Save as .pth file (PyTorch format)
-                    torch.save(embedding, cache_file)
-                    print(f"✅ Cached embedding to disk: {cache_file}")
-                    
-                    # Also save metadata
-                    save_embedding_metadata(ref_wav, file_hash, cache_file)
-                    print(f"✅ Saved embedding metadata (file: {os.path.basename(ref_wav)}, hash: {file_hash[:8]}...)")
-                except Exception as e:
-                    print(f"⚠️  Error saving cache: {e} (will continue without disk cache)")
-                    import traceback
-                    traceback.print_exc()
+                # Cache in memory + disk + index
+                latent_cache.put(file_hash, embedding, ref_wav)
                 
                 print(f"✅ Computed and cached embedding for {ref_wav}")
                 return embedding
@@ -371,13 +927,946 @@ def get_speaker_embedding(ref_wav: str) -> torch.Tensor:
         print(f"❌ Error computing embedding: {e}")
         raise
 
+def get_xtts_model():
+    """Return the low-level XTTS model behind the TTS wrapper (None if not reachable)"""
+    if hasattr(tts, 'model'):
+        return tts.model
+    if hasattr(tts, 'synthesizer') and hasattr(tts.synthesizer, 'tts_model'):
+        return tts.synthesizer.tts_model
+    if hasattr(tts, 'synthesizer') and hasattr(tts.synthesizer, 'model'):
+        return tts.synthesizer.model
+    return None
+
+def wav_to_pcm16(wav) -> bytes:
+    """Convert float waveform (tensor or array, -1..1) to little-endian int16 PCM bytes"""
+    if torch.is_tensor(wav):
+        wav = wav.squeeze().detach().cpu().numpy()
+    wav = np.clip(np.asarray(wav, dtype=np.float32), -1.0, 1.0)
+    return (wav * 32767).astype("<i2").tobytes()
+
+def pcm16_to_wav(pcm: bytes):
+    """int16 PCM bytes back to a float32 waveform (-1..1)"""
+    return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32767
+
+def save_wav(output_path: str, wavs: list, sample_rate: int):
+    """Concatenate float waveforms and write them as a WAV file"""
+    wav = np.concatenate(wavs) if len(wavs) > 1 else np.asarray(wavs[0])
+    if sf is not None:
+        sf.write(output_path, wav, sample_rate)
+    else:
+        import scipy.io.wavfile as wavfile
+        wavfile.write(output_path, sample_rate, (wav * 32767).astype(np.int16))
+    print(f"✅ Saved {len(wav)/sample_rate:.2f}s to {output_path}")
+
+def tts_to_file_chunked(text_chunks: list, language: str, ref_wav: str, output_path: str):
+    """
+    High-level tts_to_file per text chunk, concatenated into output_path (used without cached latents).
+    Uses the model: call it only from the thread that owns the model (TTSBatcher.run).
+    """
+    if len(text_chunks) == 1:
+        tts.tts_to_file(text=text_chunks[0], speaker_wav=ref_wav, language=language, file_path=output_path)
+        return
+    all_wavs = []
+    sample_rate = 24000
+    for i, chunk in enumerate(text_chunks):
+        print(f"  Generating chunk {i+1}/{len(text_chunks)}: '{chunk[:50]}...'")
+        chunk_path = output_path.replace('.wav', f'_chunk_{i}.wav')
+        tts.tts_to_file(text=chunk, speaker_wav=ref_wav, language=language, file_path=chunk_path)
+        if sf is not None:
+            wav_data, sample_rate = sf.read(chunk_path)
+            all_wavs.append(wav_data)
+        else:
+            import scipy.io.wavfile as wavfile
+            sample_rate, wav_data = wavfile.read(chunk_path)
+            all_wavs.append(wav_data.astype(np.float32) / 32767.0)
+        os.remove(chunk_path)
+    save_wav(output_path, all_wavs, sample_rate)
+
+def streaming_wav_header(sample_rate: int, channels: int = 1) -> bytes:
+    """16-bit PCM WAV header for a body of unknown length (RIFF/data sizes set to the maximum)"""
+    byte_rate = sample_rate * channels * 2
+    return (
+        b"RIFF" + (0xFFFFFFFF).to_bytes(4, "little") + b"WAVE"
+        + b"fmt " + (16).to_bytes(4, "little") + (1).to_bytes(2, "little") + channels.to_bytes(2, "little")
+        + sample_rate.to_bytes(4, "little") + byte_rate.to_bytes(4, "little")
+        + (channels * 2).to_bytes(2, "little") + (16).to_bytes(2, "little")
+        + b"data" + (0xFFFFFFFF).to_bytes(4, "little")
+    )
+
+def generate_codes_batch(model, texts: list, language: str, gpt_cond_latent) -> list:
+    """
+    One batched GPT generate pass for several texts with the same voice.
+    Prefixes (cond latents + text) are left-padded and masked out; XTTS' GPT has no
+    built-in position embeddings, so every row generates as if it were alone.
+    Returns the audio codes per text (trailing stop token included, like model.inference).
+    """
+    gpt = model.gpt
+    text_tokens = []
+    prefixes = []
+    for text in texts:
+        tokens = torch.IntTensor(model.tokenizer.encode(text.strip().lower(), lang=language)).unsqueeze(0).to(model.device)
+        text_tokens.append(tokens)
+        tokens = F.pad(tokens, (0, 1), value=gpt.stop_text_token)
+        tokens = F.pad(tokens, (1, 0), value=gpt.start_text_token)
+        emb = gpt.text_embedding(tokens) + gpt.text_pos_embedding(tokens)
+        prefixes.append(torch.cat([gpt_cond_latent, emb], dim=1))
+
+    prefix_len = max(prefix.shape[1] for prefix in prefixes)
+    attention_mask = torch.zeros((len(texts), prefix_len + 1), dtype=torch.long, device=model.device)
+    padded = []
+    for i, prefix in enumerate(prefixes):
+        pad = prefix_len - prefix.shape[1]
+        padded.append(F.pad(prefix, (0, 0, pad, 0)))
+        attention_mask[i, pad:] = 1
+    gpt.gpt_inference.store_prefix_emb(torch.cat(padded, dim=0))
+
+    gpt_inputs = torch.full((len(texts), prefix_len + 1), fill_value=1, dtype=torch.long, device=model.device)
+    gpt_inputs[:, -1] = gpt.start_audio_token
+    # Same sampling settings as model.inference defaults
+    codes = gpt.gpt_inference.generate(
+        gpt_inputs,
+        attention_mask=attention_mask,
+        bos_token_id=gpt.start_audio_token,
+        pad_token_id=gpt.stop_audio_token,
+        eos_token_id=gpt.stop_audio_token,
+        max_length=gpt.max_gen_mel_tokens + gpt_inputs.shape[-1],
+        do_sample=True,
+        top_p=0.85,
+        top_k=50,
+        temperature=0.75,
+        num_return_sequences=1,
+        num_beams=1,
+        length_penalty=1.0,
+        repetition_penalty=10.0,
+        output_attentions=False,
+    )[:, gpt_inputs.shape[-1]:]
+
+    results = []
+    for tokens, row in zip(text_tokens, codes):
+        stops = (row == gpt.stop_audio_token).nonzero()
+        length = int(stops[0]) + 1 if len(stops) else row.shape[-1]
+        results.append((tokens, row[:length].unsqueeze(0)))
+    return results
+
+def synthesize_batch(model, texts: list, language: str, latents_dict: dict) -> list:
+    """Synthesize texts sharing one voice: batched GPT generate, then latents + vocoder per text"""
+    language = language.split("-")[0]
+    gpt_cond_latent = latents_dict["gpt_cond_latent"].to(model.device)
+    speaker_embedding = latents_dict["speaker_embedding"].to(model.device)
+    wavs = []
+    with torch.no_grad():
+        for text_tokens, gpt_codes in generate_codes_batch(model, texts, language, gpt_cond_latent):
+            # Latent pass has no padding mask - run it per text (a single forward, cheap next to generation)
+            gpt_latents = model.gpt(
+                text_tokens,
+                torch.tensor([text_tokens.shape[-1]], device=model.device),
+                gpt_codes,
+                torch.tensor([gpt_codes.shape[-1] * model.gpt.code_stride_len], device=model.device),
+                cond_latents=gpt_cond_latent,
+                return_attentions=False,
+                return_latent=True,
+            )
+            wavs.append(model.hifigan_decoder(gpt_latents, g=speaker_embedding).cpu().squeeze().numpy())
+    return wavs
+
+class StreamJob:
+    """One /tts/stream request on the batcher thread: its PCM chunk queue and a cancel flag"""
+
+    def __init__(self, text_chunks: list, language: str, ref_wav: str, latents_dict: dict):
+        self.text_chunks = text_chunks
+        self.language = language
+        self.ref_wav = ref_wav
+        self.latents_dict = latents_dict
+        self.chunks = queue.Queue()
+        self.cancelled = threading.Event()  # set when the consumer goes away (client disconnect, barge-in)
+        self.pcm = None  # iter_pcm_stream generator, created and advanced on the batcher thread only
+        self.prefix = None  # this stream's GPT prefix, restored before each step
+
+class TTSBatcher:
+    """
+    Single worker thread that owns XTTS inference for /tts and /tts/stream.
+    Requests (already split by split_text_for_xtts) wait in one bounded queue and are
+    collected for BATCH_WINDOW_MS; texts with the same voice and language go through one
+    batched GPT pass, and each caller gets its own waveforms back through a Future.
+    Streams are jobs in the same queue whose PCM blocks come back through a chunk queue;
+    active streams advance one inference_stream chunk per loop, interleaved with the batches,
+    so no two requests touch the model (and its shared GPT prefix state) at once.
+    With a ReplicaPool attached, groups are handed to the replicas instead.
+    """
+
+    def __init__(self, window_ms: int = BATCH_WINDOW_MS, max_batch: int = MAX_BATCH_SIZE):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batching = True  # switched off if the installed XTTS does not support the batched path
+        self.pool = None  # ReplicaPool when the models run in worker processes
+        self.started = time.monotonic()
+        self.busy_seconds = 0.0
+        self.completed = 0
+        self._queue = queue.Queue()
+        self._streams = []  # active StreamJobs, worker thread only
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def pending(self) -> int:
+        """Texts waiting in the queue plus texts being synthesized on replicas"""
+        return self._queue.qsize() + (self.pool.in_flight_texts() if self.pool else 0)
+
+    def check_capacity(self, count: int):
+        pending = self.pending()
+        if pending + count > QUEUE_LIMIT:
+            raise HTTPException(
+                status_code=503,
+                detail=f"TTS queue full ({pending} texts pending, limit {QUEUE_LIMIT})"
+            )
+
+    def submit(self, texts: list, language: str, ref_wav: str, latents_dict: dict = None) -> list:
+        """Queue texts, returns one Future (float waveform) per text - cached segments resolve immediately"""
+        futures = [Future() for _ in texts]
+        misses = []
+        for text, future in zip(texts, futures):
+            key = segment_cache.key(text, language, ref_wav)
+            pcm = segment_cache.get(key)
+            if pcm is not None:
+                future.set_result(pcm16_to_wav(pcm))
+            else:
+                misses.append((text, future, key))
+        if not misses:
+            return futures
+
+        self.check_capacity(len(misses))
+        self.start()
+        for text, future, key in misses:
+            if key is not None:
+                future.add_done_callback(lambda f, text=text, key=key: self._cache_segment(f, key, text, language, ref_wav))
+            self._queue.put((text, language, ref_wav, latents_dict, future))
+        return futures
+
+    def start(self, warmup: bool = False):
+        """Start the worker thread; with warmup, run_warmup is its first job"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, args=(warmup,), name="xtts-batcher", daemon=True)
+                self._thread.start()
+
+    def stream(self, text_chunks: list, language: str, ref_wav: str, latents_dict: dict):
+        """Yield the PCM blocks the worker thread produces for the text chunks (check_capacity first)"""
+        self.start()
+        job = StreamJob(text_chunks, language, ref_wav, latents_dict)
+        self._queue.put((text_chunks, language, ref_wav, latents_dict, job))
+        try:
+            while True:
+                try:
+                    kind, payload = job.chunks.get(timeout=JOB_TIMEOUT)
+                except queue.Empty:
+                    print(f"❌ Stream stalled: no audio for {JOB_TIMEOUT:.0f}s")
+                    return
+                if kind == "chunk":
+                    yield payload
+                elif kind == "error":
+                    # Headers are already sent - the client sees a truncated stream
+                    print(f"❌ Error while streaming: {payload}")
+                    return
+                else:
+                    return
+        finally:
+            # Closed early (client gone) or finished: the worker drops the rest of the utterance
+            job.cancelled.set()
+
+    def synthesize(self, texts: list, language: str, ref_wav: str, latents_dict: dict = None) -> list:
+        """Block until all texts are synthesized, returns one float waveform per text"""
+        return [future.result(timeout=JOB_TIMEOUT) for future in self.submit(texts, language, ref_wav, latents_dict)]
+
+    def run(self, job, count: int = 1):
+        """Run job() on the worker thread (model use outside the batched path), behind QUEUE_LIMIT like texts"""
+        self.check_capacity(count)
+        self.start()
+        future = Future()
+        self._queue.put((job, None, None, None, future))
+        return future.result(timeout=JOB_TIMEOUT)
+
+    @staticmethod
+    def _cache_segment(future: Future, key: str, text: str, language: str, ref_wav: str):
+        if future.exception() is not None:
+            return
+        try:
+            segment_cache.put_later(key, text, language, ref_wav, future.result())
+        except Exception as e:
+            print(f"⚠️  Error caching segment: {e}")
+
+    def _run(self, warmup: bool = False):
+        if warmup:
+            run_warmup()
+        while True:
+            batch = []
+            if self._streams:
+                # Streams are waiting for their next chunk - take what is queued, don't wait for more
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+            else:
+                batch.append(self._queue.get())
+                deadline = time.monotonic() + self.window
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+
+            groups = {}
+            jobs = []
+            for item in batch:
+                # Stream jobs carry a StreamJob instead of a Future, run() jobs a callable instead of text
+                if isinstance(item[4], StreamJob):
+                    self._streams.append(item[4])
+                elif callable(item[0]):
+                    jobs.append(item)
+                else:
+                    groups.setdefault((item[2], item[1]), []).append(item)
+            for group in groups.values():
+                if self.pool is not None:
+                    self.pool.submit(group)
+                else:
+                    self._synthesize_group(group)
+            for item in jobs:
+                self._run_job(item)
+            for job in list(self._streams):
+                self._stream_step(job)
+
+    def _run_job(self, item: tuple):
+        job, future = item[0], item[4]
+        start = time.monotonic()
+        try:
+            future.set_result(job())
+        except Exception as e:
+            future.set_exception(e)
+        self.busy_seconds += time.monotonic() - start
+        self.completed += 1
+
+    def _stream_step(self, job: StreamJob):
+        """Produce the next PCM block of a stream; finished, failed and cancelled streams are dropped"""
+        model = get_xtts_model()
+        gpt_inference = getattr(getattr(model, "gpt", None), "gpt_inference", None)
+        start = time.monotonic()
+        done = True
+        try:
+            if job.cancelled.is_set():
+                print(f"🛑 Stream cancelled, dropping the rest of: '{job.text_chunks[0][:50]}...'")
+            else:
+                if job.pcm is None:
+                    job.pcm = iter_pcm_stream(model, job.text_chunks, job.language, job.ref_wav, job.latents_dict)
+                elif job.prefix is not None:
+                    # A batch or another stream ran since our last step and replaced the GPT prefix
+                    gpt_inference.store_prefix_emb(job.prefix)
+                try:
+                    job.chunks.put(("chunk", next(job.pcm)))
+                    done = False
+                except StopIteration:
+                    job.chunks.put(("end", None))
+                job.prefix = getattr(gpt_inference, "cached_prefix_emb", None)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            job.chunks.put(("error", str(e)))
+        self.busy_seconds += time.monotonic() - start
+        if done:
+            if job.pcm is not None:
+                job.pcm.close()
+            self._streams.remove(job)
+            self.completed += len(job.text_chunks)
+
+    def _synthesize_group(self, group: list):
+        start = time.monotonic()
+        _, language, _, latents_dict, _ = group[0]
+        results = self.infer([item[0] for item in group], language, latents_dict)
+        for item, result in zip(group, results):
+            if isinstance(result, Exception):
+                item[4].set_exception(result)
+            else:
+                item[4].set_result(result)
+        self.busy_seconds += time.monotonic() - start
+        self.completed += len(group)
+
+    def infer(self, texts: list, language: str, latents_dict: dict) -> list:
+        """Run texts on this process' model - one waveform (or the exception it raised) per text"""
+        model = get_xtts_model()
+        start = time.monotonic()
+        if len(texts) > 1 and self.batching:
+            try:
+                wavs = synthesize_batch(model, texts, language, latents_dict)
+                print(f"✅ Batched {len(texts)} texts in {time.monotonic() - start:.2f}s")
+                return wavs
+            except Exception as e:
+                print(f"⚠️  Batched synthesis failed ({e}), running texts one by one from now on")
+                import traceback
+                traceback.print_exc()
+                self.batching = False
+
+        results = []
+        for text in texts:
+            try:
+                out = model.inference(
+                    text=text,
+                    language=language,
+                    gpt_cond_latent=latents_dict["gpt_cond_latent"],
+                    speaker_embedding=latents_dict["speaker_embedding"]
+                )
+                results.append(out["wav"])
+            except Exception as e:
+                results.append(e)
+        return results
+
+def prewarm_voice(voice: str, path: str) -> dict:
+    """Load (or compute) the latents of one voice into this process' cache"""
+    file_hash = get_file_hash(path)
+    was_cached = latent_cache.contains(file_hash)
+    start = time.monotonic()
+    try:
+        latents_dict = get_speaker_embedding(path)
+    except Exception as e:
+        return {"voice": voice, "file_hash": file_hash, "status": "error", "detail": str(e)}
+    return {
+        "voice": voice,
+        "file_hash": file_hash,
+        "status": "error" if latents_dict is None else ("loaded" if was_cached else "computed"),
+        "seconds": round(time.monotonic() - start, 3)
+    }
+
+def cache_command(operation: str, arguments=None) -> dict:
+    """Latent cache admin operation on this process (the API process, or a replica via ReplicaPool.broadcast)"""
+    result = {}
+    if operation == "prewarm":
+        result["results"] = [prewarm_voice(voice, path) for voice, path in arguments]
+    elif operation == "evict":
+        file_hashes, from_disk = arguments
+        result["evicted"] = latent_cache.evict(file_hashes, from_disk=from_disk)
+    elif operation != "info":
+        raise ValueError(f"Unknown cache operation: {operation}")
+    result["memory"] = latent_cache.info()
+    return result
+
+def combine_memory_info(results: list) -> dict:
+    """Sum the per-replica latent cache counters, keeping each replica's own numbers under "replicas" """
+    infos = [result["memory"] for result in results if "memory" in result]
+    combined = {}
+    for info in infos:
+        for key, value in info.items():
+            if key != "hit_rate" and isinstance(value, (int, float)):
+                combined[key] = combined.get(key, 0) + value
+    lookups = sum(combined.get(key, 0) for key in ("hits", "disk_hits", "misses"))
+    combined["hit_rate"] = round((combined.get("hits", 0) + combined.get("disk_hits", 0)) / lookups, 3) if lookups else None
+    combined["replicas"] = [
+        {"replica": result["replica"], **({"error": result["error"]} if "error" in result else result["memory"])}
+        for result in results
+    ]
+    return combined
+
+def replica_core_sets(replicas: int, cores_per_replica: int = 0) -> list:
+    """Split the CPUs this process may use into one disjoint core set per replica"""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+    per_replica = cores_per_replica or max(1, len(cpus) // replicas)
+    # More replicas than cores: the extra replicas share all cores instead of getting none
+    return [cpus[i * per_replica:(i + 1) * per_replica] or cpus for i in range(replicas)]
+
+def replica_main(index: int, cores: list, requests, responses):
+    """Worker process: load one XTTS model on its own cores and serve jobs from the pool"""
+    global tts
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(len(cores) if cores else (os.cpu_count() or 1))
+    print(f"Loading XTTS Model in replica {index} (cores={cores})...")
+    tts = load_tts_model(select_device())
+    if WARMUP:
+        run_warmup()
+    responses.put((None, index, "ready", os.getpid()))
+
+    while True:
+        job = requests.get()
+        if job is None:
+            break
+        job_id, kind, texts, language, ref_wav = job
+        start = time.monotonic()
+        try:
+            if kind == "cache":
+                # Admin command on this replica's latent cache: texts = (operation, arguments)
+                responses.put((job_id, index, "result", (cache_command(*texts), time.monotonic() - start)))
+                continue
+            latents_dict = get_speaker_embedding(ref_wav)
+            if kind == "stream":
+                for pcm in iter_pcm_stream(get_xtts_model(), texts, language, ref_wav, latents_dict):
+                    responses.put((job_id, index, "chunk", pcm))
+                responses.put((job_id, index, "end", (None, time.monotonic() - start)))
+            else:
+                results = tts_batcher.infer(texts, language, latents_dict)
+                responses.put((job_id, index, "result", (results, time.monotonic() - start)))
+        except Exception as e:
+            print(f"❌ Replica {index} job {job_id} failed: {e}")
+            import traceback
+            traceback.print_exc()
+            responses.put((job_id, index, "error", (str(e), time.monotonic() - start)))
+
+class ReplicaPool:
+    """
+    XTTS model replicas in separate worker processes, each pinned to its own core set.
+    Every batch group or stream goes to the replica with the fewest texts in flight;
+    a collector thread routes results and streamed PCM back to the waiting requests.
+    The collector also watches the processes: a replica that died (e.g. OOM-killed)
+    fails its outstanding jobs, has its load reset and is respawned.
+    """
+
+    def __init__(self, replicas: int = REPLICAS, cores_per_replica: int = CORES_PER_REPLICA):
+        self.replicas = replicas
+        self.cores_per_replica = cores_per_replica
+        self.workers = []
+        self.started = None
+        self._jobs = {}  # job_id -> (worker, text count, futures list or chunk queue)
+        self._job_ids = itertools.count()
+        self._responses = None
+        self._ctx = None
+        self._stopping = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._ctx = multiprocessing.get_context("spawn")
+        self._responses = self._ctx.Queue()
+        self.started = time.monotonic()
+        for index, cores in enumerate(replica_core_sets(self.replicas, self.cores_per_replica)):
+            self.workers.append(self._spawn(index, cores))
+        threading.Thread(target=self._collect, name="xtts-replica-collector", daemon=True).start()
+
+    def _spawn(self, index: int, cores: list, restarts: int = 0) -> dict:
+        requests = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=replica_main,
+            args=(index, cores, requests, self._responses),
+            name=f"xtts-replica-{index}",
+            daemon=True
+        )
+        process.start()
+        print(f"🚀 Replica {index} started (pid={process.pid}, cores={cores})")
+        return {
+            "index": index,
+            "process": process,
+            "requests": requests,
+            "cores": cores,
+            "ready": False,
+            "restarts": restarts,
+            "in_flight": 0,
+            "in_flight_texts": 0,
+            "completed": 0,
+            "busy_seconds": 0.0
+        }
+
+    @staticmethod
+    def _fail(waiter, message: str):
+        """Resolve a job's waiter with an error (futures of a batch group or a stream's chunk queue)"""
+        if isinstance(waiter, queue.Queue):
+            waiter.put(("error", message))
+            return
+        for future in waiter if isinstance(waiter, list) else [waiter]:
+            if not future.done():
+                future.set_exception(RuntimeError(message))
+
+    def _check_workers(self):
+        """Fail the jobs of dead replicas and respawn them"""
+        if self._stopping:
+            return
+        for index, worker in enumerate(self.workers):
+            if worker["process"].is_alive():
+                continue
+            message = f"XTTS replica {index} died (exit code {worker['process'].exitcode})"
+            with self._lock:
+                lost = [(job_id, entry) for job_id, entry in self._jobs.items() if entry[0] is worker]
+                for job_id, _ in lost:
+                    del self._jobs[job_id]
+                # Replaced before it is failed, so no new job is dispatched to the dead process
+                self.workers[index] = self._spawn(index, worker["cores"], worker["restarts"] + 1)
+            print(f"❌ {message}, {len(lost)} jobs failed, respawned")
+            for _, (_, _, waiter) in lost:
+                self._fail(waiter, message)
+
+    def stop(self):
+        self._stopping = True
+        for worker in self.workers:
+            worker["requests"].put(None)
+        for worker in self.workers:
+            worker["process"].join(timeout=5)
+
+    def _dispatch(self, kind: str, texts: list, language: str, ref_wav: str, waiter):
+        with self._lock:
+            alive = [worker for worker in self.workers if worker["process"].is_alive()]
+            if not alive:
+                raise RuntimeError("No XTTS replica is running")
+            # Least loaded: ready replicas first, then fewest texts in flight, then least busy so far
+            worker = min(alive, key=lambda w: (not w["ready"], w["in_flight_texts"], w["busy_seconds"]))
+            job_id = self._register(worker, len(texts), waiter)
+        worker["requests"].put((job_id, kind, texts, language, ref_wav))
+
+    def _register(self, worker: dict, text_count: int, waiter) -> int:
+        job_id = next(self._job_ids)
+        worker["in_flight"] += 1
+        worker["in_flight_texts"] += text_count
+        self._jobs[job_id] = (worker, text_count, waiter)
+        return job_id
+
+    def broadcast(self, operation: str, arguments=None, timeout: float = JOB_TIMEOUT) -> list:
+        """Run a cache_command on every replica (queued behind its current jobs), one result per replica"""
+        pending = []
+        with self._lock:
+            for worker in self.workers:
+                future = Future()
+                job_id = self._register(worker, 0, future)
+                pending.append((worker["index"], future))
+                worker["requests"].put((job_id, "cache", (operation, arguments), None, None))
+        results = []
+        for index, future in pending:
+            try:
+                results.append({"replica": index, **future.result(timeout=timeout)})
+            except Exception as e:
+                results.append({"replica": index, "error": str(e) or type(e).__name__})
+        return results
+
+    def submit(self, group: list):
+        """Run one batch group (items from TTSBatcher) on a replica"""
+        _, language, ref_wav, _, _ = group[0]
+        futures = [item[4] for item in group]
+        try:
+            self._dispatch("batch", [item[0] for item in group], language, ref_wav, futures)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+
+    def stream(self, text_chunks: list, language: str, ref_wav: str):
+        """Yield the PCM blocks a replica produces for the text chunks"""
+        chunks = queue.Queue()
+        self._dispatch("stream", text_chunks, language, ref_wav, chunks)
+        while True:
+            try:
+                kind, payload = chunks.get(timeout=JOB_TIMEOUT)
+            except queue.Empty:
+                print(f"❌ Stream stalled: no audio from the replica for {JOB_TIMEOUT:.0f}s")
+                return
+            if kind == "chunk":
+                yield payload
+            elif kind == "error":
+                # Headers are already sent - the client sees a truncated stream
+                print(f"❌ Error while streaming: {payload}")
+                return
+            else:
+                return
+
+    def _collect(self):
+        last_check = time.monotonic()
+        while True:
+            if time.monotonic() - last_check >= 1.0:
+                self._check_workers()
+                last_check = time.monotonic()
+            try:
+                job_id, index, kind, payload = self._responses.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if kind == "ready":
+                # A message from a replica that has since been replaced does not count
+                if self.workers[index]["process"].pid == payload:
+                    self.workers[index]["ready"] = True
+                print(f"✅ Replica {index} ready (pid={payload})")
+                continue
+
+            with self._lock:
+                entry = self._jobs.get(job_id)
+            if entry is None:
+                continue
+            worker, text_count, waiter = entry
+            if kind == "chunk":
+                waiter.put(("chunk", payload))
+                continue
+
+            # Terminal message of the job: (results / error message, seconds the replica spent on it)
+            result, busy = payload
+            with self._lock:
+                del self._jobs[job_id]
+                worker["in_flight"] -= 1
+                worker["in_flight_texts"] -= text_count
+                worker["completed"] += text_count
+                worker["busy_seconds"] += busy
+            if isinstance(waiter, queue.Queue):
+                waiter.put((kind, result))
+                continue
+            if isinstance(waiter, Future):
+                # broadcast job
+                if kind == "error":
+                    waiter.set_exception(RuntimeError(result))
+                else:
+                    waiter.set_result(result)
+                continue
+            if kind == "error":
+                result = [RuntimeError(result)] * len(waiter)
+            for future, wav in zip(waiter, result):
+                if isinstance(wav, Exception):
+                    future.set_exception(wav)
+                else:
+                    future.set_result(wav)
+
+    def in_flight_texts(self) -> int:
+        with self._lock:
+            return sum(worker["in_flight_texts"] for worker in self.workers)
+
+    def stats(self) -> list:
+        uptime = max(time.monotonic() - self.started, 1e-6) if self.started else 0
+        with self._lock:
+            return [{
+                "index": worker["index"],
+                "pid": worker["process"].pid,
+                "alive": worker["process"].is_alive(),
+                "ready": worker["ready"],
+                "restarts": worker["restarts"],
+                "cores": worker["cores"],
+                "in_flight_jobs": worker["in_flight"],
+                "in_flight_texts": worker["in_flight_texts"],
+                "completed_texts": worker["completed"],
+                "busy_seconds": round(worker["busy_seconds"], 2),
+                "utilization": round(worker["busy_seconds"] / uptime, 3) if uptime else 0.0
+            } for worker in self.workers]
+
+tts_batcher = TTSBatcher()
+replica_pool = ReplicaPool()
+
+class PipelinedSynthesis:
+    """
+    Multi-chunk /tts request rendered in order. Chunk 0 is rendered before the request
+    returns; chunks 1..N-1 render on a background thread into their own WAV files and
+    can be fetched by sequence number as soon as each one is written.
+    """
+
+    def __init__(self, text_chunks: list, language: str, ref_wav: str, latents_dict: dict, output_path: str):
+        self.id = uuid.uuid4().hex
+        self.text_chunks = text_chunks
+        self.language = language
+        self.ref_wav = ref_wav
+        self.latents_dict = latents_dict
+        base, ext = os.path.splitext(output_path)
+        self.paths = [output_path] + [f"{base}_part{seq}{ext or '.wav'}" for seq in range(1, len(text_chunks))]
+        self.done = [False] * len(text_chunks)
+        self.errors = [None] * len(text_chunks)
+        self.created = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _render(self, seq: int):
+        start = time.monotonic()
+        try:
+            wavs = tts_batcher.synthesize([self.text_chunks[seq]], self.language, self.ref_wav, self.latents_dict)
+            save_wav(self.paths[seq], wavs, XTTS_SAMPLE_RATE)
+            print(f"  Pipelined chunk {seq+1}/{len(self.text_chunks)} ready in {time.monotonic() - start:.2f}s")
+        except Exception as e:
+            print(f"❌ Pipelined chunk {seq+1}/{len(self.text_chunks)} failed: {e}")
+            self.errors[seq] = e
+        with self._cond:
+            self.done[seq] = True
+            self._cond.notify_all()
+
+    def start(self):
+        """Render chunk 0 now, the rest in the background"""
+        self._render(0)
+        if self.errors[0] is not None:
+            raise self.errors[0]
+        if len(self.text_chunks) > 1:
+            threading.Thread(
+                target=lambda: [self._render(seq) for seq in range(1, len(self.text_chunks))],
+                name=f"xtts-pipeline-{self.id[:8]}",
+                daemon=True
+            ).start()
+
+    def wait(self, seq: int, timeout: float) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done[seq], timeout)
+
+# job_id -> PipelinedSynthesis, dropped PIPELINE_JOB_TTL seconds after creation
+pipeline_jobs = {}
+
+def start_pipelined_synthesis(text_chunks: list, language: str, ref_wav: str, latents_dict: dict, output_path: str) -> PipelinedSynthesis:
+    now = time.monotonic()
+    for job_id, job in list(pipeline_jobs.items()):
+        if now - job.created > PIPELINE_JOB_TTL:
+            pipeline_jobs.pop(job_id, None)
+    job = PipelinedSynthesis(text_chunks, language, ref_wav, latents_dict, output_path)
+    pipeline_jobs[job.id] = job
+    job.start()
+    return job
+
+def iter_pcm_stream(model, text_chunks: list, language: str, ref_wav: str, latents_dict: dict):
+    """
+    Yield int16 PCM blocks for the text chunks - inference_stream when available, else one block per chunk.
+    Uses the model directly: call it only from the thread that owns the model.
+    """
+    for i, chunk in enumerate(text_chunks):
+        if hasattr(model, 'inference_stream'):
+            key = segment_cache.key(chunk, language, ref_wav)
+            cached = segment_cache.get(key)
+            if cached is not None:
+                yield cached
+                print(f"  Streamed chunk {i+1}/{len(text_chunks)} (cached)")
+                continue
+            parts = []
+            for wav_chunk in model.inference_stream(
+                chunk,
+                language,
+                latents_dict["gpt_cond_latent"],
+                latents_dict["speaker_embedding"],
+                stream_chunk_size=STREAM_CHUNK_SIZE,
+                enable_text_splitting=False
+            ):
+                parts.append(wav_to_pcm16(wav_chunk))
+                yield parts[-1]
+            # Only complete chunks are cached - an aborted stream never gets here
+            segment_cache.put_later(key, chunk, language, ref_wav, b"".join(parts))
+        else:
+            # Runs on the thread that owns the model (batcher worker or replica) - infer directly
+            key = segment_cache.key(chunk, language, ref_wav)
+            pcm = segment_cache.get(key)
+            if pcm is None:
+                wav = tts_batcher.infer([chunk], language, latents_dict)[0]
+                if isinstance(wav, Exception):
+                    raise wav
+                pcm = wav_to_pcm16(wav)
+                segment_cache.put_later(key, chunk, language, ref_wav, pcm)
+            yield pcm
+        print(f"  Streamed chunk {i+1}/{len(text_chunks)}")
+    print("Streaming complete.")
+
+@app.post("/tts/stream")
+def generate_speech_stream(
+    text: str = Body(..., embed=True),
+    language: str = Body("tr", embed=True),
+    speaker_wav: str = Body(None, embed=True)
+):
+    """
+    Stream raw PCM (int16 little-endian, mono) while it is being synthesized.
+    Uses XTTS inference_stream when available, otherwise emits one block per text chunk.
+    Sample rate and channel count are sent in X-Sample-Rate / X-Channels headers.
+    """
+    ref_wav = speaker_wav or get_active_reference_voice()
+    if not os.path.exists(ref_wav):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Reference audio not found at: {ref_wav}"
+        )
+
+    text_chunks = split_text_for_xtts(text, max_chars=250)
+    print(f"Streaming TTS for: '{text}' using '{ref_wav}' ({len(text_chunks)} chunks)...")
+
+    if tts_batcher.pool is not None:
+        # Runs on the least-loaded replica; its PCM chunks are relayed as they arrive
+        tts_batcher.check_capacity(len(text_chunks))
+        return StreamingResponse(
+            tts_batcher.pool.stream(text_chunks, language, ref_wav),
+            media_type="application/octet-stream",
+            headers={
+                "X-Sample-Rate": str(XTTS_SAMPLE_RATE),
+                "X-Channels": "1",
+                "X-Sample-Format": "s16le"
+            }
+        )
+
+    latents_dict = get_speaker_embedding(ref_wav)
+    model = get_xtts_model()
+    if not isinstance(latents_dict, dict) or model is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Streaming requires cached speaker latents and the low-level XTTS model"
+        )
+
+    # Synthesized on the batcher thread, queued behind (and never alongside) other requests
+    tts_batcher.check_capacity(len(text_chunks))
+    return StreamingResponse(
+        tts_batcher.stream(text_chunks, language, ref_wav, latents_dict),
+        media_type="application/octet-stream",
+        headers={
+            "X-Sample-Rate": str(XTTS_SAMPLE_RATE),
+            "X-Channels": "1",
+            "X-Sample-Format": "s16le"
+        }
+    )
+
+@app.get("/tts/jobs/{job_id}/chunks/{seq}")
+def get_pipelined_chunk(job_id: str, seq: int, timeout: float = 120):
+    """Wait until chunk `seq` of a pipelined /tts request is written, then return its filename"""
+    job = pipeline_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired TTS job: {job_id}")
+    if not 0 <= seq < len(job.paths):
+        raise HTTPException(status_code=404, detail=f"Job {job_id} has {len(job.paths)} chunks, no chunk {seq}")
+    if not job.wait(seq, timeout):
+        raise HTTPException(status_code=504, detail=f"Chunk {seq} of job {job_id} not ready after {timeout}s")
+    if job.errors[seq] is not None:
+        raise HTTPException(status_code=500, detail=str(job.errors[seq]))
+    return JSONResponse({
+        "success": True,
+        "filename": os.path.basename(job.paths[seq]),
+        "path": job.paths[seq],
+        "seq": seq,
+        "chunks": len(job.paths)
+    })
+
+def synthesized_audio_response(text: str, language: str, ref_wav: str, response_format: str) -> StreamingResponse:
+    """
+    /tts audio in the response body (chunked): all text chunks are queued at once so they
+    batch like file-mode requests, and each chunk's PCM is sent as soon as it is ready.
+    """
+    text_chunks = split_text_for_xtts(text, max_chars=250)
+    # Replicas load the speaker latents themselves; in-process we need the cached latents
+    latents_dict = None
+    if tts_batcher.pool is None:
+        latents_dict = get_speaker_embedding(ref_wav)
+        if not isinstance(latents_dict, dict) or get_xtts_model() is None:
+            raise HTTPException(
+                status_code=500,
+                detail="Audio responses require cached speaker latents and the low-level XTTS model"
+            )
+    print(f"Generating TTS ({response_format} response) for: '{text}' using '{ref_wav}' ({len(text_chunks)} chunks)...")
+    # Queued before the response starts, so a full queue is still a 503 and not a truncated body
+    futures = tts_batcher.submit(text_chunks, language, ref_wav, latents_dict)
+
+    def _audio_body():
+        if response_format == "wav":
+            yield streaming_wav_header(XTTS_SAMPLE_RATE)
+        try:
+            for future in futures:
+                yield wav_to_pcm16(future.result(timeout=JOB_TIMEOUT))
+        except Exception as e:
+            # Headers are already sent - the client sees a truncated body
+            print(f"❌ Error while sending audio: {e}")
+            import traceback
+            traceback.print_exc()
+
+    return StreamingResponse(
+        _audio_body(),
+        media_type="audio/wav" if response_format == "wav" else "application/octet-stream",
+        headers={
+            "X-Sample-Rate": str(XTTS_SAMPLE_RATE),
+            "X-Channels": "1",
+            "X-Sample-Format": "s16le",
+            "X-Text-Chunks": str(len(text_chunks))
+        }
+    )
+
 @app.post("/tts")
 def generate_speech(
     text: str = Body(..., embed=True),
     language: str = Body("tr", embed=True),
     speaker_wav: str = Body(None, embed=True),
-    output_filename: str = Body(None, embed=True)  # Optional: specify output filename
+    output_filename: str = Body(None, embed=True),  # Optional: specify output filename
+    pipelined: bool = Body(False, embed=True),  # Optional: return after the first chunk, fetch the rest via /tts/jobs
+    response_format: str = Body("json", embed=True)  # "json" (file in ses/), "pcm" or "wav" (audio in the response body)
 ):
+    if response_format not in ("json", "pcm", "wav"):
+        raise HTTPException(status_code=400, detail=f"Unknown response_format: {response_format} (json, pcm or wav)")
     try:
         # Ensure shared output directory exists (mounted as volume)
         os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -401,174 +1890,61 @@ def generate_speech(
                 detail=f"Reference audio not found at: {ref_wav}"
             )
 
+        if response_format != "json":
+            return synthesized_audio_response(text, language, ref_wav, response_format)
+
+        if pipelined:
+            # Replicas load the speaker latents themselves; in-process we need the cached latents
+            latents_dict = None if tts_batcher.pool is not None else get_speaker_embedding(ref_wav)
+            if tts_batcher.pool is not None or (isinstance(latents_dict, dict) and get_xtts_model() is not None):
+                text_chunks = split_text_for_xtts(text, max_chars=250)
+                print(f"Generating pipelined TTS for: '{text}' using '{ref_wav}' ({len(text_chunks)} chunks)...")
+                job = start_pipelined_synthesis(text_chunks, language, ref_wav, latents_dict, output_path)
+                return JSONResponse({
+                    "success": True,
+                    "filename": os.path.basename(output_path),
+                    "path": output_path,
+                    "job_id": job.id,
+                    "chunks": len(text_chunks)
+                })
+            print("⚠️  Pipelined mode needs cached latents, falling back to full synthesis")
+
+        if tts_batcher.pool is not None:
+            # Models run in the replica processes; they load the speaker latents themselves
+            text_chunks = split_text_for_xtts(text, max_chars=250)
+            print(f"Generating TTS on replicas for: '{text}' using '{ref_wav}' ({len(text_chunks)} chunks)...")
+            save_wav(output_path, tts_batcher.synthesize(text_chunks, language, ref_wav), XTTS_SAMPLE_RATE)
+            return JSONResponse({
+                "success": True,
+                "filename": os.path.basename(output_path),
+                "path": output_path
+            })
+
         # Get or compute speaker embedding (cached)
         # Returns dict with "gpt_cond_latent" and "speaker_embedding" if successful
         latents_dict = get_speaker_embedding(ref_wav)
-        
+        model = get_xtts_model()
+        text_chunks = split_text_for_xtts(text, max_chars=250)
+        if len(text_chunks) > 1:
+            print(f"⚠️  Text too long ({len(text)} chars), splitting into {len(text_chunks)} chunks")
+
         print(f"Generating TTS for: '{text}' using '{ref_wav}'...")
         print(f"Saving to: {output_path}")
-        
-        # Use low-level model.inference() if we have cached latents
-        if latents_dict is not None and isinstance(latents_dict, dict):
-            if "gpt_cond_latent" in latents_dict and "speaker_embedding" in latents_dict:
-                print("✅ Using cached latents via tts.model.inference() - FAST PATH!")
-                try:
-                    # Use model.inference() directly with cached latents
-                    # Try different paths to access the model
-                    model = None
-                    if hasattr(tts, 'model'):
-                        model = tts.model
-                    elif hasattr(tts, 'synthesizer') and hasattr(tts.synthesizer, 'tts_model'):
-                        model = tts.synthesizer.tts_model
-                    elif hasattr(tts, 'synthesizer') and hasattr(tts.synthesizer, 'model'):
-                        model = tts.synthesizer.model
-                    
-                    if model is not None and hasattr(model, 'inference'):
-                        # Check text length - XTTS has ~400 token limit (~200-300 chars for Turkish)
-                        # Split text if too long
-                        text_chunks = split_text_for_xtts(text, max_chars=250)
-                        
-                        if len(text_chunks) > 1:
-                            print(f"⚠️  Text too long ({len(text)} chars), splitting into {len(text_chunks)} chunks")
-                            # Generate audio for each chunk and concatenate
-                            all_wavs = []
-                            sample_rate = 24000
-                            
-                            for i, chunk in enumerate(text_chunks):
-                                print(f"  Generating chunk {i+1}/{len(text_chunks)}: '{chunk[:50]}...'")
-                                try:
-                                    out = model.inference(
-                                        text=chunk,
-                                        language=language,
-                                        gpt_cond_latent=latents_dict["gpt_cond_latent"],
-                                        speaker_embedding=latents_dict["speaker_embedding"]
-                                    )
-                                    all_wavs.append(out["wav"])
-                                    sample_rate = out.get("sample_rate", 24000)
-                                except Exception as e:
-                                    print(f"❌ Error generating chunk {i+1}: {e}")
-                                    raise
-                            
-                            # Concatenate all audio chunks
-                            import numpy as np
-                            wav = np.concatenate(all_wavs)
-                            print(f"✅ Generated {len(text_chunks)} chunks, total length: {len(wav)/sample_rate:.2f}s")
-                        else:
-                            # Single chunk - normal path
-                            out = model.inference(
-                                text=text,
-                                language=language,
-                                gpt_cond_latent=latents_dict["gpt_cond_latent"],
-                                speaker_embedding=latents_dict["speaker_embedding"]
-                            )
-                            wav = out["wav"]
-                            sample_rate = out.get("sample_rate", 24000)
-                        
-                        # Save audio
-                        if sf is not None:
-                            sf.write(output_path, wav, sample_rate)
-                            print(f"✅ Generated using cached embedding (sample_rate: {sample_rate}, duration: {len(wav)/sample_rate:.2f}s)")
-                        else:
-                            # Fallback: use scipy
-                            import scipy.io.wavfile as wavfile
-                            wavfile.write(output_path, sample_rate, (wav * 32767).astype(np.int16))
-                            print(f"✅ Generated using cached embedding (scipy fallback)")
-                    else:
-                        raise AttributeError("tts.model.inference() not available")
-                except Exception as e:
-                    print(f"⚠️  model.inference() failed ({e}), falling back to tts_to_file")
-                    import traceback
-                    traceback.print_exc()
-                    # Fallback to standard method with text splitting
-                    text_chunks = split_text_for_xtts(text, max_chars=250)
-                    if len(text_chunks) > 1:
-                        print(f"⚠️  Text too long, splitting into {len(text_chunks)} chunks for tts_to_file")
-                        import numpy as np
-                        all_wavs = []
-                        sample_rate = 24000
-                        for i, chunk in enumerate(text_chunks):
-                            chunk_path = output_path.replace('.wav', f'_chunk_{i}.wav')
-                            tts.tts_to_file(text=chunk, speaker_wav=ref_wav, language=language, file_path=chunk_path)
-                            if sf is not None:
-                                wav_data, sr = sf.read(chunk_path)
-                                all_wavs.append(wav_data)
-                                sample_rate = sr
-                            else:
-                                import scipy.io.wavfile as wavfile
-                                sr, wav_data = wavfile.read(chunk_path)
-                                all_wavs.append(wav_data.astype(np.float32) / 32767.0)
-                                sample_rate = sr
-                            os.remove(chunk_path)
-                        wav = np.concatenate(all_wavs)
-                        if sf is not None:
-                            sf.write(output_path, wav, sample_rate)
-                        else:
-                            import scipy.io.wavfile as wavfile
-                            wavfile.write(output_path, sample_rate, (wav * 32767).astype(np.int16))
-                    else:
-                        tts.tts_to_file(text=text, speaker_wav=ref_wav, language=language, file_path=output_path)
-            else:
-                print("⚠️  Invalid latents format, using standard method")
-                text_chunks = split_text_for_xtts(text, max_chars=250)
-                if len(text_chunks) > 1:
-                    print(f"⚠️  Text too long, splitting into {len(text_chunks)} chunks")
-                    import numpy as np
-                    all_wavs = []
-                    sample_rate = 24000
-                    for i, chunk in enumerate(text_chunks):
-                        chunk_path = output_path.replace('.wav', f'_chunk_{i}.wav')
-                        tts.tts_to_file(text=chunk, speaker_wav=ref_wav, language=language, file_path=chunk_path)
-                        if sf is not None:
-                            wav_data, sr = sf.read(chunk_path)
-                            all_wavs.append(wav_data)
-                            sample_rate = sr
-                        else:
-                            import scipy.io.wavfile as wavfile
-                            sr, wav_data = wavfile.read(chunk_path)
-                            all_wavs.append(wav_data.astype(np.float32) / 32767.0)
-                            sample_rate = sr
-                        os.remove(chunk_path)
-                    wav = np.concatenate(all_wavs)
-                    if sf is not None:
-                        sf.write(output_path, wav, sample_rate)
-                    else:
-                        import scipy.io.wavfile as wavfile
-                        wavfile.write(output_path, sample_rate, (wav * 32767).astype(np.int16))
-                else:
-                    tts.tts_to_file(text=text, speaker_wav=ref_wav, language=language, file_path=output_path)
+
+        if (isinstance(latents_dict, dict) and "gpt_cond_latent" in latents_dict and "speaker_embedding" in latents_dict
+                and model is not None and hasattr(model, 'inference')):
+            print("✅ Using cached latents via tts.model.inference() - FAST PATH!")
+            # Chunks are queued together and batched with concurrent requests.
+            # A full queue (503), a timeout or a synthesis error goes to the client - no fallback
+            save_wav(output_path, tts_batcher.synthesize(text_chunks, language, ref_wav, latents_dict), XTTS_SAMPLE_RATE)
         else:
-            # Embedding None ise standard method kullan
-            print("⚠️  Using standard tts_to_file method (embedding cache not available)")
+            # No cached latents or no low-level model: tts_to_file, still on the batcher thread and behind QUEUE_LIMIT
+            print("⚠️  Using standard tts_to_file method (embedding cache or model.inference() not available)")
             print("⚠️  This will be slower as embedding will be recomputed each time")
-            text_chunks = split_text_for_xtts(text, max_chars=250)
-            if len(text_chunks) > 1:
-                print(f"⚠️  Text too long ({len(text)} chars), splitting into {len(text_chunks)} chunks")
-                import numpy as np
-                all_wavs = []
-                sample_rate = 24000
-                for i, chunk in enumerate(text_chunks):
-                    print(f"  Generating chunk {i+1}/{len(text_chunks)}: '{chunk[:50]}...'")
-                    chunk_path = output_path.replace('.wav', f'_chunk_{i}.wav')
-                    tts.tts_to_file(text=chunk, speaker_wav=ref_wav, language=language, file_path=chunk_path)
-                    if sf is not None:
-                        wav_data, sr = sf.read(chunk_path)
-                        all_wavs.append(wav_data)
-                        sample_rate = sr
-                    else:
-                        import scipy.io.wavfile as wavfile
-                        sr, wav_data = wavfile.read(chunk_path)
-                        all_wavs.append(wav_data.astype(np.float32) / 32767.0)
-                        sample_rate = sr
-                    os.remove(chunk_path)
-                wav = np.concatenate(all_wavs)
-                if sf is not None:
-                    sf.write(output_path, wav, sample_rate)
-                else:
-                    import scipy.io.wavfile as wavfile
-                    wavfile.write(output_path, sample_rate, (wav * 32767).astype(np.int16))
-                print(f"✅ Generated {len(text_chunks)} chunks, total duration: {len(wav)/sample_rate:.2f}s")
-            else:
-                tts.tts_to_file(text=text, speaker_wav=ref_wav, language=language, file_path=output_path)
+            tts_batcher.run(
+                lambda: tts_to_file_chunked(text_chunks, language, ref_wav, output_path),
+                len(text_chunks)
+            )
         
         print("Generation complete.")
         
@@ -580,6 +1956,10 @@ def generate_speech(
             "path": output_path
         })
         
+    except HTTPException:
+        raise
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail=f"TTS not finished after {JOB_TIMEOUT:.0f}s (XTTS_JOB_TIMEOUT)")
     except Exception as e:
         print(f"Error: {e}")
         import traceback
@@ -590,37 +1970,10 @@ def generate_speech(
 @app.get("/voices")
 def list_voices():
     """List all available reference voices"""
-    config = load_voice_config()
-    voices = []
-    
-    # Scan reference_voices directory
-    if os.path.exists(REFERENCE_VOICES_DIR):
-        for filename in os.listdir(REFERENCE_VOICES_DIR):
-            if filename.lower().endswith(('.wav', '.mp3', '.flac')):
-                voice_info = config.get("voices", {}).get(filename, {})
-                voices.append({
-                    "filename": filename,
-                    "name": voice_info.get("name", filename),
-                    "description": voice_info.get("description", ""),
-                    "path": os.path.join(REFERENCE_VOICES_DIR, filename),
-                    "is_active": filename == config.get("active_voice")
-                })
-    
-    # Also check base directory for backward compatibility
-    for filename in os.listdir(BASE_DIR):
-        if filename.lower().endswith(('.wav', '.mp3', '.flac')) and filename not in [v["filename"] for v in voices]:
-            voice_info = config.get("voices", {}).get(filename, {})
-            voices.append({
-                "filename": filename,
-                "name": voice_info.get("name", filename),
-                "description": voice_info.get("description", ""),
-                "path": os.path.join(BASE_DIR, filename),
-                "is_active": filename == config.get("active_voice")
-            })
-    
+    snapshot = voice_registry.snapshot()
     return JSONResponse({
-        "active_voice": config.get("active_voice"),
-        "voices": voices
+        "active_voice": snapshot["config"].get("active_voice"),
+        "voices": snapshot["voices"]
     })
 
 @app.post("/voices/set-active")
@@ -709,18 +2062,16 @@ async def upload_voice(
 @app.get("/voices/active")
 def get_active_voice():
     """Get the currently active reference voice"""
-    config = load_voice_config()
-    active_voice = config.get("active_voice", "reference.wav")
+    snapshot = voice_registry.snapshot()
+    config = snapshot["config"]
+    active_voice = snapshot["active_voice"]
     
     try:
         voice_path = get_active_reference_voice()
         voice_info = config.get("voices", {}).get(active_voice, {})
         
-        # Check if embedding is cached (.pth format, fallback to .pkl for legacy)
         file_hash = get_file_hash(voice_path)
-        cache_file_pth = os.path.join(CACHE_DIR, f"embedding_{file_hash}.pth")
-        cache_file_pkl = os.path.join(CACHE_DIR, f"embedding_{file_hash}.pkl")
-        is_cached = os.path.exists(cache_file_pth) or os.path.exists(cache_file_pkl)
+        is_cached = latent_cache.contains(file_hash)
         
         return JSONResponse({
             "active_voice": active_voice,
@@ -728,7 +2079,9 @@ def get_active_voice():
             "name": voice_info.get("name", active_voice),
             "description": voice_info.get("description", ""),
             "embedding_cached": is_cached,
-            "cache_hash": file_hash[:16] if is_cached else None
+            "cache_hash": file_hash[:16] if is_cached else None,
+            # Content hash - changes when a voice is re-uploaded under the same filename
+            "file_hash": file_hash
         })
     except FileNotFoundError as e:
         raise HTTPException(
@@ -736,29 +2089,148 @@ def get_active_voice():
             detail=str(e)
         )
 
+@app.get("/ready")
+def readiness():
+    """200 once the model(s) are loaded and warmed up, 503 before that"""
+    if tts_batcher.pool is not None:
+        workers = tts_batcher.pool.stats()
+        ready_count = sum(1 for worker in workers if worker["ready"])
+        ready = bool(workers) and ready_count == len(workers)
+        body = {"ready": ready, "phase": "ready" if ready else "warming_up", "replicas_ready": ready_count, "replicas": len(workers)}
+    else:
+        ready = warmup_state["ready"]
+        body = dict(warmup_state)
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@app.get("/workers")
+def get_workers():
+    """Queue depth and per-replica load of the TTS workers"""
+    if tts_batcher.pool is not None:
+        workers = tts_batcher.pool.stats()
+    else:
+        uptime = max(time.monotonic() - tts_batcher.started, 1e-6)
+        workers = [{
+            "index": 0,
+            "pid": os.getpid(),
+            "alive": True,
+            "ready": tts is not None,
+            "completed_texts": tts_batcher.completed,
+            "busy_seconds": round(tts_batcher.busy_seconds, 2),
+            "utilization": round(tts_batcher.busy_seconds / uptime, 3)
+        }]
+    return JSONResponse({
+        "replicas": len(workers),
+        "queued_texts": tts_batcher._queue.qsize(),
+        "pending_texts": tts_batcher.pending(),
+        "queue_limit": QUEUE_LIMIT,
+        "batching": tts_batcher.batching,
+        "workers": workers
+    })
+
 @app.get("/cache/info")
 def get_cache_info():
-    """Get information about cached embeddings"""
-    metadata = get_embedding_metadata()
-    cache_files = []
-    
-    if os.path.exists(CACHE_DIR):
-        for filename in os.listdir(CACHE_DIR):
-            if filename.startswith("embedding_") and filename.endswith(".pkl"):
-                cache_files.append({
-                    "filename": filename,
-                    "size": os.path.getsize(os.path.join(CACHE_DIR, filename)),
-                    "modified": os.path.getmtime(os.path.join(CACHE_DIR, filename))
-                })
+    """Get information about cached speaker latents (memory LRU + disk index)"""
+    entries = latent_cache.entries()
+    cache_files = [{
+        "filename": entry["cache_file"],
+        "size": entry["disk_size"],
+        "modified": os.path.getmtime(latent_cache.cache_file(entry["file_hash"]))
+    } for entry in entries if entry["on_disk"]]
     
     return JSONResponse({
         "cache_directory": CACHE_DIR,
         "total_cached_embeddings": len(cache_files),
-        "metadata_entries": len(metadata),
+        "metadata_entries": len(entries),
         "cache_files": cache_files,
-        "metadata": metadata
+        # Replicas keep their own memory LRU (summed here, per replica under "replicas"); disk entries and the index are shared
+        "memory": combine_memory_info(tts_batcher.pool.broadcast("info")) if tts_batcher.pool is not None else latent_cache.info(),
+        # Hit counters are per process; in replica mode /tts/stream lookups happen in the replicas
+        "segments": segment_cache.info(),
+        "process": "replicas" if tts_batcher.pool is not None else "api",
+        "entries": entries
     })
 
+@app.get("/cache/entries/{file_hash}")
+def get_cache_entry(file_hash: str):
+    """Inspect one cache entry (full hash or unique prefix)"""
+    matches = latent_cache.resolve(file_hash)
+    if not matches:
+        raise HTTPException(status_code=404, detail=f"No cache entry for {file_hash}")
+    if len(matches) > 1:
+        raise HTTPException(status_code=400, detail=f"Hash prefix {file_hash} matches {len(matches)} entries")
+    return JSONResponse(latent_cache.entries(matches[0])[0])
+
+@app.post("/cache/prewarm")
+def prewarm_cache(voices: list = Body(None, embed=True)):
+    """Load (or compute) latents for the given voices, default: every configured voice (on every replica)"""
+    if tts is None and tts_batcher.pool is None:
+        raise HTTPException(status_code=409, detail="Model is still loading")
+    snapshot = voice_registry.snapshot()
+    if voices is None:
+        voices = [snapshot["active_voice"]] + [v for v in snapshot["config"].get("voices", {}) if v != snapshot["active_voice"]]
+    
+    results = []
+    found = []
+    for voice in voices:
+        path = resolve_voice_path(voice)
+        # resolve_voice_path falls back to reference.wav - an unknown voice is not_found here
+        if not path or os.path.basename(path) != os.path.basename(voice):
+            results.append({"voice": voice, "status": "not_found"})
+        else:
+            found.append((voice, path))
+
+    if tts_batcher.pool is None:
+        command = cache_command("prewarm", found)
+        return JSONResponse({"results": results + command["results"], "memory": command["memory"]})
+
+    replies = tts_batcher.pool.broadcast("prewarm", found)
+    for i, (voice, path) in enumerate(found):
+        per_replica = [
+            {"replica": reply["replica"], "status": "error", "detail": reply["error"]} if "error" in reply
+            else {"replica": reply["replica"], **reply["results"][i]}
+            for reply in replies
+        ]
+        statuses = {entry["status"] for entry in per_replica}
+        results.append({
+            "voice": voice,
+            "file_hash": get_file_hash(path),
+            # error if any replica failed, computed if any replica had to compute it
+            "status": "error" if "error" in statuses else ("computed" if "computed" in statuses else "loaded"),
+            "replicas": per_replica
+        })
+    return JSONResponse({"results": results, "memory": combine_memory_info(replies)})
+
+@app.post("/cache/evict")
+def evict_cache(
+    voice_filename: str = Body(None),
+    file_hash: str = Body(None),
+    from_disk: bool = Body(False)
+):
+    """Evict one voice / hash (prefix) from the memory cache, or everything if neither is given; from_disk also deletes the .pth and index row"""
+    if voice_filename:
+        path = resolve_voice_path(voice_filename)
+        if not path or os.path.basename(path) != os.path.basename(voice_filename):
+            raise HTTPException(status_code=404, detail=f"Voice file not found: {voice_filename}")
+        hashes = [get_file_hash(path)]
+    elif file_hash:
+        hashes = latent_cache.resolve(file_hash)
+        if not hashes:
+            raise HTTPException(status_code=404, detail=f"No cache entry for {file_hash}")
+        if len(hashes) > 1:
+            raise HTTPException(status_code=400, detail=f"Hash prefix {file_hash} matches {len(hashes)} entries")
+    else:
+        hashes = None
+    
+    evicted = latent_cache.evict(hashes, from_disk=from_disk)
+    if tts_batcher.pool is None:
+        return JSONResponse({"evicted": evicted, "from_disk": from_disk, "memory": latent_cache.info()})
+
+    # Disk and index are shared and were handled above; each replica drops its own memory entries
+    replies = tts_batcher.pool.broadcast("evict", (hashes, False))
+    for reply in replies:
+        evicted = sorted(set(evicted) | set(reply.get("evicted", [])))
+    return JSONResponse({"evicted": evicted, "from_disk": from_disk, "memory": combine_memory_info(replies)})
+
 # Web UI Routes
 if templates:
     @app.get("/", response_class=HTMLResponse)